@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from benchmarks.qt import create_manager, clear
+from editor3d.objects import Box3D
+from editor3d.window import PropertyType
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(manager, count, single_limit):
+    boxes = [Box3D(position=(index % 100, index // 100 % 100, index // 10000)) for index in range(count)]
+    print("{} objects".format(count))
+
+    results = [
+        ("create", timed(lambda: manager.create_many(boxes))),
+        # Qt is updated on the next tick, the sync belongs to the cost of the edit
+        ("update", timed(lambda: (manager.update_many(boxes, PropertyType.COLOR, ["#ff0000"] * count),
+                                  manager.sync()))),
+        ("delete", timed(lambda: manager.delete_many(boxes))),
+    ]
+    single = {}
+    if count <= single_limit:
+        def create_single():
+            for _ in range(count):
+                manager.create_box()
+
+        single["create"] = timed(create_single)
+        created = list(manager.object_root.children)
+        single["update"] = timed(lambda: [(manager.update_color(_, "#ff0000"), manager.sync()) for _ in created])
+        single["delete"] = timed(lambda: [manager.delete_object(_) for _ in created])
+    for name, duration in results:
+        line = "  {:<7} batch {:9.4f} s".format(name, duration)
+        if name in single:
+            line += "   one by one {:9.4f} s".format(single[name])
+        print(line)
+    clear(manager)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch mutations on Manager against single calls")
+    parser.add_argument("--count", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--single-limit", type=int, default=1000,
+                        help="largest batch also measured with single calls, these are quadratic")
+    args = parser.parse_args()
+    manager = create_manager()
+    for count in args.count:
+        run(manager, count, args.single_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import time
+
+import numpy as np
+
+from editor3d.bvh import BVH, box_overlaps, ray_boxes
+
+
+def brute_ray(low, high, origin, direction):
+    hit, near = ray_boxes(low, high, origin, direction)
+    near = np.where(hit, near, np.inf)
+    best = int(np.argmin(near))
+    return best if np.isfinite(near[best]) else None
+
+
+def run(count, queries, seed=0):
+    rng = np.random.default_rng(seed)
+    # same density for every count, objects fill a cube that grows with the scene
+    side = 10 * count ** (1 / 3)
+    centers = rng.uniform(-side, side, (count, 3))
+    radius = rng.uniform(0.1, 3, (count, 1))
+    low, high = centers - radius, centers + radius
+
+    bvh = BVH()
+    bvh.insert_many(list(range(count)), low, high)
+    start = time.perf_counter()
+    bvh.build()
+    build = time.perf_counter() - start
+
+    rays = [(rng.uniform(-side, side, 3), rng.normal(size=3)) for _ in range(queries)]
+    start = time.perf_counter()
+    hits = [bvh.ray(origin, direction) for origin, direction in rays]
+    ray = (time.perf_counter() - start) / queries
+    start = time.perf_counter()
+    brute = [brute_ray(low, high, origin, direction) for origin, direction in rays]
+    ray_brute = (time.perf_counter() - start) / queries
+    assert [None if hit is None else hit[0] for hit in hits] == brute
+
+    boxes = [(center - side / 20, center + side / 20) for center in rng.uniform(-side, side, (queries, 3))]
+    start = time.perf_counter()
+    for query_low, query_high in boxes:
+        bvh.query_box(query_low, query_high)
+    box = (time.perf_counter() - start) / queries
+    start = time.perf_counter()
+    for query_low, query_high in boxes:
+        np.flatnonzero(box_overlaps(low, high, query_low, query_high))
+    box_brute = (time.perf_counter() - start) / queries
+
+    moved = rng.integers(0, count, queries)
+    start = time.perf_counter()
+    for key in moved.tolist():
+        bvh.update(key, low[key] + 1, high[key] + 1)
+    update = (time.perf_counter() - start) / queries
+
+    print("{:>8} objects  build {:7.3f} s  ray {:9.6f} s (scan {:9.6f} s)  box {:9.6f} s (scan {:9.6f} s)  "
+          "update {:9.6f} s".format(count, build, ray, ray_brute, box, box_brute, update))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BVH query latency against a brute force scan")
+    parser.add_argument("--count", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    for count in args.count:
+        run(count, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import time
+
+import numpy as np
+
+from editor3d.collision import CollisionScene, overlaps, shapes, sweep_and_prune
+from editor3d.objects import Box3D, Sphere3D
+from editor3d.transforms import local_matrices
+
+
+def objects(count, seed=0):
+    # flat scene of rotated boxes and spheres, the volume grows with the count so overlaps per object stay similar
+    rng = np.random.default_rng(seed)
+    side = 5 * count ** (1 / 3)
+    objs = []
+    for index in range(count):
+        position = tuple(rng.uniform(-side, side, 3))
+        if index % 2:
+            objs.append(Sphere3D(position=position, radius=rng.uniform(0.1, 1.5)))
+        else:
+            objs.append(Box3D(position=position, rotation=tuple(rng.uniform(0, 360, 3)),
+                              width=rng.uniform(0.2, 3), length=rng.uniform(0.2, 3), height=rng.uniform(0.2, 3)))
+    return objs
+
+
+def matrices(objs):
+    return local_matrices([obj.position for obj in objs], [obj.rotation for obj in objs], 1.0)
+
+
+def naive(objs, low, high):
+    # plain Python bounds test of every pair, the baseline the broad phase replaces
+    pairs = 0
+    for a in range(len(objs)):
+        for b in range(a + 1, len(objs)):
+            if all(low[a][k] <= high[b][k] and low[b][k] <= high[a][k] for k in range(3)):
+                pairs += 1
+    return pairs
+
+
+def run(count, moves, naive_count):
+    objs = objects(count)
+    world = matrices(objs)
+    start = time.perf_counter()
+    kinds, centers, axes, half, low, high = shapes(objs, world)
+    extract = time.perf_counter() - start
+    start = time.perf_counter()
+    first, second = sweep_and_prune(low, high)
+    broad = time.perf_counter() - start
+    start = time.perf_counter()
+    found = overlaps(kinds, centers, axes, half, first, second).sum()
+    narrow = time.perf_counter() - start
+    all_pairs = count * (count - 1) // 2
+    print("{:>7} objects   extract {:.3f} s   broad phase {:.3f} s {:>17,.0f} covered pairs/s   "
+          "narrow phase {:.4f} s {:>7,} candidates {:>12,.0f} pairs/s   {:,} overlapping".format(
+              count, extract, broad, all_pairs / broad, narrow, len(first), len(first) / narrow, found))
+
+    scene = CollisionScene()
+    scene.update(objs, world)
+    start = time.perf_counter()
+    scene.query()
+    print("          full query {:.3f} s".format(time.perf_counter() - start))
+
+    rng = np.random.default_rng(1)
+    for moved in moves:
+        picked = [objs[_] for _ in rng.choice(count, moved, replace=False)]
+        for obj in picked:
+            obj.position = tuple(np.asarray(obj.position) + rng.uniform(-1, 1, 3))
+        start = time.perf_counter()
+        scene.update(picked, matrices(picked))
+        scene.query()
+        seconds = time.perf_counter() - start
+        kind = "incremental" if scene.incremental_queries else "full"
+        print("          {:>6} moved   {:<11} re-query {:8.4f} s".format(moved, kind, seconds))
+        scene.incremental_queries = 0
+
+    if naive_count:
+        subset = objs[:naive_count]
+        _, _, _, _, low, high = shapes(subset, world[:naive_count])
+        low, high = low.tolist(), high.tolist()
+        start = time.perf_counter()
+        naive(subset, low, high)
+        seconds = time.perf_counter() - start
+        print("          naive Python bounds test of {} objects {:8.3f} s {:12,.0f} pairs/s".format(
+            naive_count, seconds, naive_count * (naive_count - 1) / 2 / seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broad and narrow phase collision query throughput")
+    parser.add_argument("--count", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--moves", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--naive", type=int, default=1000, help="objects for the pairwise Python baseline, 0 skips it")
+    args = parser.parse_args()
+    for count in args.count:
+        run(count, args.moves, args.naive)
+
+
+if __name__ == "__main__":
+    main()
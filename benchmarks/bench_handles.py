@@ -0,0 +1,137 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+from editor3d.handles import HandleTable
+from editor3d.objects import Box3D, ObjectOperation, ObjectRoot
+
+
+class Node:
+    # stands in for a Qt node, hashed by identity like QEntity
+    __slots__ = ()
+
+
+class FormerOperation:
+    # undo entries before the handle table, the object and its bound setter
+    def __init__(self, target, setter, from_value, to_value):
+        self.target = target
+        self.setter = setter
+        self.from_value = from_value
+        self.to_value = to_value
+
+
+def scene(count):
+    root = ObjectRoot()
+    objs = [Box3D() for _ in range(count)]
+    for obj in objs:
+        obj.parent = root
+    parts = [(Node(), Node(), Node(), Node()) for _ in range(count)]
+    return root, objs, parts
+
+
+def traced(function):
+    # bytes still allocated after function, the structure it builds is kept alive for the measurement
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def per_lookup(function, objs, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(objs)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best / len(objs) * 1e9
+
+
+def dictionaries(root, objs, parts):
+    # the former layout, a list of components per object and the owner of every entity
+    objects = {root: [Node(), None, None, None]}
+    entities = {objects[root][0]: root}
+    for obj, (entity, mesh, transform, material) in zip(objs, parts):
+        objects[obj] = [entity, mesh, transform, material]
+        entities[entity] = obj
+    return objects, entities
+
+
+def table(root, objs, parts):
+    handles = HandleTable()
+    handles.add(root, Node(), parent_id=None)
+    for obj, (entity, mesh, transform, material) in zip(objs, parts):
+        handles.add(obj, entity, mesh, transform, material, root.id)
+    return handles
+
+
+def run(count):
+    root, objs, parts = scene(count)
+    (objects, entities), before = traced(lambda: dictionaries(root, objs, parts))
+    handles, after = traced(lambda: table(root, objs, parts))
+    print("{:>8} objects   bookkeeping per object {:7.1f} B before {:7.1f} B after".format(
+        count, before / count, after / count))
+
+    def transforms_before(objs):
+        for obj in objs:
+            objects[obj][2]
+
+    def transforms_after(objs):
+        transforms, slots = handles.transforms, handles.slots
+        for obj in objs:
+            transforms[slots[obj.id]]
+
+    def parents_before(objs):
+        # owner of the parent entity, as done when an object moves to another parent
+        for obj in objs:
+            entities[objects[obj.parent][0]]
+
+    def parents_after(objs):
+        objects, parents, slots = handles.objects, handles.parents, handles.slots
+        for obj in objs:
+            objects[slots[parents[slots[obj.id]]]]
+
+    def contains_before(objs):
+        for obj in objs:
+            obj in objects
+
+    def contains_after(objs):
+        slots = handles.slots
+        for obj in objs:
+            obj.id in slots
+
+    for name, old, new in (("component", transforms_before, transforms_after),
+                           ("parent object", parents_before, parents_after),
+                           ("membership", contains_before, contains_after)):
+        print("          {:<14} lookup {:6.1f} ns before {:6.1f} ns after".format(
+            name, per_lookup(old, objs), per_lookup(new, objs)))
+
+    start = time.perf_counter()
+    for obj in objs:
+        handles.remove(obj.id)
+    for obj in objs:
+        handles.add(obj, None)
+    print("          remove and add again {:6.1f} ns per object, {} slots for {} handles".format(
+        (time.perf_counter() - start) / count * 1e9, len(handles.ids), len(handles)))
+
+    # the weak reference of an object is shared by all its entries, it is only created with the first one
+    _, before = traced(lambda: [FormerOperation(obj, obj.set_position, obj.position, (1, 2, 3)) for obj in objs])
+    first, after = traced(lambda: [ObjectOperation(obj, "set_position", obj.position, (1, 2, 3)) for obj in objs])
+    _, more = traced(lambda: [ObjectOperation(obj, "set_position", obj.position, (1, 2, 3)) for obj in objs])
+    print("          undo entry {:7.1f} B before {:7.1f} B after, {:7.1f} B for later entries of an object".format(
+        before / count, after / count, more / count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and lookup cost of the manager handle table")
+    parser.add_argument("--count", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+    for count in args.count:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
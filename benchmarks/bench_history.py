@@ -0,0 +1,67 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from editor3d.history import SpilledHistory
+from editor3d.objects import Box3D, ObjectRoot
+from editor3d.undopipeline import Pipeline
+
+
+def fill(pipeline, boxes, length):
+    for index in range(length):
+        pipeline.add_operation(boxes[index % len(boxes)].set_position((index, 0, 0)))
+
+
+def run(length, hot_size, steps, directory):
+    root = ObjectRoot()
+    boxes = [Box3D() for _ in range(100)]
+    for box in boxes:
+        box.set_parent(root)
+    filename = os.path.join(directory, "bench{}.history".format(length))
+    spill = SpilledHistory(filename, root, lambda obj, parent: None, lambda obj: None)
+
+    results = []
+    for name, pipeline in (("memory", Pipeline()), ("spilled", Pipeline(spill=spill, hot_size=hot_size))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fill(pipeline, boxes, length)
+        add = (time.perf_counter() - start) / length
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # the newest entries are in memory in both cases
+        start = time.perf_counter()
+        for _ in range(min(steps, hot_size // 2)):
+            pipeline.undo()
+        hot = (time.perf_counter() - start) / min(steps, hot_size // 2)
+        # further back the spilled history is read in batches of hot_size / 2 entries
+        count = min(steps, length - hot_size)
+        start = time.perf_counter()
+        for _ in range(count):
+            pipeline.undo()
+        deep = (time.perf_counter() - start) / max(count, 1)
+        results.append((name, size, add, hot, deep))
+        pipeline.clear()
+    spill.close()
+
+    print("{:>9} entries".format(length))
+    for name, size, add, hot, deep in results:
+        print("  {:<8} memory {:11,d} B   add {:9.7f} s   undo hot {:9.7f} s   undo old {:9.7f} s".format(
+            name, size, add, hot, deep))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Undo history memory and latency with and without spilling")
+    parser.add_argument("--length", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--hot-size", type=int, default=256)
+    parser.add_argument("--steps", type=int, default=1000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for length in args.length:
+            run(length, args.hot_size, args.steps, directory)
+
+
+if __name__ == "__main__":
+    main()
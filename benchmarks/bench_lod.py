@@ -0,0 +1,31 @@
+import argparse
+import time
+
+from benchmarks.bench_stl import grid_triangles
+from editor3d.lod import RESOLUTIONS, build_levels
+from editor3d.stl import welded_mesh
+
+
+def run(count, resolutions):
+    start = time.perf_counter()
+    mesh = welded_mesh(grid_triangles(count))
+    weld = time.perf_counter() - start
+    levels, report = build_levels(mesh, resolutions)
+    print("{} triangles, weld {:.3f} s".format(mesh.triangle_count, weld))
+    for level, (triangles, duration) in enumerate(report):
+        resolution = "source" if level == 0 else "{} cells".format(resolutions[level - 1])
+        print("  level {} {:>10} {:12,} triangles  {:6.1%}  {:8.3f} s".format(
+            level, resolution, triangles, triangles / max(mesh.triangle_count, 1), duration))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Level of detail build time and triangle counts")
+    parser.add_argument("--count", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--resolutions", type=int, nargs="+", default=list(RESOLUTIONS))
+    args = parser.parse_args()
+    for count in args.count:
+        run(count, args.resolutions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from editor3d.cli import export_ndjson, import_ndjson
+from editor3d.ndjson import SceneReader, read_rows, write_records
+from editor3d.objects import ObjectRoot
+
+
+def records(count, seed=0):
+    # a scene generated line by line, every object below one of the previous ones or at the top level
+    rng = random.Random(seed)
+    for index in range(1, count + 1):
+        parent = rng.randrange(index) or None
+        record = {"id": index, "parent": parent, "name": "Object {}".format(index),
+                  "position": [rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(-50, 50)],
+                  "rotation": [0.0, 0.0, 0.0], "color": "#dddddd"}
+        if index % 2:
+            record.update(type="Sphere3D", radius=rng.uniform(0.1, 3))
+        else:
+            record.update(type="Box3D", width=1.0, length=1.0, height=1.0)
+        yield record
+
+
+def build_tree(filename):
+    with open(filename, "rb") as file:
+        return SceneReader(read_rows(file)).attach_all(ObjectRoot())
+
+
+def measure(function, memory):
+    # seconds, and the peak of traced allocations in a second run if memory is set
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    if not memory:
+        return seconds, None
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run(count, directory, memory):
+    source = os.path.join(directory, "scene.ndjson")
+    database = os.path.join(directory, "scene.db")
+    output = os.path.join(directory, "export.ndjson")
+
+    def write():
+        with open(source, "w", encoding="utf-8") as file:
+            write_records(records(count), file)
+
+    cases = (
+        ("write generated", write),
+        ("import to sqlite", lambda: import_ndjson(source, database, force=True)),
+        ("export from sqlite", lambda: export_ndjson(database, output, force=True)),
+        ("build tree", lambda: build_tree(source)),
+    )
+    print("{:,} objects".format(count))
+    for name, function in cases:
+        seconds, peak = measure(function, memory)
+        print("  {:<20} {:8.2f} s {:>12,.0f} objects/s{}".format(
+            name, seconds, count / seconds, "" if peak is None else "   peak {:10.2f} MB".format(peak / 2 ** 20)))
+    print("  file {:.1f} MB".format(os.path.getsize(source) / 2 ** 20))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming NDJSON scene export and import throughput")
+    parser.add_argument("--count", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--memory", action="store_true", help="trace the peak memory of every case in a second run")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix="editor3d-ndjson-") as directory:
+        for count in args.count:
+            run(count, directory, args.memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.scenes import SceneRoot, generate_scene
+from editor3d.objects import walk
+from editor3d.scenestore import SceneStore
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    duration = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, duration
+
+
+def run(count):
+    root, plain_bytes, _ = measure(lambda: generate_scene(count, depth=3))
+    plain = list(walk(root))
+
+    # names are shared with the plain objects and therefore not part of the store figure
+    store = SceneStore()
+    _, store_bytes, _ = measure(lambda: store.add_tree(root, SceneRoot()))
+
+    print("{} objects".format(count))
+    print("  memory per object: plain {:7.1f} B, store {:7.1f} B".format(
+        plain_bytes / count, store_bytes / count))
+
+    start = time.perf_counter()
+    center = [0.0, 0.0, 0.0]
+    for obj in plain:
+        x, y, z = obj.position
+        center[0] += x
+        center[1] += y
+        center[2] += z
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.position[store.rows()].sum(axis=0)
+    array_time = time.perf_counter() - start
+    print("  sum of positions:  plain loop {:8.4f} s, store arrays {:8.4f} s".format(loop_time, array_time))
+
+    start = time.perf_counter()
+    for obj in plain:
+        x, y, z = obj.position
+        obj.position = (x + 1, y, z)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.position[store.rows(), 0] += 1
+    array_time = time.perf_counter() - start
+    print("  translate all:     plain loop {:8.4f} s, store arrays {:8.4f} s".format(loop_time, array_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare plain objects with the array backed scene store")
+    parser.add_argument("--count", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+    for count in args.count:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.scenes import SceneRoot, generate_scene
+from editor3d.snapshot import Snapshot, build_columns, write_snapshot
+
+
+def resident_bytes():
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _load(mode, filename):
+    # runs in a fresh interpreter so the RSS growth belongs to this load only
+    before = resident_bytes()
+    start = time.perf_counter()
+    if mode == "pickle":
+        with open(filename, "rb") as file:
+            scene = pickle.load(file)
+    elif mode == "snapshot":
+        scene = Snapshot(filename)
+    elif mode == "snapshot-tree":
+        scene = Snapshot(filename).load_tree(SceneRoot())
+    duration = time.perf_counter() - start
+    print(duration, resident_bytes() - before)
+    return scene
+
+
+def run(count, depth):
+    with tempfile.TemporaryDirectory() as directory:
+        root = generate_scene(count, depth)
+        pickle_file = os.path.join(directory, "scene.pickle")
+        snapshot_file = os.path.join(directory, "scene.snapshot")
+        with open(pickle_file, "wb") as file:
+            pickle.dump(root, file, protocol=pickle.HIGHEST_PROTOCOL)
+        write_snapshot(snapshot_file, *build_columns(root))
+        del root
+
+        print("{} objects, pickle {} bytes, snapshot {} bytes".format(
+            count, os.path.getsize(pickle_file), os.path.getsize(snapshot_file)))
+        for mode, filename in (("pickle", pickle_file), ("snapshot", snapshot_file),
+                               ("snapshot-tree", snapshot_file)):
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_snapshot", "--load", mode, filename],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            duration, rss = float(output[0]), int(output[1])
+            print("  {:<14} {:8.3f} s  {:8.1f} MiB RSS growth".format(mode, duration, rss / 2 ** 20))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pickle and columnar snapshot loading")
+    parser.add_argument("--count", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--load", nargs=2, metavar=("MODE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.load:
+        _load(*args.load)
+        return
+    for count in args.count:
+        run(count, args.depth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.scenes import generate_scene
+from editor3d.cli import convert
+from editor3d.objects import ObjectRoot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# each case runs in a fresh interpreter, the imports are part of the figure
+CASES = (
+    ("interpreter", ["-c", "pass"]),
+    ("import core", ["-c", "import editor3d.cli"]),
+    ("cli stats", ["-m", "editor3d", "stats", "{database}"]),
+    ("cli validate", ["-m", "editor3d", "validate", "{database}"]),
+    ("import qt manager", ["-c", "import editor3d.manager"]),
+    ("gui manager", ["-c", "import os; os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen'); "
+                            "from editor3d.manager import Manager; Manager(); os._exit(0)"]),
+)
+
+
+def run(arguments, directory, repeat):
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=directory, env=environment, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of the headless tools and the editor")
+    parser.add_argument("--count", type=int, default=10000, help="objects in the scene file")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "Shapes.pickle")
+        with open(database, "wb") as file:
+            pickle.dump(generate_scene(args.count, depth=3, root=ObjectRoot()), file)
+        # the editor opens Shapes.db in its working directory
+        convert(database, os.path.join(directory, "Shapes.db"))
+        print("{} objects".format(args.count))
+        for name, arguments in CASES:
+            arguments = [_.format(database=database) for _ in arguments]
+            print("  {:<18} {:8.3f} s".format(name, run(arguments, directory, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
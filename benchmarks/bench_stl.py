@@ -0,0 +1,74 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from editor3d.stl import load_stl, write_binary
+
+
+def grid_triangles(count, seed=0):
+    # height field surface, neighbouring triangles share corners like a real part
+    side = int(np.sqrt(count / 2)) + 2
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(np.arange(side, dtype=np.float32), np.arange(side, dtype=np.float32))
+    points = np.stack([x, y, rng.random((side, side), dtype=np.float32)], axis=-1)
+    a, b = points[:-1, :-1].reshape(-1, 3), points[:-1, 1:].reshape(-1, 3)
+    c, d = points[1:, :-1].reshape(-1, 3), points[1:, 1:].reshape(-1, 3)
+    triangles = np.concatenate([np.stack([a, b, c], axis=1), np.stack([b, d, c], axis=1)])
+    return triangles[:count]
+
+
+def write_ascii(path, triangles):
+    with open(path, "w") as file:
+        file.write("solid bench\n")
+        for triangle in triangles.tolist():
+            file.write("facet normal 0 0 0\nouter loop\n")
+            for vertex in triangle:
+                file.write("vertex {} {} {}\n".format(*vertex))
+            file.write("endloop\nendfacet\n")
+        file.write("endsolid bench\n")
+
+
+def measure(path, weld):
+    # timed without tracing, tracemalloc slows down every allocation
+    start = time.perf_counter()
+    mesh = load_stl(path, weld=weld)
+    duration = time.perf_counter() - start
+    del mesh
+    tracemalloc.start()
+    mesh = load_stl(path, weld=weld)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mesh, duration, peak
+
+
+def run(count, ascii_count):
+    triangles = grid_triangles(count)
+    with tempfile.TemporaryDirectory() as directory:
+        binary = os.path.join(directory, "part.stl")
+        write_binary(binary, triangles)
+        text = os.path.join(directory, "part-ascii.stl")
+        write_ascii(text, triangles[:ascii_count])
+
+        print("{} triangles, binary file {:.1f} MiB".format(len(triangles), os.path.getsize(binary) / 2 ** 20))
+        for name, path, weld in (("binary", binary, False), ("binary welded", binary, True),
+                                 ("ascii", text, False)):
+            mesh, duration, peak = measure(path, weld)
+            print("  {:<14} {:12,.0f} triangles/s  {:8.3f} s  peak {:8.1f} MiB  mesh {:8.1f} MiB".format(
+                name, mesh.triangle_count / duration, duration, peak / 2 ** 20, mesh.nbytes / 2 ** 20))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STL loading throughput and peak memory")
+    parser.add_argument("--count", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--ascii-count", type=int, default=100000)
+    args = parser.parse_args()
+    for count in args.count:
+        run(count, min(count, args.ascii_count))
+
+
+if __name__ == "__main__":
+    main()
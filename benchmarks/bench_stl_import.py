@@ -0,0 +1,61 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_stl import grid_triangles
+from editor3d.lod import build_levels
+from editor3d.stl import load_stl, write_binary
+from editor3d.stlimport import ParallelImport
+
+
+def corpus(directory, files, triangles):
+    paths = []
+    for index in range(files):
+        path = os.path.join(directory, "part{:04d}.stl".format(index))
+        write_binary(path, grid_triangles(triangles, seed=index))
+        paths.append(path)
+    return paths
+
+
+def serial(paths):
+    # what the single file button does, one file after another in the calling thread
+    start = time.perf_counter()
+    for path in paths:
+        build_levels(load_stl(path, weld=True))
+    return time.perf_counter() - start
+
+
+def parallel(paths, workers):
+    start = time.perf_counter()
+    importer = ParallelImport(paths, workers=workers)
+    # the gui thread only receives, the longest gap between results is what it would stall at most
+    first = None
+    for _ in importer.results():
+        if first is None:
+            first = time.perf_counter() - start
+    return time.perf_counter() - start, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi file STL import scaling over worker processes")
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--triangles", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    args = parser.parse_args()
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = corpus(directory, args.files, args.triangles)
+        print("{} files with {} triangles, {} cores".format(args.files, args.triangles, cores))
+        base = serial(paths)
+        print("  serial        {:8.3f} s".format(base))
+        for count in workers:
+            duration, first = parallel(paths, count)
+            print("  {:>3} workers   {:8.3f} s   speedup {:5.2f}   first part after {:6.3f} s".format(
+                count, duration, base / duration, first))
+
+
+if __name__ == "__main__":
+    main()
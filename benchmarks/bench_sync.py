@@ -0,0 +1,43 @@
+import argparse
+import time
+
+from benchmarks.qt import create_manager, clear
+from editor3d.objects import Box3D
+
+
+def run(manager, count, edits):
+    boxes = [Box3D(position=(index, 0, 0)) for index in range(count)]
+    manager.create_many(boxes)
+    manager.sync()
+
+    # a drag delivers many position events per frame, only the last one reaches Qt
+    stats = dict(manager.sync_stats)
+    start = time.perf_counter()
+    for index in range(edits):
+        for box in boxes:
+            manager.update_position(box, (index, 1, 0))
+    edit = time.perf_counter() - start
+    start = time.perf_counter()
+    manager.sync()
+    sync = time.perf_counter() - start
+    requested = manager.sync_stats["requested"] - stats["requested"]
+    applied = manager.sync_stats["applied"] - stats["applied"]
+    print("{:>7} objects x {:>3} edits per tick   edits {:8.4f} s   sync {:8.4f} s   "
+          "{:>8} requested {:>7} applied {:>8} avoided".format(
+              count, edits, edit, sync, requested, applied, requested - applied))
+    clear(manager)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qt updates avoided by the per tick sync")
+    parser.add_argument("--count", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+    manager = create_manager()
+    for count in args.count:
+        for edits in args.edits:
+            run(manager, count, edits)
+
+
+if __name__ == "__main__":
+    main()
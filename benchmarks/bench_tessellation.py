@@ -0,0 +1,61 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from editor3d.tessellation import FIXED_LEVEL, SPHERE_LEVELS, TessellationPolicy, projected_diameters, \
+    sphere_triangles
+
+# viewport height 700 pixels at the default 45 degree field of view
+FOCAL = 700 / (2 * math.tan(math.radians(45) / 2))
+
+
+def spheres(count, extent, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-extent, extent, (count, 3)), rng.uniform(0.1, 3, count)
+
+
+def orbit(distance, steps, degrees):
+    # camera positions around the y axis, a drag of the orbit controller
+    for angle in np.linspace(0, math.radians(degrees), steps):
+        yield distance * math.sin(angle), 0.0, distance * math.cos(angle)
+
+
+def run(count, budget, distance, steps, degrees):
+    centers, radii = spheres(count, 50)
+    fixed = count * sphere_triangles(*SPHERE_LEVELS[FIXED_LEVEL])
+    for hysteresis in (0.0, TessellationPolicy().hysteresis):
+        policy = TessellationPolicy(budget=budget, hysteresis=hysteresis)
+        current = None
+        changes = 0
+        seconds = []
+        for eye in orbit(distance, steps, degrees):
+            start = time.perf_counter()
+            sizes = projected_diameters(centers, radii, eye, FOCAL)
+            levels = policy.choose(sizes, current)
+            seconds.append(time.perf_counter() - start)
+            if current is not None:
+                changes += int((levels != current).sum())
+            current = levels
+        print("{:>7} spheres at {:>4} units, hysteresis {:.2f}   {:>10,} -> {:>10,} triangles  bias {:.2f}   "
+              "{:>7} level changes over {} steps   {:7.2f} ms per pass".format(
+                  count, distance, hysteresis, fixed, policy.total(current), policy.bias, changes, steps,
+                  1000 * np.median(seconds)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sphere triangles with fixed and adaptive tessellation")
+    parser.add_argument("--count", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--distance", type=float, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--budget", type=int, default=2000000, help="0 disables the budget")
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--degrees", type=float, default=30)
+    args = parser.parse_args()
+    for count in args.count:
+        for distance in args.distance:
+            run(count, args.budget, distance, args.steps, args.degrees)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import time
+
+from benchmarks.scenes import generate_scene
+from editor3d.objects import walk
+from editor3d.transforms import TransformTree, world_matrix
+
+
+def run(count, depth, moves):
+    root = generate_scene(count, depth)
+    objs = list(walk(root))
+    tree = TransformTree(root)
+
+    start = time.perf_counter()
+    tree.add_tree()
+    tree.update()
+    full = time.perf_counter() - start
+
+    # moving one top level object recomputes only its subtree
+    top_level = sorted(root.children, key=lambda obj: obj.id)
+    start = time.perf_counter()
+    for index in range(moves):
+        obj = top_level[index % len(top_level)]
+        obj.set_position((index, 0, 0))
+        tree.mark_dirty(obj)
+        tree.world_matrix(obj)
+    move = (time.perf_counter() - start) / moves
+
+    # one parent chain walk per object, what every consumer did before
+    sample = objs[:min(len(objs), 10000)]
+    start = time.perf_counter()
+    for obj in sample:
+        world_matrix(obj)
+    chain = (time.perf_counter() - start) / len(sample) * len(objs)
+    print("{:>8} objects depth {:>3}  full update {:8.3f} s ({:10,.0f} objects/s)  move {:9.6f} s  "
+          "per object chains {:8.3f} s".format(count, depth, full, count / full, move, chain))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="World transform propagation for deep and wide trees")
+    parser.add_argument("--count", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 4, 32])
+    parser.add_argument("--moves", type=int, default=100)
+    args = parser.parse_args()
+    for count in args.count:
+        for depth in args.depth:
+            run(count, depth, args.moves)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import time
+
+from benchmarks.qt import create_manager, clear
+from benchmarks.scenes import SceneRoot, generate_scene
+from editor3d.objects import walk
+
+
+def run(manager, count, edits):
+    objs = list(walk(generate_scene(count, depth=4, root=SceneRoot())))
+    top_level = [obj for obj in objs if isinstance(obj.parent, SceneRoot)]
+    for obj in top_level:
+        obj.set_parent(manager.object_root)
+    manager.create_many(objs)
+    frontend = manager.qt_frontend
+    # expand the path to one leaf so single edits hit listed rows
+    target = objs[-1]
+    path = []
+    node = target.parent
+    while node is not manager.object_root:
+        path.append(node)
+        node = node.parent
+    for node in reversed(path):
+        frontend.tree_model.fetchMore(frontend.tree_model.index_of(node))
+
+    start = time.perf_counter()
+    for index in range(edits):
+        manager.update_name(target, "Renamed {}".format(index))
+    rename = (time.perf_counter() - start) / edits
+
+    start = time.perf_counter()
+    frontend.set_known_objects(manager.object_root)
+    reset = time.perf_counter() - start
+    print("{:>8} objects   rename {:9.6f} s   full reset {:9.6f} s".format(count, rename, reset))
+    clear(manager)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Object tree refresh cost for single object edits")
+    parser.add_argument("--count", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+    manager = create_manager()
+    for count in args.count:
+        run(manager, count, args.edits)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import time
+
+from editor3d.objects import Box3D
+from editor3d.undopipeline import Pipeline, DeleteOperation
+
+
+def fill(pipeline, objs, length):
+    for index in range(length):
+        obj = objs[index % len(objs)]
+        pipeline.add_operation(obj.set_position((index, 0, 0)))
+
+
+def run(length, deletes):
+    # about ten entries per object, so the cost per object stays the same for every length
+    objs = [Box3D() for _ in range(max(2 * deletes, length // 10))]
+    pipeline = Pipeline()
+    fill(pipeline, objs, length)
+
+    start = time.perf_counter()
+    for obj in objs[:deletes]:
+        pipeline.add_operation(DeleteOperation(obj, None, lambda target, parent: None, lambda target: None))
+        pipeline.clean(obj)
+    indexed = (time.perf_counter() - start) / deletes
+
+    # what clean cost before the per target index, one scan of the whole queue
+    queue = list(pipeline.queue)
+    start = time.perf_counter()
+    for obj in objs[deletes:2 * deletes]:
+        queue = [_ for _ in queue if _.target is not obj]
+    scan = (time.perf_counter() - start) / deletes
+    print("{:>9} entries   indexed delete {:10.7f} s   full scan {:10.7f} s".format(length, indexed, scan))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete latency against history length")
+    parser.add_argument("--length", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--deletes", type=int, default=100)
+    args = parser.parse_args()
+    for length in args.length:
+        run(length, args.deletes)
+
+
+if __name__ == "__main__":
+    main()
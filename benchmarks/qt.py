@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+_manager = None
+
+
+def create_manager():
+    # one offscreen Manager per process, Qt only allows a single QApplication
+    global _manager
+    if _manager is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        os.chdir(tempfile.mkdtemp(prefix="editor3d-bench-"))
+        from editor3d.manager import Manager
+        sys.argv = sys.argv[:1]
+        _manager = Manager()
+    return _manager
+
+
+def clear(manager):
+    manager.delete_many(list(manager.object_root.children))
+    manager.undopipeline.clear()
@@ -0,0 +1,30 @@
+import random
+
+from editor3d.objects import Box3D, Sphere3D
+
+
+class SceneRoot:
+    def __init__(self):
+        self.children = set()
+
+
+def generate_scene(count, depth=1, seed=0, root=None):
+    # random spheres and boxes, nested up to depth levels below the root
+    rng = random.Random(seed)
+    root = SceneRoot() if root is None else root
+    levels = [[root]]
+    for index in range(count):
+        level = min(index * depth // max(count, 1), len(levels) - 1)
+        if level + 1 == len(levels):
+            levels.append([])
+        position = (rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(-50, 50))
+        rotation = (rng.uniform(0, 360), rng.uniform(0, 360), rng.uniform(0, 360))
+        color = "#{:06x}".format(rng.randrange(0x1000000))
+        if index % 2:
+            obj = Sphere3D("Sphere {}".format(index), position, rotation, color, radius=rng.uniform(0.1, 3))
+        else:
+            obj = Box3D("Box {}".format(index), position, rotation, color,
+                        rng.uniform(0.1, 3), rng.uniform(0.1, 3), rng.uniform(0.1, 3))
+        obj.set_parent(rng.choice(levels[level]))
+        levels[level + 1].append(obj)
+    return root
@@ -0,0 +1,249 @@
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.qt import create_manager, clear
+from benchmarks.scenes import SceneRoot, generate_scene
+from editor3d.objects import Box3D, walk
+from editor3d.storage import Storage, SQLiteStorage
+from editor3d.undopipeline import Pipeline
+
+# metrics are lower is better, seconds for a whole batch unless the name ends in _bytes
+# differences below the noise floor never count as a regression, fsync alone varies by a few ms
+NOISE_SECONDS = 0.005
+NOISE_BYTES = 64
+
+
+def best(function, repeat):
+    # fastest of repeat runs, garbage collection is paused like in timeit
+    durations = []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start)
+    finally:
+        if enabled:
+            gc.enable()
+    return min(durations)
+
+
+def peak(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_storage(results, count, depth, repeat):
+    root = generate_scene(count, depth)
+    with tempfile.TemporaryDirectory(prefix="editor3d-suite-") as directory:
+        for name, cls in (("pickle", Storage), ("sqlite", SQLiteStorage)):
+            filename = os.path.join(directory, "{}.db".format(name))
+
+            def store():
+                # a full write into a new file
+                for stale in glob.glob(filename + "*"):
+                    os.remove(stale)
+                storage = cls(filename, SceneRoot())
+                storage.root = root
+                for obj in walk(root):
+                    storage.mark_changed(obj)
+                storage.store()
+                if isinstance(storage, SQLiteStorage):
+                    storage.connection.close()
+
+            results["storage.{}.store".format(name)] = best(store, repeat)
+
+            def load():
+                storage = cls(filename, SceneRoot())
+                if isinstance(storage, SQLiteStorage):
+                    storage.connection.close()
+
+            results["storage.{}.load".format(name)] = best(load, repeat)
+
+
+def bench_undo(results, length, steps, repeat):
+    # steps undo, redo and clean calls against a history of length entries
+    objs = [Box3D() for _ in range(max(steps, length // 10))]
+
+    def fill():
+        pipeline = Pipeline()
+        for index in range(length):
+            pipeline.add_operation(objs[index % len(objs)].set_position((index, 0, 0)))
+        return pipeline
+
+    results["undo.add_operation"] = best(fill, repeat)
+    pipeline = fill()
+
+    def undo():
+        for _ in range(steps):
+            pipeline.undo()
+
+    def redo():
+        for _ in range(steps):
+            pipeline.redo()
+
+    undo_times = []
+    redo_times = []
+    for _ in range(repeat):
+        undo_times.append(best(undo, 1))
+        redo_times.append(best(redo, 1))
+    results["undo.undo"] = min(undo_times)
+    results["undo.redo"] = min(redo_times)
+
+    def clean():
+        for obj in objs[:steps]:
+            pipeline.clean(obj)
+
+    # clean removes the entries it finds, every run starts from a full history again
+    clean_times = []
+    for _ in range(repeat):
+        pipeline = fill()
+        clean_times.append(best(clean, 1))
+    results["undo.clean"] = min(clean_times)
+
+
+def attach(manager, count, depth):
+    objs = list(walk(generate_scene(count, depth, root=SceneRoot())))
+    for obj in objs:
+        if isinstance(obj.parent, SceneRoot):
+            obj.set_parent(manager.object_root)
+    return objs
+
+
+def bench_scene(results, manager, count, depth, edits, repeat):
+    generate = []
+    shapes = []
+    for _ in range(repeat):
+        attach(manager, count, depth)
+        start = time.perf_counter()
+        manager.generate_from_root()
+        generate.append(time.perf_counter() - start)
+        clear(manager)
+
+        # flat scene, every object is created on its own
+        objs = attach(manager, count, 1)
+        start = time.perf_counter()
+        for obj in objs:
+            manager.create_shape_from_object(obj)
+        shapes.append(time.perf_counter() - start)
+        clear(manager)
+    results["scene.generate_from_root"] = min(generate)
+    results["scene.create_shape_from_object"] = min(shapes)
+
+    objs = attach(manager, count, depth)
+    manager.generate_from_root()
+    frontend = manager.qt_frontend
+    results["ui.set_known_objects"] = best(lambda: frontend.set_known_objects(manager.object_root), repeat)
+
+    from PySide2.QtCore import QCoreApplication, QEvent
+
+    def select():
+        for index in range(edits):
+            frontend.update_object_editor(objs[index % len(objs)])
+            # the old editors are removed with deleteLater, that is part of the switch
+            QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    results["ui.update_object_editor"] = best(select, repeat)
+    frontend.update_object_editor(None)
+    clear(manager)
+
+
+def bench_memory(results, manager, count, depth):
+    # python heap only, memory held by Qt on the C++ side is not part of it
+    results["memory.object_bytes"] = peak(lambda: generate_scene(count, depth)) / count
+    results["memory.shape_bytes"] = peak(lambda: (attach(manager, count, depth), manager.generate_from_root())) / count
+    clear(manager)
+
+
+def compare(results, baseline, threshold):
+    # (name, baseline, current, change) of every metric slower than baseline by more than threshold
+    regressions = []
+    for name, value in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        noise = NOISE_BYTES if name.endswith("_bytes") else NOISE_SECONDS
+        if value > base * (1 + threshold) and value - base > noise:
+            regressions.append((name, base, value, value / base - 1 if base else float("inf")))
+    return regressions
+
+
+def report(results, baseline=None):
+    for name, value in sorted(results.items()):
+        unit = "B" if name.endswith("_bytes") else "s"
+        line = "  {:<34} {:14.7f} {}".format(name, value, unit)
+        if baseline and name in baseline and baseline[name]:
+            line += "   {:+7.1%}".format(value / baseline[name] - 1)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite with baseline comparison")
+    parser.add_argument("--count", type=int, default=2000, help="objects per synthetic scene")
+    parser.add_argument("--depth", type=int, default=4, help="nesting depth of the synthetic scenes")
+    parser.add_argument("--history", type=int, default=100000, help="undo history length")
+    parser.add_argument("--steps", type=int, default=1000, help="undo, redo and clean calls")
+    parser.add_argument("--edits", type=int, default=50, help="object editor switches")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per metric, the fastest one counts")
+    parser.add_argument("--output", help="write the results as json, usable as a later baseline")
+    parser.add_argument("--baseline", help="json results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 is 20%%")
+    parser.add_argument("--no-qt", action="store_true", help="skip scene, ui and shape memory metrics")
+    args = parser.parse_args()
+
+    config = {"count": args.count, "depth": args.depth, "history": args.history, "steps": args.steps,
+              "edits": args.edits}
+    results = {}
+    bench_storage(results, args.count, args.depth, args.repeat)
+    bench_undo(results, args.history, args.steps, args.repeat)
+    if not args.no_qt:
+        manager = create_manager()
+        bench_memory(results, manager, args.count, args.depth)
+        bench_scene(results, manager, args.count, args.depth, args.edits, args.repeat)
+    else:
+        results["memory.object_bytes"] = peak(lambda: generate_scene(args.count, args.depth)) / args.count
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            stored = json.load(file)
+        if stored["config"] != config:
+            print("Baseline was recorded with {}, this run uses {}".format(stored["config"], config))
+            return 2
+        baseline = stored["metrics"]
+
+    report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "config": config,
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "metrics": results,
+            }, file, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, base, value, change in regressions:
+            print("REGRESSION {}: {:.7f} -> {:.7f} ({:+.1%})".format(name, base, value, change))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+
+from editor3d.cli import main
+
+sys.exit(main())
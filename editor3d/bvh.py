@@ -0,0 +1,267 @@
+import numpy as np
+
+_EMPTY_LOW = np.inf
+_EMPTY_HIGH = -np.inf
+
+
+def _morton_codes(centers):
+    # 10 bits per axis interleaved, nearby boxes end up next to each other in the sort order
+    low = centers.min(axis=0)
+    extent = np.maximum(centers.max(axis=0) - low, 1e-12)
+    cells = np.clip(((centers - low) / extent * 1023).astype(np.uint64), 0, 1023)
+    codes = np.zeros(len(centers), dtype=np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            codes |= ((cells[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return codes
+
+
+def ray_boxes(low, high, origin, direction):
+    # slab test of one ray against many boxes, returns hit mask and entry distance
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inverse = 1.0 / direction
+        first = (low - origin) * inverse
+        second = (high - origin) * inverse
+    # a ray parallel to an axis and exactly on a box face gives 0 * inf, that face counts as inside
+    entry = np.minimum(first, second)
+    leave = np.maximum(first, second)
+    entry[np.isnan(entry)] = -np.inf
+    leave[np.isnan(leave)] = np.inf
+    near = np.maximum(entry.max(axis=1), 0.0)
+    far = leave.min(axis=1)
+    valid = (low <= high).all(axis=1)
+    return valid & (far >= near), near
+
+
+def box_overlaps(low, high, query_low, query_high):
+    return (low <= query_high).all(axis=1) & (high >= query_low).all(axis=1)
+
+
+def frustum_overlaps(low, high, planes):
+    # planes are (a, b, c, d) with a*x + b*y + c*z + d >= 0 inside, boxes fully behind one plane are out
+    normals, offsets = planes[:, :3], planes[:, 3]
+    positive = np.where(normals[None] >= 0, high[:, None], low[:, None])
+    # empty boxes are infinite and give nan here, they are masked out below
+    with np.errstate(invalid="ignore"):
+        inside = ((positive * normals[None]).sum(axis=2) + offsets[None] >= 0).all(axis=1)
+    return inside & (low <= high).all(axis=1)
+
+
+def frustum_planes(matrix):
+    # left, right, bottom, top, near and far plane of a combined projection * view matrix
+    matrix = np.asarray(matrix, dtype=np.float64)
+    rows = [matrix[3] + matrix[0], matrix[3] - matrix[0], matrix[3] + matrix[1],
+            matrix[3] - matrix[1], matrix[3] + matrix[2], matrix[3] - matrix[2]]
+    planes = np.array(rows)
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+
+class BVH:
+    # boxes sorted by morton code under an implicit complete binary tree, node i has children 2i+1 and 2i+2
+    def __init__(self, leaf_size=8, capacity=1024):
+        self.leaf_size = leaf_size
+        self.capacity = capacity
+        self.count = 0
+        self.low = np.full((capacity, 3), _EMPTY_LOW)
+        self.high = np.full((capacity, 3), _EMPTY_HIGH)
+        self.keys = []
+        self.slots = {}
+        self.free = []
+
+        # tree over the slots present at the last build, later inserts are tested directly until the next one
+        self.order = np.zeros(0, dtype=np.int64)
+        self.leaf_of = np.full(capacity, -1, dtype=np.int64)
+        self.leaves = 1
+        self.node_low = np.full((1, 3), _EMPTY_LOW)
+        self.node_high = np.full((1, 3), _EMPTY_HIGH)
+        self.pending = set()
+        self.removed = 0
+
+        self.builds = 0
+        self.refits = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    def _grow(self, capacity):
+        for name, fill in (("low", _EMPTY_LOW), ("high", _EMPTY_HIGH)):
+            old = getattr(self, name)
+            new = np.full((capacity, 3), fill)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        leaf_of = np.full(capacity, -1, dtype=np.int64)
+        leaf_of[:self.count] = self.leaf_of[:self.count]
+        self.leaf_of = leaf_of
+        self.capacity = capacity
+
+    def _allocate(self, key):
+        if self.free:
+            slot = self.free.pop()
+            self.keys[slot] = key
+        else:
+            if self.count == self.capacity:
+                self._grow(self.capacity * 2)
+            slot = self.count
+            self.count += 1
+            self.keys.append(key)
+        self.slots[key] = slot
+        return slot
+
+    def insert(self, key, low, high):
+        if key in self.slots:
+            self.update(key, low, high)
+            return
+        slot = self._allocate(key)
+        self.low[slot] = low
+        self.high[slot] = high
+        self.pending.add(slot)
+
+    def insert_many(self, keys, low, high):
+        for key in keys:
+            self.insert(key, _EMPTY_LOW, _EMPTY_HIGH)
+        slots = np.fromiter((self.slots[key] for key in keys), dtype=np.int64, count=len(keys))
+        self.low[slots] = low
+        self.high[slots] = high
+
+    def update(self, key, low, high):
+        slot = self.slots[key]
+        self.low[slot] = low
+        self.high[slot] = high
+        leaf = self.leaf_of[slot]
+        if leaf >= 0:
+            self._refit(leaf)
+
+    def remove(self, key):
+        slot = self.slots.pop(key)
+        self.keys[slot] = None
+        self.low[slot] = _EMPTY_LOW
+        self.high[slot] = _EMPTY_HIGH
+        self.pending.discard(slot)
+        if self.leaf_of[slot] >= 0:
+            # stays in its leaf as an empty box, node bounds are only too large until the next build
+            self.removed += 1
+        else:
+            self.free.append(slot)
+
+    def _leaf_slots(self, leaf):
+        return self.order[leaf * self.leaf_size:(leaf + 1) * self.leaf_size]
+
+    def _refit(self, leaf):
+        # recompute the leaf box, then its ancestors up to the root
+        slots = self._leaf_slots(leaf)
+        node = self.leaves - 1 + leaf
+        self.node_low[node] = self.low[slots].min(axis=0)
+        self.node_high[node] = self.high[slots].max(axis=0)
+        while node > 0:
+            node = (node - 1) // 2
+            children = [2 * node + 1, 2 * node + 2]
+            self.node_low[node] = self.node_low[children].min(axis=0)
+            self.node_high[node] = self.node_high[children].max(axis=0)
+        self.refits += 1
+
+    def _needs_build(self):
+        built = len(self.order)
+        return len(self.pending) > max(64, built // 4) or (built and self.removed * 2 > built)
+
+    def build(self):
+        # fully vectorized: sort by morton code, reduce leaves and then one tree level at a time
+        self.builds += 1
+        for slot in np.flatnonzero(self.leaf_of[:self.count] >= 0):
+            if self.keys[slot] is None:
+                self.free.append(int(slot))
+        self.leaf_of[:] = -1
+        self.pending.clear()
+        self.removed = 0
+
+        slots = np.fromiter(self.slots.values(), dtype=np.int64, count=len(self.slots))
+        if len(slots):
+            centers = (self.low[slots] + self.high[slots]) / 2
+            slots = slots[np.argsort(_morton_codes(centers), kind="stable")]
+        self.order = slots
+        leaves = max(1, -(-len(slots) // self.leaf_size))
+        self.leaves = 1 << (leaves - 1).bit_length()
+        self.leaf_of[slots] = np.arange(len(slots)) // self.leaf_size
+
+        node_low = np.full((2 * self.leaves - 1, 3), _EMPTY_LOW)
+        node_high = np.full((2 * self.leaves - 1, 3), _EMPTY_HIGH)
+        if len(slots):
+            starts = np.arange(0, len(slots), self.leaf_size)
+            first = self.leaves - 1
+            node_low[first:first + len(starts)] = np.minimum.reduceat(self.low[slots], starts)
+            node_high[first:first + len(starts)] = np.maximum.reduceat(self.high[slots], starts)
+        level = self.leaves - 1
+        while level > 0:
+            parents = np.arange((level - 1) // 2, level)
+            node_low[parents] = np.minimum(node_low[2 * parents + 1], node_low[2 * parents + 2])
+            node_high[parents] = np.maximum(node_high[2 * parents + 1], node_high[2 * parents + 2])
+            level = (level - 1) // 2
+        self.node_low = node_low
+        self.node_high = node_high
+
+    def _candidates(self, test):
+        # breadth first, every step tests the whole frontier of one tree level at once
+        if self._needs_build():
+            self.build()
+        frontier = np.zeros(1, dtype=np.int64)
+        first_leaf = self.leaves - 1
+        while len(frontier) and frontier[0] < first_leaf:
+            frontier = frontier[test(self.node_low[frontier], self.node_high[frontier])]
+            frontier = np.stack([2 * frontier + 1, 2 * frontier + 2], axis=1).ravel()
+        if len(frontier):
+            frontier = frontier[test(self.node_low[frontier], self.node_high[frontier])]
+        positions = ((frontier - first_leaf)[:, None] * self.leaf_size + np.arange(self.leaf_size)).ravel()
+        slots = self.order[positions[positions < len(self.order)]]
+        if self.pending:
+            slots = np.concatenate([slots, np.fromiter(self.pending, dtype=np.int64, count=len(self.pending))])
+        return slots
+
+    def ray(self, origin, direction, max_distance=np.inf):
+        # closest box hit by the ray as (key, distance), None if nothing is hit
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        slots = self._candidates(lambda low, high: ray_boxes(low, high, origin, direction)[0])
+        if not len(slots):
+            return None
+        hit, near = ray_boxes(self.low[slots], self.high[slots], origin, direction)
+        near = np.where(hit & (near <= max_distance), near, np.inf)
+        best = int(np.argmin(near))
+        if not np.isfinite(near[best]):
+            return None
+        return self.keys[slots[best]], float(near[best])
+
+    def ray_hits(self, origin, direction, max_distance=np.inf):
+        # every box hit by the ray as (key, distance), the closest first
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        slots = self._candidates(lambda low, high: ray_boxes(low, high, origin, direction)[0])
+        hit, near = ray_boxes(self.low[slots], self.high[slots], origin, direction)
+        hit &= near <= max_distance
+        slots, near = slots[hit], near[hit]
+        order = np.argsort(near, kind="stable")
+        return [(self.keys[slot], distance) for slot, distance in zip(slots[order].tolist(), near[order].tolist())]
+
+    def query_box(self, low, high):
+        low = np.asarray(low, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        slots = self._candidates(lambda node_low, node_high: box_overlaps(node_low, node_high, low, high))
+        slots = slots[box_overlaps(self.low[slots], self.high[slots], low, high)]
+        return [self.keys[slot] for slot in slots.tolist()]
+
+    def query_frustum(self, planes):
+        planes = np.asarray(planes, dtype=np.float64)
+        slots = self._candidates(lambda low, high: frustum_overlaps(low, high, planes))
+        slots = slots[frustum_overlaps(self.low[slots], self.high[slots], planes)]
+        return [self.keys[slot] for slot in slots.tolist()]
+
+    def stats(self):
+        return {
+            "objects": len(self.slots),
+            "nodes": len(self.node_low),
+            "pending": len(self.pending),
+            "removed": self.removed,
+            "builds": self.builds,
+            "refits": self.refits,
+        }
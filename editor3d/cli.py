@@ -0,0 +1,391 @@
+import argparse
+import fnmatch
+import math
+import os
+import sys
+from collections import Counter
+
+from editor3d.ndjson import SceneReader, read_rows, scene_records, sqlite_records, write_records
+from editor3d.objects import COLOR, ObjectRoot, OBJECT_TYPES, STL3D, object_type, parse_color, walk
+from editor3d.storage import SQLITE_HEADER, Storage, SQLiteStorage
+
+FORMATS = ("pickle", "sqlite", "snapshot")
+# start of snapshot files, see editor3d.snapshot, which is only imported for snapshots as it needs numpy
+SNAPSHOT_MAGIC = b"E3DSNAP\0"
+EXTENSIONS = {".db": "sqlite", ".sqlite": "sqlite", ".snap": "snapshot", ".pickle": "pickle", ".pkl": "pickle"}
+STDOUT = "-"
+
+
+def _finite(values):
+    return all(isinstance(_, (int, float)) and math.isfinite(_) for _ in values)
+
+
+def _vector(value):
+    vector = tuple(float(_) for _ in value.split(","))
+    if len(vector) != 3 or not _finite(vector):
+        raise ValueError("Expected a vector as x,y,z, got {!r}".format(value))
+    return vector
+
+
+# property=value of the set command, the setter and how the value is parsed, parsing rejects the values
+# validate reports as errors
+PROPERTIES = {
+    "name": ("set_name", str),
+    "color": ("set_color", parse_color),
+    "position": ("set_position", _vector),
+    "rotation": ("set_rotation", _vector),
+    "radius": ("set_radius", float),
+    "width": ("set_width", float),
+    "length": ("set_length", float),
+    "height": ("set_height", float),
+    "scale": ("set_scale", float),
+}
+
+
+def detect(filename):
+    with open(filename, "rb") as file:
+        header = file.read(len(SQLITE_HEADER))
+    if header == SQLITE_HEADER:
+        return "sqlite"
+    if header.startswith(SNAPSHOT_MAGIC):
+        return "snapshot"
+    return "pickle"
+
+
+def storage_class(format):
+    if format == "snapshot":
+        from editor3d.snapshot import SnapshotStorage
+        return SnapshotStorage
+    return SQLiteStorage if format == "sqlite" else Storage
+
+
+def open_storage(filename, format=None):
+    storage = storage_class(format or detect(filename))(filename, ObjectRoot(), delay=0.0)
+    return storage, storage.get_root()
+
+
+def close(storage):
+    if isinstance(storage, SQLiteStorage):
+        storage.close()
+    else:
+        storage.flush()
+
+
+def stats(root):
+    objs = list(walk(root))
+    depths = {}
+    for obj in objs:
+        depths[obj] = 0 if obj.parent is root else depths[obj.parent] + 1
+    return {
+        "objects": len(objs),
+        "top_level": len(root.children),
+        "max_depth": max(depths.values(), default=-1) + 1,
+        "types": dict(Counter(object_type(obj).__name__ for obj in objs)),
+        "stl_files": len({os.path.abspath(obj.path) for obj in objs if isinstance(obj, STL3D)}),
+    }
+
+
+def validate(root):
+    # (level, object, message) of every problem, errors make a file unusable, warnings do not
+    problems = []
+    ids = Counter()
+    seen = set()
+    stack = [(child, root) for child in root.children]
+    while stack:
+        obj, parent = stack.pop()
+        if obj in seen:
+            problems.append(("error", obj, "reachable twice, the tree has a cycle or shared child"))
+            continue
+        seen.add(obj)
+        ids[getattr(obj, "id", None)] += 1
+        if obj.parent is not parent:
+            problems.append(("error", obj, "parent link does not match the children of its parent"))
+        if not isinstance(obj, OBJECT_TYPES):
+            problems.append(("error", obj, "unknown type {}".format(type(obj).__name__)))
+            continue
+        if not (len(obj.position) == 3 and _finite(obj.position)):
+            problems.append(("error", obj, "invalid position {!r}".format(obj.position)))
+        if not (len(obj.rotation) == 3 and _finite(obj.rotation)):
+            problems.append(("error", obj, "invalid rotation {!r}".format(obj.rotation)))
+        if not isinstance(obj.color, str) or not COLOR.match(obj.color):
+            problems.append(("error", obj, "invalid color {!r}".format(obj.color)))
+        for field in ("radius", "width", "length", "height", "scale"):
+            value = getattr(obj, field, None)
+            if value is not None and not (_finite([value]) and value > 0):
+                problems.append(("warning", obj, "{} is {!r}".format(field, value)))
+        if isinstance(obj, STL3D) and not os.path.exists(obj.path):
+            problems.append(("warning", obj, "missing STL file {}".format(obj.path)))
+        stack.extend((child, obj) for child in obj.children)
+    for obj_id, count in ids.items():
+        if count > 1:
+            problems.append(("error", None, "id {} is used {} times".format(obj_id, count)))
+    return problems
+
+
+def _remove(target):
+    for filename in (target, target + "-wal", target + "-shm"):
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def _replace(target, force):
+    if os.path.exists(target):
+        if not force:
+            raise FileExistsError("{} exists, use --force to replace it".format(target))
+        _remove(target)
+
+
+def _write_tree(root, target, format):
+    output = storage_class(format)(target, ObjectRoot(), delay=0.0)
+    output.root = root
+    for obj in walk(root):
+        output.mark_changed(obj)
+    output.store()
+    close(output)
+
+
+def convert(source, target, format=None, force=False):
+    # a full copy of the tree, every object is written once
+    _replace(target, force)
+    format = format or EXTENSIONS.get(os.path.splitext(target)[1], "sqlite")
+    storage, root = open_storage(source)
+    close(storage)
+    _write_tree(root, target, format)
+    return format
+
+
+def export_ndjson(source, target, force=False):
+    # one line per object, SQLite files are streamed row by row without building the tree, returns the count
+    format = detect(source)
+    if format == "sqlite":
+        records = sqlite_records(source)
+    else:
+        storage, root = open_storage(source, format)
+        close(storage)
+        records = scene_records(root)
+    if target == STDOUT:
+        return write_records(records, sys.stdout)
+    _replace(target, force)
+    with open(target, "w", encoding="utf-8") as file:
+        return write_records(records, file)
+
+
+def import_ndjson(source, target, format=None, force=False):
+    # a new scene file from NDJSON, SQLite targets take the rows as they are read, returns count and format
+    _replace(target, force)
+    format = format or EXTENSIONS.get(os.path.splitext(target)[1], "sqlite")
+    try:
+        with open(source, "rb") as file:
+            if format == "sqlite":
+                storage = SQLiteStorage(target, ObjectRoot(), delay=0.0)
+                try:
+                    count = storage.write_rows(read_rows(file, source))
+                finally:
+                    storage.close()
+            else:
+                reader = SceneReader(read_rows(file, source))
+                _write_tree(reader.attach_all(ObjectRoot()), target, format)
+                count = reader.count
+    except ValueError:
+        # nothing of a broken file is kept
+        _remove(target)
+        raise
+    return count, format
+
+
+def collisions(root):
+    # overlapping pairs of boxes and spheres, numpy is only imported for this command
+    from editor3d.collision import CollisionScene, collidable
+    from editor3d.transforms import TransformTree
+    transforms = TransformTree(root)
+    transforms.add_tree()
+    objs = [obj for obj in walk(root) if collidable(obj)]
+    scene = CollisionScene()
+    scene.update(objs, transforms.world_matrices(objs))
+    return scene.pairs()
+
+
+def select(root, type=None, name=None, ids=None):
+    for obj in walk(root):
+        if type is not None and object_type(obj).__name__ != type:
+            continue
+        if name is not None and not fnmatch.fnmatchcase(obj.name, name):
+            continue
+        if ids is not None and obj.id not in ids:
+            continue
+        yield obj
+
+
+def parse_assignment(assignment):
+    field, _, value = assignment.partition("=")
+    if field not in PROPERTIES or not _:
+        raise ValueError("Expected property=value with one of {}, got {!r}".format(
+            ", ".join(PROPERTIES), assignment))
+    setter, parse = PROPERTIES[field]
+    try:
+        return field, setter, parse(value)
+    except ValueError as error:
+        raise ValueError("Invalid {}: {}".format(field, error))
+
+
+def parse_assignments(assignments):
+    return [parse_assignment(assignment) for assignment in assignments]
+
+
+def _assignment(assignment):
+    # argparse type of the set command, invalid values end with a usage error before the file is opened
+    try:
+        return parse_assignment(assignment)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def bulk_set(objs, values):
+    # the same setters the editor uses, objects without a property skip it, returns the changed objects
+    changed = []
+    for obj in objs:
+        applied = False
+        for field, setter, value in values:
+            if hasattr(obj, setter) and hasattr(obj, field):
+                getattr(obj, setter)(value)
+                applied = True
+        if applied:
+            changed.append(obj)
+    return changed
+
+
+def _print_stats(args):
+    storage, root = open_storage(args.database)
+    result = stats(root)
+    close(storage)
+    print("{}: {} ({} bytes)".format(args.database, detect(args.database), os.path.getsize(args.database)))
+    for key, value in result.items():
+        print("  {:<10} {}".format(key, value))
+    return 0
+
+
+def _validate(args):
+    storage, root = open_storage(args.database)
+    problems = validate(root)
+    close(storage)
+    for level, obj, message in problems:
+        where = "" if obj is None else "{} {!r}: ".format(getattr(obj, "id", "?"), getattr(obj, "name", obj))
+        print("{}: {}{}".format(level, where, message))
+    errors = sum(1 for level, _, _ in problems if level == "error")
+    print("{} errors, {} warnings".format(errors, len(problems) - errors))
+    return 1 if errors else 0
+
+
+def _convert(args):
+    format = convert(args.source, args.target, args.format, args.force)
+    print("{} written as {}".format(args.target, format))
+    return 0
+
+
+def _export(args):
+    count = export_ndjson(args.database, args.output, args.force)
+    if args.output != STDOUT:
+        print("{} objects written to {}".format(count, args.output))
+    return 0
+
+
+def _import(args):
+    count, format = import_ndjson(args.source, args.database, args.format, args.force)
+    print("{} objects written to {} as {}".format(count, args.database, format))
+    return 0
+
+
+def _collisions(args):
+    storage, root = open_storage(args.database)
+    close(storage)
+    pairs = collisions(root)
+    for a, b in (pairs[:args.limit] if args.limit else pairs):
+        print("{} {!r} overlaps {} {!r}".format(a.id, a.name, b.id, b.name))
+    print("{} overlapping pairs".format(len(pairs)))
+    return 1 if args.check and pairs else 0
+
+
+def _set(args):
+    values = args.assignments
+    storage, root = open_storage(args.database)
+    objs = list(select(root, args.type, args.name, set(args.id) if args.id else None))
+    changed = bulk_set(objs, values)
+    if changed and not args.dry_run:
+        for obj in changed:
+            storage.mark_changed(obj)
+        storage.store()
+    close(storage)
+    print("{} of {} matching objects {}".format(len(changed), len(objs), "would change" if args.dry_run else "changed"))
+    return 0
+
+
+def _gui(args):
+    # the only command that needs Qt
+    os.chdir(os.path.dirname(os.path.abspath(args.database)))
+    from editor3d.manager import Manager
+    sys.argv = sys.argv[:1]
+    return Manager().start()
+
+
+def parser():
+    result = argparse.ArgumentParser(prog="python -m editor3d", description="3D editor and headless scene tools")
+    commands = result.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("stats", help="object counts of a scene file")
+    command.add_argument("database", nargs="?", default="Shapes.db")
+    command.set_defaults(run=_print_stats)
+
+    command = commands.add_parser("validate", help="check tree links, ids and values, exit 1 on errors")
+    command.add_argument("database", nargs="?", default="Shapes.db")
+    command.set_defaults(run=_validate)
+
+    command = commands.add_parser("convert", help="copy a scene into another storage format")
+    command.add_argument("source")
+    command.add_argument("target")
+    command.add_argument("--format", choices=FORMATS, help="default from the target extension")
+    command.add_argument("--force", action="store_true", help="replace an existing target")
+    command.set_defaults(run=_convert)
+
+    command = commands.add_parser("collisions", help="list overlapping boxes and spheres")
+    command.add_argument("database", nargs="?", default="Shapes.db")
+    command.add_argument("--limit", type=int, help="list at most this many pairs")
+    command.add_argument("--check", action="store_true", help="exit 1 if any objects overlap")
+    command.set_defaults(run=_collisions)
+
+    command = commands.add_parser("export", help="write a scene as NDJSON, one object per line")
+    command.add_argument("database")
+    command.add_argument("output", help="{} for standard output".format(STDOUT))
+    command.add_argument("--force", action="store_true", help="replace an existing output")
+    command.set_defaults(run=_export)
+
+    command = commands.add_parser("import", help="create a scene file from NDJSON")
+    command.add_argument("source")
+    command.add_argument("database")
+    command.add_argument("--format", choices=FORMATS, help="default from the database extension")
+    command.add_argument("--force", action="store_true", help="replace an existing database")
+    command.set_defaults(run=_import)
+
+    command = commands.add_parser("set", help="set properties of all matching objects")
+    command.add_argument("database")
+    command.add_argument("assignments", nargs="+", type=_assignment, metavar="property=value",
+                         help="one of {}, vectors as x,y,z".format(", ".join(PROPERTIES)))
+    command.add_argument("--type", choices=[cls.__name__ for cls in OBJECT_TYPES])
+    command.add_argument("--name", help="glob pattern on the object name")
+    command.add_argument("--id", type=int, action="append")
+    command.add_argument("--dry-run", action="store_true")
+    command.set_defaults(run=_set)
+
+    command = commands.add_parser("gui", help="start the editor")
+    command.add_argument("database", nargs="?", default="Shapes.db",
+                         help="the editor uses Shapes.db in the directory of this file")
+    command.set_defaults(run=_gui)
+    return result
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    try:
+        return args.run(args)
+    except (OSError, ValueError) as error:
+        print("Error: {}".format(error), file=sys.stderr)
+        return 2
@@ -0,0 +1,342 @@
+import numpy as np
+
+from editor3d.objects import Box3D, Sphere3D
+
+BOX, SPHERE, EMPTY = 0, 1, -1
+# added to |R| in the box test, nearly parallel edges give cross products close to zero
+EPSILON = 1e-9
+# candidate pairs or compared rows handled at once, bounds the temporary arrays
+BLOCK = 1 << 20
+# queries with at most this many changed rows test only them against all others
+INCREMENTAL_ROWS = 256
+# rows moved since the last full query, beyond that its sorted order is too stale to search
+STALE_ROWS = 4096
+# grid cells of the broad phase measure this many average bounds, at most MAX_CELLS along an axis,
+# and grow until the boxes touch at most CELL_ENTRIES cells on average
+CELL_SIZE = 4.0
+MAX_CELLS = 1 << 12
+CELL_ENTRIES = 8
+
+
+def collidable(obj):
+    return isinstance(obj, (Box3D, Sphere3D))
+
+
+def shapes(objs, matrices):
+    # kinds, centers, unit axes as columns, half extents and world aligned bounds of boxes and spheres
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    linear = matrices[:, :3, :3]
+    scales = np.linalg.norm(linear, axis=1)
+    axes = linear / np.where(scales > 0, scales, 1.0)[:, None, :]
+    centers = matrices[:, :3, 3].copy()
+    kinds = np.empty(len(matrices), dtype=np.int8)
+    half = np.empty((len(matrices), 3))
+    for index, obj in enumerate(objs):
+        if isinstance(obj, Sphere3D):
+            kinds[index] = SPHERE
+            half[index] = obj.radius
+        elif isinstance(obj, Box3D):
+            kinds[index] = BOX
+            # QCuboidMesh extents along x, y and z
+            half[index] = (obj.width / 2, obj.length / 2, obj.height / 2)
+        else:
+            raise TypeError("Only boxes and spheres collide, got {}".format(type(obj).__name__))
+    spheres = kinds == SPHERE
+    half[spheres] *= scales[spheres].max(axis=1, keepdims=True)
+    half[~spheres] *= scales[~spheres]
+    axes[spheres] = np.identity(3)
+    extent = np.einsum("nij,nj->ni", np.abs(axes), half)
+    return kinds, centers, axes, half, centers - extent, centers + extent
+
+
+def _ranges(begin, counts):
+    # (owner, position) for every position in [begin, begin + count) of every owner, about BLOCK at a time
+    totals = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        done = totals[start - 1] if start else 0
+        stop = max(int(np.searchsorted(totals, done + BLOCK, side="right")), start + 1)
+        block = counts[start:stop]
+        owner = np.repeat(np.arange(start, stop), block)
+        yield owner, np.repeat(begin[start:stop] - (np.cumsum(block) - block), block) + np.arange(len(owner))
+        start = stop
+
+
+def sweep_axis(low, high):
+    # the axis where the centers spread most
+    live = np.all(low <= high, axis=1)
+    return int(np.argmax((low[live] + high[live]).var(axis=0))) if live.sum() > 1 else 0
+
+
+def _cells(low, high, origin, size):
+    # first and last grid cell of every box along the grid axes
+    last = MAX_CELLS - 1
+    return (np.clip(np.floor((low - origin) / size), 0, last).astype(np.int64),
+            np.clip(np.floor((high - origin) / size), 0, last).astype(np.int64))
+
+
+def sweep_and_prune(low, high):
+    # pairs (i, j) with i < j whose bounds overlap. The two other axes are cut into a grid of cells a few
+    # boxes wide and the sweep runs along the sweep axis inside every cell, a pair is reported only in the
+    # cell holding the larger of both lower corners
+    empty = np.empty(0, dtype=np.int64)
+    rows = np.flatnonzero(np.all(low <= high, axis=1))
+    if len(rows) < 2:
+        return empty, empty
+    low, high = low[rows], high[rows]
+    count = len(rows)
+    axis = sweep_axis(low, high)
+    grid = [_ for _ in range(3) if _ != axis]
+    origin = low[:, grid].min(axis=0)
+    span = high[:, grid].max(axis=0) - origin
+    size = np.maximum(np.maximum(CELL_SIZE * (high - low)[:, grid].mean(axis=0), span / MAX_CELLS), 1e-12)
+    while True:
+        first_cell, last_cell = _cells(low[:, grid], high[:, grid], origin, size)
+        spans = last_cell - first_cell + 1
+        entries = spans[:, 0] * spans[:, 1]
+        if entries.sum() <= CELL_ENTRIES * count:
+            break
+        size = size * 2
+    # one entry per box and cell it touches
+    owner = np.repeat(np.arange(count), entries)
+    index = np.arange(len(owner)) - np.repeat(np.cumsum(entries) - entries, entries)
+    cell_x = first_cell[owner, 0] + index % spans[owner, 0]
+    cell_y = first_cell[owner, 1] + index // spans[owner, 0]
+    cell = cell_x * MAX_CELLS + cell_y
+    # exact integer keys, the lower end of j is below the upper end of i exactly when start_j < end_i
+    lows = np.sort(low[:, axis])
+    start = cell * (count + 1) + np.searchsorted(lows, low[owner, axis], side="left")
+    end = cell * (count + 1) + np.searchsorted(lows, high[owner, axis], side="right")
+    order = np.argsort(start, kind="stable")
+    start, end, owner, cell_x, cell_y = start[order], end[order], owner[order], cell_x[order], cell_y[order]
+    # the entries after k in the order that start before k ends, all in the cell of k
+    positions = np.arange(len(start))
+    counts = np.searchsorted(start, end, side="left") - positions - 1
+    first, second = [], []
+    for k, j in _ranges(positions + 1, counts):
+        a, b = owner[k], owner[j]
+        keep = np.all((low[a] <= high[b]) & (low[b] <= high[a]), axis=1)
+        corner = np.maximum(low[a][:, grid], low[b][:, grid])
+        home, _ = _cells(corner, corner, origin, size)
+        keep &= (home[:, 0] == cell_x[k]) & (home[:, 1] == cell_y[k])
+        first.append(a[keep])
+        second.append(b[keep])
+    if not first:
+        return empty, empty
+    first, second = rows[np.concatenate(first)], rows[np.concatenate(second)]
+    return np.minimum(first, second), np.maximum(first, second)
+
+
+def sphere_sphere(center_a, radius_a, center_b, radius_b):
+    return np.einsum("ni,ni->n", center_b - center_a, center_b - center_a) <= (radius_a + radius_b) ** 2
+
+
+def box_sphere(center, axes, half, sphere_center, radius):
+    # closest point of the box to the sphere center, in box coordinates
+    local = np.einsum("nji,nj->ni", axes, sphere_center - center)
+    outside = local - np.clip(local, -half, half)
+    return np.einsum("ni,ni->n", outside, outside) <= radius ** 2
+
+
+def box_box(center_a, axes_a, half_a, center_b, axes_b, half_b):
+    # separating axis test over the face normals of both boxes and the nine edge cross products,
+    # as in Ericson, Real-Time Collision Detection, 4.4.1
+    rotation = np.einsum("nki,nkj->nij", axes_a, axes_b)
+    t = np.einsum("nki,nk->ni", axes_a, center_b - center_a)
+    absolute = np.abs(rotation) + EPSILON
+    separated = (np.abs(t) > half_a + np.einsum("nij,nj->ni", absolute, half_b)).any(axis=1)
+    separated |= (np.abs(np.einsum("ni,nij->nj", t, rotation)) >
+                  np.einsum("ni,nij->nj", half_a, absolute) + half_b).any(axis=1)
+    for i in range(3):
+        i1, i2 = (i + 1) % 3, (i + 2) % 3
+        for j in range(3):
+            j1, j2 = (j + 1) % 3, (j + 2) % 3
+            ra = half_a[:, i1] * absolute[:, i2, j] + half_a[:, i2] * absolute[:, i1, j]
+            rb = half_b[:, j1] * absolute[:, i, j2] + half_b[:, j2] * absolute[:, i, j1]
+            separated |= np.abs(t[:, i2] * rotation[:, i1, j] - t[:, i1] * rotation[:, i2, j]) > ra + rb
+    return ~separated
+
+
+def overlaps(kinds, centers, axes, half, first, second):
+    # exact test of candidate pairs, each combination of shapes in one vectorized call
+    result = np.zeros(len(first), dtype=bool)
+    kind_a, kind_b = kinds[first], kinds[second]
+    mask = (kind_a == SPHERE) & (kind_b == SPHERE)
+    a, b = first[mask], second[mask]
+    result[mask] = sphere_sphere(centers[a], half[a, 0], centers[b], half[b, 0])
+    mask = (kind_a == BOX) & (kind_b == BOX)
+    a, b = first[mask], second[mask]
+    result[mask] = box_box(centers[a], axes[a], half[a], centers[b], axes[b], half[b])
+    mask = ((kind_a == BOX) & (kind_b == SPHERE)) | ((kind_a == SPHERE) & (kind_b == BOX))
+    swap = kind_a[mask] == SPHERE
+    boxes = np.where(swap, second[mask], first[mask])
+    spheres = np.where(swap, first[mask], second[mask])
+    result[mask] = box_sphere(centers[boxes], axes[boxes], half[boxes], centers[spheres], half[spheres, 0])
+    return result
+
+
+class CollisionScene:
+    # boxes and spheres in rows of arrays, queries after changes only test the changed rows again
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.count = 0
+        self.rows = {}
+        self.objects = []
+        self.free = []
+        self.kinds = np.full(capacity, EMPTY, dtype=np.int8)
+        self.centers = np.zeros((capacity, 3))
+        self.axes = np.tile(np.identity(3), (capacity, 1, 1))
+        self.half = np.zeros((capacity, 3))
+        self.low = np.full((capacity, 3), np.inf)
+        self.high = np.full((capacity, 3), -np.inf)
+        # overlapping row pairs of the last query, first < second, None until the first full query
+        self.first = None
+        self.second = None
+        self.dirty = set()
+        # rows changed since the last full query, with their sorted order along its axis
+        self.moved = set()
+        self.axis = 0
+        self.sorted_rows = None
+        self.sorted_low = None
+        self.reach = 0.0
+
+        self.full_queries = 0
+        self.incremental_queries = 0
+        self.candidates = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, obj):
+        return obj in self.rows
+
+    def _grow(self, capacity):
+        for name, fill in (("kinds", EMPTY), ("centers", 0.0), ("axes", 0.0), ("half", 0.0), ("low", np.inf),
+                           ("high", -np.inf)):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def _row(self, obj):
+        row = self.rows.get(obj)
+        if row is not None:
+            return row
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self._grow(self.capacity * 2)
+            row = self.count
+            self.count += 1
+            self.objects.append(None)
+        self.rows[obj] = row
+        self.objects[row] = obj
+        return row
+
+    def update(self, objs, matrices):
+        # adds or moves boxes and spheres, matrices are their world matrices
+        objs = list(objs)
+        if not objs:
+            return
+        rows = np.array([self._row(obj) for obj in objs], dtype=np.int64)
+        self.kinds[rows], self.centers[rows], self.axes[rows], self.half[rows], self.low[rows], self.high[rows] = \
+            shapes(objs, matrices)
+        self.dirty.update(rows.tolist())
+        self.moved.update(rows.tolist())
+
+    def remove(self, obj):
+        row = self.rows.pop(obj, None)
+        if row is None:
+            return
+        self.objects[row] = None
+        self.kinds[row] = EMPTY
+        self.low[row] = np.inf
+        self.high[row] = -np.inf
+        self.free.append(row)
+        self.dirty.add(row)
+        self.moved.add(row)
+
+    def _against_all(self, rows):
+        # candidate pairs of changed rows with every other row. Rows that did not move since the last full
+        # query are found in its sorted order within reach along its axis, moved rows are compared directly
+        low, high = self.low[:self.count], self.high[:self.count]
+        stale = np.zeros(self.count, dtype=bool)
+        moved = np.fromiter(self.moved, dtype=np.int64, count=len(self.moved))
+        stale[moved] = True
+        begin = np.searchsorted(self.sorted_low, low[rows, self.axis] - self.reach, side="left")
+        counts = np.maximum(np.searchsorted(self.sorted_low, high[rows, self.axis], side="right") - begin, 0)
+        first, second = [], []
+        for k, position in _ranges(begin, counts):
+            a, b = rows[k], self.sorted_rows[position]
+            keep = ~stale[b] & np.all((low[a] <= high[b]) & (low[b] <= high[a]), axis=1)
+            first.append(a[keep])
+            second.append(b[keep])
+        hit = np.all((low[rows][:, None] <= high[moved][None]) & (low[moved][None] <= high[rows][:, None]), axis=2)
+        a, b = np.nonzero(hit)
+        first.append(rows[a])
+        second.append(moved[b])
+        first, second = np.concatenate(first), np.concatenate(second)
+        keep = first != second
+        first, second = first[keep], second[keep]
+        # pairs of two changed rows were found from both sides
+        codes = np.unique(np.minimum(first, second) * self.count + np.maximum(first, second))
+        return codes // self.count, codes % self.count
+
+    def _sort(self):
+        # order of the rows along the sweep axis for the incremental queries until the next full query
+        low, high = self.low[:self.count], self.high[:self.count]
+        self.axis = sweep_axis(low, high)
+        self.sorted_rows = np.argsort(low[:, self.axis], kind="stable")
+        self.sorted_low = low[self.sorted_rows, self.axis]
+        live = self.kinds[:self.count] != EMPTY
+        self.reach = float((high - low)[live, self.axis].max()) if live.any() else 0.0
+        self.moved.clear()
+
+    def _test(self, first, second):
+        self.candidates += len(first)
+        keep = overlaps(self.kinds, self.centers, self.axes, self.half, first, second)
+        return first[keep], second[keep]
+
+    def query(self):
+        # overlapping row pairs, first < second
+        if self.first is None or len(self.dirty) > INCREMENTAL_ROWS or len(self.moved) > STALE_ROWS:
+            self.dirty.clear()
+            self._sort()
+            self.first, self.second = self._test(*sweep_and_prune(self.low[:self.count], self.high[:self.count]))
+            self.full_queries += 1
+        elif self.dirty:
+            rows = np.fromiter(self.dirty, dtype=np.int64, count=len(self.dirty))
+            self.dirty.clear()
+            changed = np.zeros(self.count, dtype=bool)
+            changed[rows] = True
+            keep = ~(changed[self.first] | changed[self.second])
+            first, second = self._test(*self._against_all(rows))
+            self.first = np.concatenate([self.first[keep], first])
+            self.second = np.concatenate([self.second[keep], second])
+            self.incremental_queries += 1
+        return self.first, self.second
+
+    def pairs(self):
+        first, second = self.query()
+        return [(self.objects[a], self.objects[b]) for a, b in zip(first.tolist(), second.tolist())]
+
+    def colliding(self):
+        first, second = self.query()
+        return {self.objects[row] for row in np.unique(np.concatenate([first, second])).tolist()}
+
+    def collisions(self, obj):
+        # objects overlapping obj
+        first, second = self.query()
+        row = self.rows[obj]
+        return [self.objects[_] for _ in np.concatenate([second[first == row], first[second == row]]).tolist()]
+
+    def stats(self):
+        return {
+            "shapes": len(self.rows),
+            "pairs": 0 if self.first is None else len(self.first),
+            "full_queries": self.full_queries,
+            "incremental_queries": self.incremental_queries,
+            "candidates": self.candidates,
+        }
@@ -0,0 +1,55 @@
+import numpy as np
+from PySide2.QtCore import QByteArray
+from PySide2.Qt3DRender import Qt3DRender
+
+
+def _attribute(geometry, buffer, name, base_type, size, count, stride=0, offset=0,
+               kind=Qt3DRender.QAttribute.VertexAttribute):
+    attribute = Qt3DRender.QAttribute(geometry)
+    attribute.setName(name)
+    attribute.setAttributeType(kind)
+    attribute.setBuffer(buffer)
+    attribute.setVertexBaseType(base_type)
+    attribute.setVertexSize(size)
+    attribute.setByteStride(stride)
+    attribute.setByteOffset(offset)
+    attribute.setCount(count)
+    geometry.addAttribute(attribute)
+    return attribute
+
+
+def _bytes(array):
+    # the mesh arrays are views on bytearrays, QByteArray takes those with its single copy
+    base = array
+    while isinstance(base, np.ndarray):
+        base = base.base
+    if isinstance(base, memoryview) and isinstance(base.obj, bytearray) and \
+            array.flags.c_contiguous and len(base.obj) == array.nbytes:
+        return base.obj
+    return array.tobytes()
+
+
+def _upload(parent, array):
+    buffer = Qt3DRender.QBuffer(parent)
+    buffer.setData(QByteArray(_bytes(array)))
+    return buffer
+
+
+def create_geometry_renderer(mesh, parent=None):
+    # editor3d.stl.Mesh as one interleaved position/normal buffer plus optional indices
+    renderer = Qt3DRender.QGeometryRenderer(parent)
+    geometry = Qt3DRender.QGeometry(renderer)
+    vertices = _upload(geometry, mesh.data)
+    stride = mesh.data.strides[0]
+    count = mesh.vertex_count
+    _attribute(geometry, vertices, Qt3DRender.QAttribute.defaultPositionAttributeName(),
+               Qt3DRender.QAttribute.Float, 3, count, stride, 0)
+    _attribute(geometry, vertices, Qt3DRender.QAttribute.defaultNormalAttributeName(),
+               Qt3DRender.QAttribute.Float, 3, count, stride, 12)
+    if mesh.indices is not None:
+        indices = _upload(geometry, mesh.indices)
+        _attribute(geometry, indices, "", Qt3DRender.QAttribute.UnsignedInt, 1, len(mesh.indices),
+                   kind=Qt3DRender.QAttribute.IndexAttribute)
+    renderer.setGeometry(geometry)
+    renderer.setPrimitiveType(Qt3DRender.QGeometryRenderer.Triangles)
+    return renderer
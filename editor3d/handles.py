@@ -0,0 +1,70 @@
+from editor3d.objects import ROOT_ID
+
+
+class HandleTable:
+    # Qt side of every shown object in parallel lists, found by the object id through its slot,
+    # slots of removed objects are used again by the next ones added
+    def __init__(self):
+        self.slots = {}
+        self.free = []
+        self.ids = []
+        self.objects = []
+        self.entities = []
+        self.meshes = []
+        self.transforms = []
+        self.materials = []
+        # id of the object whose entity holds the entity, ROOT_ID below the scene root
+        self.parents = []
+        self.reused = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, obj_id):
+        return obj_id in self.slots
+
+    def add(self, obj, entity, mesh=None, transform=None, material=None, parent_id=ROOT_ID):
+        if obj.id in self.slots:
+            raise ValueError("Object {} already has a handle".format(obj.id))
+        if self.free:
+            slot = self.free.pop()
+            self.reused += 1
+            self.ids[slot] = obj.id
+            self.objects[slot] = obj
+            self.entities[slot] = entity
+            self.meshes[slot] = mesh
+            self.transforms[slot] = transform
+            self.materials[slot] = material
+            self.parents[slot] = parent_id
+        else:
+            slot = len(self.ids)
+            self.ids.append(obj.id)
+            self.objects.append(obj)
+            self.entities.append(entity)
+            self.meshes.append(mesh)
+            self.transforms.append(transform)
+            self.materials.append(material)
+            self.parents.append(parent_id)
+        self.slots[obj.id] = slot
+        return slot
+
+    def remove(self, obj_id):
+        # entity, mesh, transform and material of the object, its slot is free again
+        slot = self.slots.pop(obj_id)
+        record = self.entities[slot], self.meshes[slot], self.transforms[slot], self.materials[slot]
+        self.ids[slot] = None
+        self.objects[slot] = self.entities[slot] = self.meshes[slot] = None
+        self.transforms[slot] = self.materials[slot] = self.parents[slot] = None
+        self.free.append(slot)
+        return record
+
+    def object(self, obj_id):
+        # None for ids without a handle, e.g. objects deleted meanwhile
+        slot = self.slots.get(obj_id)
+        return None if slot is None else self.objects[slot]
+
+    def entity(self, obj_id):
+        return self.entities[self.slots[obj_id]]
+
+    def stats(self):
+        return {"handles": len(self.slots), "slots": len(self.ids), "free": len(self.free), "reused": self.reused}
@@ -0,0 +1,233 @@
+import os
+import pickle
+import struct
+
+from editor3d.objects import ROOT_ID, ObjectOperation, walk
+from editor3d.storage import object_row, row_object
+from editor3d.undopipeline import CreateOperation, DeleteOperation, CompoundOperation
+
+MAGIC = b"E3DHIST\0"
+VERSION = 1
+# magic, version and number of entries, the entries follow as length, pickled tuple, length
+HEADER = struct.Struct("<8sIQ")
+LENGTH = struct.Struct("<I")
+
+# property codes, the position in this tuple is stored instead of the bound setter
+SETTERS = ("set_parent", "set_color", "set_name", "set_rotation", "set_position", "set_radius", "set_dimension",
+           "set_width", "set_height", "set_length", "set_scale")
+SETTER_CODES = {name: code for code, name in enumerate(SETTERS)}
+PARENT = SETTER_CODES["set_parent"]
+
+SET, CREATE, DELETE, COMPOUND = range(4)
+
+# parent references by id, no parent has a reserved id next to ROOT_ID of the scene root
+NO_PARENT = -1
+
+
+def _subtree(node):
+    yield node
+    yield from walk(node)
+
+
+class HistoryCodec:
+    # entries as plain tuples of ids, property codes and values, objects are found again by their id
+    def __init__(self, root, attach, detach):
+        self.root = root
+        self.attach = attach
+        self.detach = detach
+
+    def _parent_id(self, parent):
+        if parent is None:
+            return NO_PARENT
+        return ROOT_ID if parent is self.root else parent.id
+
+    def _parent(self, parent_id, objects):
+        if parent_id == NO_PARENT:
+            return None
+        if parent_id == ROOT_ID:
+            return self.root
+        return objects[parent_id]
+
+    def encode(self, op):
+        # None for entries that have no compact form, they are dropped like evicted entries
+        if isinstance(op, CompoundOperation):
+            parts = [self.encode(_) for _ in op.operations]
+            return None if None in parts else (COMPOUND, parts)
+        if isinstance(op, ObjectOperation):
+            code = SETTER_CODES.get(op.name)
+            if code is None:
+                return None
+            if code == PARENT:
+                return SET, op.target_id, code, self._parent_id(op.from_value), self._parent_id(op.to_value)
+            return SET, op.target_id, code, op.from_value, op.to_value
+        # only entries before the undo position are spilled, they are always applied
+        if isinstance(op, DeleteOperation):
+            if not op.applied:
+                return None
+            # the deleted objects exist nowhere else, their rows are part of the entry
+            return DELETE, self._parent_id(op.parent), [object_row(obj, None) for obj in _subtree(op.target)]
+        if isinstance(op, CreateOperation):
+            if not op.applied:
+                return None
+            return CREATE, op.target.id, self._parent_id(op.parent)
+        return None
+
+    def decode(self, entry, objects):
+        # objects maps ids to objects and learns the ones restored from delete entries,
+        # None if an object of the entry no longer exists
+        try:
+            return self._decode(entry, objects)
+        except KeyError:
+            return None
+
+    def _decode(self, entry, objects):
+        kind = entry[0]
+        if kind == COMPOUND:
+            parts = [self.decode(_, objects) for _ in reversed(entry[1])]
+            parts = [_ for _ in reversed(parts) if _ is not None]
+            return CompoundOperation(parts) if parts else None
+        if kind == SET:
+            _, obj_id, code, from_value, to_value = entry
+            target = objects[obj_id]
+            if code == PARENT:
+                from_value, to_value = self._parent(from_value, objects), self._parent(to_value, objects)
+            return ObjectOperation(target, SETTERS[code], from_value, to_value)
+        if kind == CREATE:
+            _, obj_id, parent_id = entry
+            return CreateOperation(objects[obj_id], self._parent(parent_id, objects), self.attach, self.detach)
+        if kind == DELETE:
+            _, parent_id, rows = entry
+            parent = self._parent(parent_id, objects)
+            restored = {}
+            for row in rows:
+                restored[row[0]] = objects.get(row[0]) or row_object(row)
+            for row in rows[1:]:
+                obj = restored[row[0]]
+                obj.parent = restored[row[1]]
+                obj.parent.children.add(obj)
+            objects.update(restored)
+            return DeleteOperation(restored[rows[0][0]], parent, self.attach, self.detach)
+        return None
+
+
+class SpilledHistory:
+    # entries older than the hot window of a Pipeline, a stack in an append only file,
+    # entries loaded back into memory are cut off its end, nothing but the file handle stays in memory
+    def __init__(self, filename, root, attach, detach):
+        self.filename = filename
+        self.codec = HistoryCodec(root, attach, detach)
+        self.file = None
+        self.count = 0
+
+        self.spilled = 0
+        self.loaded = 0
+        self.skipped = 0
+        self.bytes_written = 0
+
+    def _open(self):
+        # opened on first use, a history from the last session costs nothing until undo reaches it
+        if self.file is not None:
+            return
+        try:
+            self.file = open(self.filename, "r+b")
+            magic, version, self.count = HEADER.unpack(self.file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("Not an undo history: {}".format(self.filename))
+        except FileNotFoundError:
+            self.file = open(self.filename, "w+b")
+            self._write_header(0)
+        except (ValueError, struct.error) as error:
+            print("Undo history discarded: {}".format(error))
+            self.file.close()
+            self.file = open(self.filename, "w+b")
+            self._write_header(0)
+
+    def _write_header(self, count):
+        self.count = count
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, count))
+
+    def __len__(self):
+        self._open()
+        return self.count
+
+    def push(self, ops):
+        # ops oldest first, returns the ops that could not be encoded
+        self._open()
+        records = []
+        rejected = []
+        for op in ops:
+            entry = self.codec.encode(op)
+            if entry is None:
+                rejected.append(op)
+                continue
+            data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            records.append(LENGTH.pack(len(data)) + data + LENGTH.pack(len(data)))
+        if records:
+            self.file.seek(0, os.SEEK_END)
+            data = b"".join(records)
+            self.file.write(data)
+            self._write_header(self.count + len(records))
+            self.file.flush()
+            self.spilled += len(records)
+            self.bytes_written += len(data)
+        return rejected
+
+    def pop(self, count, known=()):
+        # the newest count entries as ops, oldest first, known are objects referenced by the entries in memory
+        self._open()
+        count = min(count, self.count)
+        if count == 0:
+            return []
+        objects = {obj.id: obj for obj in walk(self.codec.root)}
+        for target in known:
+            for obj in _subtree(target):
+                objects.setdefault(obj.id, obj)
+
+        end = self.file.seek(0, os.SEEK_END)
+        entries = []
+        for _ in range(count):
+            self.file.seek(end - LENGTH.size)
+            (length,) = LENGTH.unpack(self.file.read(LENGTH.size))
+            start = end - LENGTH.size - length - LENGTH.size
+            self.file.seek(start + LENGTH.size)
+            entries.append(pickle.loads(self.file.read(length)))
+            end = start
+        self.file.truncate(end)
+        self._write_header(self.count - count)
+        self.file.flush()
+
+        # newest first, objects restored by a delete entry are known to the older entries
+        ops = []
+        for entry in entries:
+            op = self.codec.decode(entry, objects)
+            if op is None:
+                self.skipped += 1
+            else:
+                ops.append(op)
+        self.loaded += len(ops)
+        ops.reverse()
+        return ops
+
+    def clear(self):
+        self._open()
+        self.file.truncate(HEADER.size)
+        self._write_header(0)
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+
+    def stats(self):
+        return {
+            "entries": len(self),
+            "file_bytes": os.path.getsize(self.filename) if os.path.exists(self.filename) else 0,
+            "spilled": self.spilled,
+            "loaded": self.loaded,
+            "skipped": self.skipped,
+            "bytes_written": self.bytes_written,
+        }
@@ -0,0 +1,125 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# set to 1 to time the editor, nothing is wrapped otherwise so a disabled editor runs the plain methods
+ENABLE_VARIABLE = "EDITOR3D_INSTRUMENT"
+# report written when the editor closes
+REPORT_VARIABLE = "EDITOR3D_INSTRUMENT_FILE"
+# seconds of cProfile capture right after start, written next to the report
+PROFILE_VARIABLE = "EDITOR3D_PROFILE"
+
+PERCENTILES = (50, 95, 99)
+
+
+def enabled():
+    return os.environ.get(ENABLE_VARIABLE, "") not in ("", "0")
+
+
+class Histogram:
+    # the last size samples for percentiles, count and total cover every sample
+    def __init__(self, size=1024):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def summary(self):
+        result = {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count else 0.0,
+                  "max": self.max}
+        values = np.percentile(np.fromiter(self.samples, dtype=np.float64), PERCENTILES) if self.samples \
+            else [0.0] * len(PERCENTILES)
+        for percentile, value in zip(PERCENTILES, values):
+            result["p{}".format(percentile)] = float(value)
+        return result
+
+
+class Instrumentation:
+    def __init__(self, size=1024, clock=time.perf_counter):
+        self.size = size
+        self.clock = clock
+        self.histograms = {}
+        self.counters = {}
+        # name to function, read at report time only
+        self.gauges = {}
+        # storage writes come from the timer thread
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.profile_path = None
+
+    def record(self, name, value):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.size)
+            histogram.add(value)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, function):
+        self.gauges[name] = function
+
+    def timed(self, name, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = self.clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, self.clock() - start)
+        return wrapper
+
+    def wrap(self, obj, names, prefix):
+        # replaces the bound methods on the instance, connect signals only afterwards
+        for name in names:
+            setattr(obj, name, self.timed("{}.{}".format(prefix, name), getattr(obj, name)))
+
+    def report(self):
+        with self.lock:
+            histograms = {name: histogram.summary() for name, histogram in self.histograms.items()}
+            counters = dict(self.counters)
+        gauges = {}
+        for name, function in self.gauges.items():
+            try:
+                gauges[name] = function()
+            except Exception as error:
+                gauges[name] = repr(error)
+        return {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "histograms": histograms, "counters": counters,
+                "gauges": gauges}
+
+    def dump(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump(self.report(), file, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def start_profile(self, path):
+        # cProfile only sees the thread that starts it, call start and stop from the GUI thread
+        if self.profiler is not None:
+            return False
+        self.profile_path = path
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        return True
+
+    def stop_profile(self):
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        self.profiler.dump_stats(self.profile_path)
+        self.profiler = None
+        return self.profile_path
@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+
+from editor3d.stl import Mesh, mesh_buffer, smooth_normals
+
+# grid cells along the longest side of the bounding box for each simplified level
+RESOLUTIONS = (256, 64, 16)
+# projected screen area in pixels above which a level is used, the last level is the fallback
+THRESHOLDS = (40000.0, 6400.0, 900.0, 0.0)
+
+
+def thresholds(levels):
+    return list(THRESHOLDS[:levels - 1]) + [0.0]
+
+
+def cluster(mesh, resolution):
+    # vertex clustering: all vertices in one grid cell collapse to their mean, collapsed triangles are dropped
+    positions = np.asarray(mesh.vertices, dtype=np.float64)
+    indices = np.arange(len(positions)) if mesh.indices is None else np.asarray(mesh.indices, dtype=np.int64)
+    if not len(indices):
+        return Mesh(mesh_buffer((0, 6)), mesh_buffer(0, np.uint32))
+
+    low = positions.min(axis=0)
+    cell = max(float((positions.max(axis=0) - low).max()) / resolution, np.finfo(np.float32).tiny)
+    cells = np.floor((positions - low) / cell).astype(np.int64)
+    size = cells.max(axis=0) + 1
+    codes = (cells[:, 0] * size[1] + cells[:, 1]) * size[2] + cells[:, 2]
+    _, remap = np.unique(codes, return_inverse=True)
+    remap = remap.ravel()
+    counts = np.bincount(remap)
+    centers = np.stack([np.bincount(remap, weights=positions[:, axis]) for axis in range(3)], axis=1)
+    centers /= counts[:, None]
+
+    triangles = remap[indices].reshape(-1, 3)
+    a, b, c = triangles.T
+    triangles = triangles[(a != b) & (b != c) & (a != c)]
+    # triangles that collapsed onto the same three cells are kept once, in their original winding
+    _, first = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+    triangles = triangles[np.sort(first)]
+    used, compact = np.unique(triangles, return_inverse=True)
+
+    data = mesh_buffer((len(used), 6))
+    data[:, :3] = centers[used]
+    index_buffer = mesh_buffer(compact.size, np.uint32)
+    index_buffer[:] = compact.ravel()
+    smooth_normals(data, index_buffer)
+    return Mesh(data, index_buffer)
+
+
+def build_levels(mesh, resolutions=RESOLUTIONS):
+    # level 0 is the mesh itself, returns the levels and (triangles, seconds) per level
+    levels = [mesh]
+    report = [(mesh.triangle_count, 0.0)]
+    for resolution in resolutions:
+        start = time.perf_counter()
+        level = cluster(mesh, resolution)
+        # coarser grids of small meshes may not reduce anything further
+        if level.triangle_count >= levels[-1].triangle_count:
+            level = levels[-1]
+        levels.append(level)
+        report.append((level.triangle_count, time.perf_counter() - start))
+    return levels, report
@@ -1,41 +1,157 @@
+import itertools
+import os
 import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
 
 from PySide2.Qt3DCore import Qt3DCore
 from PySide2.Qt3DExtras import Qt3DExtras
+from PySide2.Qt3DRender import Qt3DRender
+from PySide2.QtCore import QTimer
 from PySide2.QtGui import QVector3D, QColor, QTransform, QQuaternion
 
-from editor3d.objects import Box3D, Sphere3D, STL3D
-from editor3d.storage import Storage
-from editor3d.undopipeline import Pipeline
-from editor3d.window import QtFrontend
-
-
-class ObjectRoot:
-    def __init__(self):
-        self.children = set()
+from editor3d.bvh import BVH, frustum_planes
+from editor3d.collision import CollisionScene, collidable
+from editor3d.geometry import create_geometry_renderer
+from editor3d.handles import HandleTable
+from editor3d import instrumentation
+from editor3d.history import SpilledHistory
+from editor3d.lod import thresholds
+from editor3d.objects import Box3D, Sphere3D, STL3D, ObjectRoot, walk
+from editor3d.meshcache import MeshCache
+from editor3d.ndjson import SceneImport, scene_records, write_records
+from editor3d.picking import local_ray, nearest_hit, ray_box, ray_sphere, ray_triangles
+from editor3d.resources import ResourceCache
+from editor3d.stlimport import ParallelImport
+from editor3d.storage import SQLiteStorage
+from editor3d.tessellation import FIXED_LEVEL, SPHERE_LEVELS, TessellationPolicy, projected_diameters, \
+    sphere_triangles, triangle_budget
+from editor3d.transforms import TransformTree
+from editor3d.undopipeline import Pipeline, CompoundOperation, CreateOperation, DeleteOperation
+from editor3d.window import QtFrontend, PropertyType
+
+
+# seconds of a scene import per event loop tick so the window stays responsive, the number of objects per piece
+# starts at the first value and follows the measured cost within the other two
+IMPORT_TICK = 0.03
+IMPORT_CHUNK = (64, 16, 4096)
+
+# material of objects that overlap another one while collisions are highlighted
+HIGHLIGHT_COLOR = "#ff2020"
+
+# corner selection of the local (low, high) bounds
+BOX_CORNERS = np.array(list(itertools.product((0, 1), repeat=3)))
+
+# milliseconds between a camera move and the new sphere tessellation, moves in between are taken together
+TESSELLATION_DELAY = 100
+
+# object properties in the order they are pushed to Qt, the parent first so transforms land in the right entity
+SYNC_ORDER = ("parent", "position", "rotation", "scale", "radius", "dimension", "color", "name")
+BOUNDS_CHANGES = frozenset(("parent", "position", "rotation", "scale", "radius", "dimension"))
+
+# timed when instrumentation is enabled
+INSTRUMENTED = (
+    "update_color", "update_position", "update_rotation", "update_box_dimension", "update_radius", "update_scale",
+    "update_name", "set_parent", "update_many", "create_box", "create_sphere", "create_stl", "create_stls",
+    "create_many", "create_shapes", "create_shape_from_object", "generate_from_root", "delete_object", "delete_many",
+    "undo", "redo", "sync", "pick", "tessellate", "export_scene", "_import_scene_step", "collision_pairs",
+    "check_collisions")
+FRONTEND_INSTRUMENTED = ("set_known_objects", "update_object_editor", "refresh_object_editor")
 
 
 class Manager:
     def __init__(self):
-        self.entities = {}
-        self.objects = {}
-
-        self.undopipeline = Pipeline()
-        self.store = Storage("Shapes.db", ObjectRoot())
+        # entity, mesh, transform and material of every shown object by its id, the scene root included
+        self.handles = HandleTable()
+        # level of detail component of objects with more than one mesh level, by object id
+        self.lods = {}
+        # level of SPHERE_LEVELS per sphere id, picked by the tessellation policy from the camera
+        self.sphere_levels = {}
+        self.tessellation = TessellationPolicy(budget=triangle_budget())
+        self.tessellation_scheduled = False
+        self.tessellation_stats = {"passes": 0, "changes": 0, "spheres": 0, "triangles": 0, "fixed_triangles": 0,
+                                   "budget": self.tessellation.budget, "bias": 1.0}
+        # ids of changed objects waiting for the next sync, counts of property updates requested and applied
+        self.sync_pending = {}
+        self.sync_scheduled = False
+        self.sync_requests = 0
+        self.sync_stats = {"ticks": 0, "requested": 0, "applied": 0, "avoided": 0, "last_avoided": 0}
+        self.appliers = {
+            "parent": self._apply_parent,
+            "position": self._apply_position,
+            "rotation": self._apply_rotation,
+            "scale": self._apply_scale,
+            "radius": self._apply_radius,
+            "dimension": self._apply_box_dimension,
+            "color": self._apply_color,
+            "name": self._apply_name,
+        }
+
+        # world space bounds of every shape by its id for picking and region queries
+        self.bvh = BVH()
+        self.mesh_bounds = {}
+        # oriented boxes and spheres for overlap queries, ids of the objects shown in the highlight material
+        self.collisions = CollisionScene()
+        self.collision_highlight = False
+        self.collision_check_scheduled = False
+        self.highlighted = set()
+
+        # storage writes requested inside a transaction are issued once when it closes
+        self.transaction_depth = 0
+        self.store_pending = False
+        # None unless enabled through the environment, then entry points are wrapped before signals connect
+        self.instrumentation = instrumentation.Instrumentation() if instrumentation.enabled() else None
+        start = time.perf_counter()
+        self.store = SQLiteStorage("Shapes.db", ObjectRoot())
+        if self.instrumentation is not None:
+            self.instrumentation.record("storage.load", time.perf_counter() - start)
+            self._instrument()
 
         # Scene root object and backend root object setup
         self.object_root = self.store.get_root()
+
+        # a drag on a spin box or typing a name ends up as one undo step, older steps are kept on disk
+        # next to the scene and survive restarts
+        self.history = SpilledHistory(os.path.splitext(os.path.abspath(self.store.filename))[0] + ".history",
+                                      self.object_root, self._attach, self._detach)
+        self.undopipeline = Pipeline(merge_window=1.0, spill=self.history, hot_size=256)
+        self.transforms = TransformTree(self.object_root)
         self.entity_root = Qt3DCore.QEntity()
-        self.objects[self.object_root] = [self.entity_root, None, None, None]
-        self.entities[self.entity_root] = self.object_root
+        self.handles.add(self.object_root, self.entity_root, parent_id=None)
+
+        # shared meshes and materials, parented here so deleting one entity keeps them alive
+        self.resource_root = Qt3DCore.QNode(self.entity_root)
+        self.meshes = ResourceCache(self._create_mesh, lambda mesh: mesh.deleteLater())
+        self.materials = ResourceCache(self._create_material, lambda material: material.deleteLater())
+        # welded STL meshes survive restarts, STL files are only parsed again when they change
+        self.mesh_cache = MeshCache(os.path.splitext(os.path.abspath(self.store.filename))[0] + ".meshcache")
+        # running multi file STL import and the timer collecting its results
+        self.stl_import = None
+        self.import_timer = None
+        # running NDJSON scene import, its timer and the creations that become its undo entry
+        self.scene_import = None
+        self.scene_import_timer = None
+        self.scene_import_created = []
 
         self.qt_frontend = QtFrontend(sys.argv, self.entity_root, self)
+        if self.instrumentation is not None:
+            self.instrumentation.wrap(self.qt_frontend, FRONTEND_INSTRUMENTED, "frontend")
 
         # generate objects in case any were loaded
         self.generate_from_root()
 
         self.qt_frontend.set_known_objects(self.object_root)
 
+        camera = self.qt_frontend.camera()
+        camera.viewMatrixChanged.connect(self._request_tessellation)
+        camera.projectionMatrixChanged.connect(self._request_tessellation)
+
+    def object(self, obj_id):
+        # the shown object with this id, None if there is none
+        return self.handles.object(obj_id)
+
     def create_entity(self, mesh, material, transform, root=None):
         entity = Qt3DCore.QEntity(self.entity_root if root is None else root)
         entity.addComponent(mesh)
@@ -43,141 +159,730 @@ class Manager:
         entity.addComponent(transform)
         return entity
 
-    def create_shape_from_object(self, obj):
+    def _levels(self, obj):
+        # spheres are tessellated by the policy, not by a level of detail component
+        if isinstance(obj, STL3D):
+            return self.mesh_cache.levels()
+        return 1
+
+    def _level(self, obj):
         if isinstance(obj, Sphere3D):
-            mesh = Qt3DExtras.QSphereMesh(rings=20, slices=20, radius=obj.radius)
+            return self.sphere_levels.get(obj.id, FIXED_LEVEL)
+        lod = self.lods.get(obj.id)
+        return 0 if lod is None else lod.currentIndex()
+
+    def _mesh_key(self, obj, level=0):
+        if isinstance(obj, Sphere3D):
+            return ("sphere", obj.radius) + SPHERE_LEVELS[level]
         elif isinstance(obj, Box3D):
-            mesh = Qt3DExtras.QCuboidMesh()
-            mesh.setXExtent(obj.width)
-            mesh.setYExtent(obj.length)
-            mesh.setZExtent(obj.height)
+            return "box", obj.width, obj.length, obj.height
+        elif isinstance(obj, STL3D):
+            # scale is applied by the transform, all objects of one file share the geometry
+            return "stl", os.path.abspath(obj.path), level
+        return "cylinder",
+
+    def _create_mesh(self, key):
+        if key[0] == "sphere":
+            _, radius, rings, slices = key
+            mesh = Qt3DExtras.QSphereMesh(self.resource_root, rings=rings, slices=slices, radius=radius)
+        elif key[0] == "box":
+            _, width, length, height = key
+            mesh = Qt3DExtras.QCuboidMesh(self.resource_root)
+            mesh.setXExtent(width)
+            mesh.setYExtent(length)
+            mesh.setZExtent(height)
+        elif key[0] == "stl":
+            try:
+                mesh = create_geometry_renderer(self.mesh_cache.get(key[1], key[2]), self.resource_root)
+            except (OSError, ValueError) as error:
+                print("Could not load {}: {}".format(key[1], error))
+                mesh = Qt3DExtras.QCylinderMesh(self.resource_root)
         else:
-            mesh = Qt3DExtras.QCylinderMesh()
+            mesh = Qt3DExtras.QCylinderMesh(self.resource_root)
+        return mesh
+
+    def _create_material(self, color):
+        return Qt3DExtras.QDiffuseSpecularMaterial(self.resource_root, diffuse=QColor(color))
+
+    def _replace_component(self, obj, column, cache, key):
+        # copy on write, the object moves to the resource for its new key, column is a list of the handles
+        slot = self.handles.slots[obj.id]
+        old = column[slot]
+        if cache.key(old) == key:
+            return
+        new = cache.acquire(key)
+        entity = self.handles.entities[slot]
+        entity.removeComponent(old)
+        entity.addComponent(new)
+        column[slot] = new
+        cache.release(old)
+
+    def _create_shape(self, obj):
+        # the shape is built from the whole current state, earlier changes need no sync,
+        # the caller adds obj to the transforms and bounds
+        obj.take_changes()
+        if isinstance(obj, Sphere3D):
+            # the policy picks the level once the sphere is in place
+            self.sphere_levels[obj.id] = FIXED_LEVEL
+            self._request_tessellation()
+        mesh = self.meshes.acquire(self._mesh_key(obj, self._level(obj)))
 
         x, y, z = obj.position
         a, b, c = obj.rotation
-        transform = Qt3DCore.QTransform(scale=1.0, translation=QVector3D(x, y, z))
+        scale = obj.scale if isinstance(obj, STL3D) else 1.0
+        transform = Qt3DCore.QTransform(scale=scale, translation=QVector3D(x, y, z))
         transform.setRotation(QQuaternion.fromEulerAngles(a, b, c))
-        material = Qt3DExtras.QDiffuseSpecularMaterial(diffuse=QColor(obj.color))
-        entity = self.create_entity(mesh, material, transform, self.objects[obj.parent][0])
-
-        self.objects[obj] = [entity, mesh, transform, material]
-        self.entities[entity] = obj
-
+        material = self.materials.acquire(obj.color)
+        parent_id = obj.parent.id
+        entity = self.create_entity(mesh, material, transform, self.handles.entity(parent_id))
+        self.handles.add(obj, entity, mesh, transform, material, parent_id)
+        self._add_lod(obj, entity)
         return entity
 
-    def _recursive_generation(self, obj):
-        entity = self.create_shape_from_object(obj)
-        for child in obj.children:
-            child_entity = self._recursive_generation(child)
+    def create_shape_from_object(self, obj):
+        entity = self._create_shape(obj)
+        self.transforms.add(obj)
+        self.bvh.insert(obj.id, *self._world_bounds(obj))
+        self._update_collisions([obj])
         return entity
 
+    def create_shapes(self, objs):
+        # objs lists parents before their children, world matrices and bounds are computed in one batch
+        for obj in objs:
+            self._create_shape(obj)
+        self.transforms.add_many(objs)
+        self.bvh.insert_many([obj.id for obj in objs], *self._world_bounds_many(objs))
+        self._update_collisions(objs)
+
+    def _add_lod(self, obj, entity):
+        # the camera picks the level by the projected size, the mesh component is swapped on change
+        levels = self._levels(obj)
+        if levels < 2:
+            return
+        lod = Qt3DRender.QLevelOfDetail(entity)
+        lod.setCamera(self.qt_frontend.camera())
+        lod.setThresholdType(Qt3DRender.QLevelOfDetail.ProjectedScreenPixelSizeThreshold)
+        lod.setThresholds(thresholds(levels))
+        # the signal holds the id only, the object is looked up when the level changes
+        obj_id = obj.id
+        lod.currentIndexChanged.connect(lambda level: self._apply_level(obj_id, level))
+        entity.addComponent(lod)
+        self.lods[obj_id] = lod
+
+    def _local_bounds(self, obj):
+        if isinstance(obj, Sphere3D):
+            return (-obj.radius,) * 3, (obj.radius,) * 3
+        elif isinstance(obj, Box3D):
+            half = (obj.width / 2, obj.length / 2, obj.height / 2)
+            return tuple(-_ for _ in half), half
+        elif isinstance(obj, STL3D):
+            path = os.path.abspath(obj.path)
+            if path not in self.mesh_bounds:
+                try:
+                    self.mesh_bounds[path] = tuple(self.mesh_cache.get(path).bounds())
+                except (OSError, ValueError):
+                    self.mesh_bounds[path] = (-0.5,) * 3, (0.5,) * 3
+            return self.mesh_bounds[path]
+        # default cylinder mesh, radius 1 and length 1 along y
+        return (-1, -0.5, -1), (1, 0.5, 1)
+
+    def _world_bounds(self, obj):
+        low, high = self._local_bounds(obj)
+        corners = np.array([(*corner, 1.0) for corner in itertools.product(*zip(low, high))])
+        corners = corners @ self.transforms.world_matrix(obj).T
+        return corners[:, :3].min(axis=0), corners[:, :3].max(axis=0)
+
+    def _world_bounds_many(self, objs):
+        # the corners of all local boxes through their world matrices at once
+        local = np.array([self._local_bounds(obj) for obj in objs], dtype=np.float64).reshape(-1, 2, 3)
+        corners = np.ones((len(local), len(BOX_CORNERS), 4))
+        corners[:, :, :3] = local[:, BOX_CORNERS, np.arange(3)]
+        corners = corners @ self.transforms.world_matrices(objs).transpose(0, 2, 1)
+        return corners[:, :, :3].min(axis=1), corners[:, :, :3].max(axis=1)
+
+    def _update_bounds(self, obj):
+        self.transforms.mark_dirty(obj)
+        nodes = [obj, *walk(obj)]
+        for node in nodes:
+            if node.id in self.bvh:
+                self.bvh.update(node.id, *self._world_bounds(node))
+        self._update_collisions(nodes)
+
+    def _update_collisions(self, objs):
+        objs = [obj for obj in objs if collidable(obj) and obj in self.transforms]
+        if objs:
+            self.collisions.update(objs, self.transforms.world_matrices(objs))
+            self._request_collision_check()
+
+    def collision_pairs(self):
+        # pairs of boxes and spheres that overlap, only objects changed since the last query are tested again
+        self.sync()
+        return self.collisions.pairs()
+
+    def set_collision_highlight(self, enabled):
+        self.collision_highlight = enabled
+        self.check_collisions()
+
+    def _request_collision_check(self):
+        if self.collision_highlight and not self.collision_check_scheduled:
+            self.collision_check_scheduled = True
+            QTimer.singleShot(0, self.check_collisions)
+
+    def check_collisions(self):
+        # overlapping objects get the highlight material, the others their own color again
+        colliding = set()
+        if self.collision_highlight:
+            # edits applied by the sync are part of this check
+            self.sync()
+            colliding = {obj.id for obj in self.collisions.colliding()}
+        self.collision_check_scheduled = False
+        changed = colliding ^ self.highlighted
+        self.highlighted = colliding
+        for obj_id in changed:
+            obj = self.handles.object(obj_id)
+            if obj is not None:
+                self._apply_color(obj)
+        self.qt_frontend.collisions_changed(self.collisions.stats()["pairs"] if self.collision_highlight else None)
+
+    def _material_key(self, obj):
+        return HIGHLIGHT_COLOR if obj.id in self.highlighted else obj.color
+
+    def pick(self, origin, direction):
+        # closest object whose shape is hit by the ray, the bounds in the BVH only select the candidates
+        self.sync()
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        hit = nearest_hit(self.bvh.ray_hits(origin, direction),
+                          lambda obj_id: self._ray_distance(self.handles.object(obj_id), origin, direction))
+        return None if hit is None else self.handles.object(hit[0])
+
+    def _ray_distance(self, obj, origin, direction):
+        # exact test in the local space of the object, spheres stay spheres and boxes are oriented there
+        try:
+            origin, direction = local_ray(self.transforms.world_matrix(obj), origin, direction)
+        except np.linalg.LinAlgError:
+            # scaled to nothing, it cannot be seen either
+            return np.inf
+        if isinstance(obj, Sphere3D):
+            return ray_sphere(obj.radius, origin, direction)
+        if isinstance(obj, STL3D):
+            try:
+                return ray_triangles(self.mesh_cache.get(os.path.abspath(obj.path)).triangles(), origin, direction)
+            except (OSError, ValueError):
+                pass
+        return ray_box(*self._local_bounds(obj), origin, direction)
+
+    def objects_in_box(self, low, high):
+        self.sync()
+        return [self.handles.object(obj_id) for obj_id in self.bvh.query_box(low, high)]
+
+    def _frustum_planes(self):
+        camera = self.qt_frontend.camera()
+        matrix = camera.projectionMatrix() * camera.viewMatrix()
+        return frustum_planes(np.array(matrix.copyDataTo()).reshape(4, 4))
+
+    def visible_objects(self):
+        self.sync()
+        return [self.handles.object(obj_id) for obj_id in self.bvh.query_frustum(self._frustum_planes())]
+
+    def _request_tessellation(self):
+        if not self.tessellation_scheduled:
+            self.tessellation_scheduled = True
+            QTimer.singleShot(TESSELLATION_DELAY, self.tessellate)
+
+    def tessellate(self):
+        # rings and slices of every sphere from its projected size, levels change with hysteresis
+        self.tessellation_scheduled = False
+        spheres = [self.handles.object(obj_id) for obj_id in self.sphere_levels]
+        if spheres:
+            matrices = self.transforms.world_matrices(spheres)
+            radii = np.array([obj.radius for obj in spheres]) * np.linalg.norm(matrices[:, :3, 0], axis=1)
+            eye = self.qt_frontend.camera().position()
+            sizes = projected_diameters(matrices[:, :3, 3], radii, (eye.x(), eye.y(), eye.z()),
+                                        self.qt_frontend.focal_length(), self._frustum_planes())
+            current = np.fromiter(self.sphere_levels.values(), dtype=np.int64, count=len(spheres))
+            levels = self.tessellation.choose(sizes, current)
+            changed = np.flatnonzero(levels != current)
+            for index in changed.tolist():
+                obj = spheres[index]
+                self.sphere_levels[obj.id] = int(levels[index])
+                self._replace_component(obj, self.handles.meshes, self.meshes, self._mesh_key(obj, int(levels[index])))
+        else:
+            levels = changed = ()
+
+        stats = self.tessellation_stats
+        stats["passes"] += 1
+        stats["changes"] += len(changed)
+        stats["spheres"] = len(spheres)
+        stats["triangles"] = self.tessellation.total(levels) if len(spheres) else 0
+        stats["fixed_triangles"] = len(spheres) * sphere_triangles(*SPHERE_LEVELS[FIXED_LEVEL])
+        stats["bias"] = self.tessellation.bias
+
+    def _apply_level(self, obj_id, level):
+        obj = self.handles.object(obj_id)
+        if obj is not None:
+            self._replace_component(obj, self.handles.meshes, self.meshes, self._mesh_key(obj, level))
+
     def generate_from_root(self):
-        for node in self.object_root.children:
-            self._recursive_generation(node)
+        self.create_shapes(list(walk(self.object_root)))
+
+    def _instrument(self):
+        recorder = self.instrumentation
+        recorder.wrap(self, INSTRUMENTED, "manager")
+        store = self.store.store
+
+        def timed_store(retry=False):
+            writes = self.store.writes
+            start = time.perf_counter()
+            store(retry)
+            if self.store.writes == writes:
+                recorder.count("storage.discarded")
+                return
+            recorder.record("storage.store", time.perf_counter() - start)
+            recorder.record("storage.store_bytes", self.store.last_bytes)
+
+        self.store.store = timed_store
+        recorder.gauge("objects", lambda: len(self.handles) - 1)
+        recorder.gauge("handles", self.handles.stats)
+        recorder.gauge("meshes", lambda: len(self.meshes))
+        recorder.gauge("materials", lambda: len(self.materials))
+        recorder.gauge("undo.entries", lambda: len(self.undopipeline.queue))
+        recorder.gauge("undo.bytes", lambda: self.undopipeline.size_bytes)
+        recorder.gauge("undo.spilled", lambda: self.history.stats())
+        recorder.gauge("storage", self.store.stats)
+        recorder.gauge("sync", lambda: dict(self.sync_stats))
+        recorder.gauge("mesh_cache", lambda: self.mesh_cache.stats())
+        recorder.gauge("tessellation", lambda: dict(self.tessellation_stats))
+        recorder.gauge("collisions", lambda: self.collisions.stats())
+
+    def dump_instrumentation(self, path=None):
+        path = path or os.environ.get(instrumentation.REPORT_VARIABLE) or "instrumentation.json"
+        self.instrumentation.dump(path)
+        print("Instrumentation written to {}".format(path))
+        return path
+
+    def profile(self, seconds, path=None):
+        # cProfile capture of the GUI thread for the next seconds
+        path = path or "profile-{}.prof".format(time.strftime("%Y%m%d-%H%M%S"))
+        if self.instrumentation.start_profile(path):
+            QTimer.singleShot(int(seconds * 1000), self._stop_profile)
+
+    def _stop_profile(self):
+        path = self.instrumentation.stop_profile()
+        if path is not None:
+            print("Profile written to {}".format(path))
 
     def start(self):
+        seconds = os.environ.get(instrumentation.PROFILE_VARIABLE)
+        if self.instrumentation is not None and seconds:
+            self.profile(float(seconds))
         self.qt_frontend.show()
-        return self.qt_frontend.exec()
+        result = self.qt_frontend.exec()
+        # write pending changes that are still waiting for the quiet window
+        self.store.flush()
+        self.undopipeline.persist()
+        self.history.close()
+        if self.instrumentation is not None:
+            self._stop_profile()
+            self.dump_instrumentation()
+        return result
+
+    def _apply_color(self, obj):
+        self._replace_component(obj, self.handles.materials, self.materials, self._material_key(obj))
+
+    def _apply_position(self, obj):
+        transform = self.handles.transforms[self.handles.slots[obj.id]]
+        transform.setTranslation(QVector3D(obj.position[0], obj.position[1], obj.position[2]))
+
+    def _apply_rotation(self, obj):
+        transform = self.handles.transforms[self.handles.slots[obj.id]]
+        transform.setRotation(QQuaternion.fromEulerAngles(obj.rotation[0], obj.rotation[1], obj.rotation[2]))
+
+    def _apply_box_dimension(self, obj):
+        self._replace_component(obj, self.handles.meshes, self.meshes, self._mesh_key(obj))
+
+    def _apply_radius(self, obj):
+        self._replace_component(obj, self.handles.meshes, self.meshes, self._mesh_key(obj, self._level(obj)))
+
+    def _apply_scale(self, obj):
+        self.handles.transforms[self.handles.slots[obj.id]].setScale(obj.scale)
+
+    def _apply_name(self, obj):
+        self.qt_frontend.object_changed(obj)
+
+    def _apply_parent(self, obj):
+        # the entity follows when obj.parent was changed, also by undo and redo
+        slot = self.handles.slots[obj.id]
+        parent_id = obj.parent.id
+        if self.handles.parents[slot] == parent_id:
+            return
+        old_parent = self.handles.object(self.handles.parents[slot])
+        self.handles.entities[slot].setParent(self.handles.entity(parent_id))
+        self.handles.parents[slot] = parent_id
+        self.transforms.reparent(obj)
+        self.qt_frontend.object_removed(obj, old_parent)
+        self.qt_frontend.objects_added([obj])
+
+    def _request_sync(self, obj, properties=1):
+        # Qt is updated once per event loop tick with the final state of every changed object,
+        # properties is the number of property updates requested, the sync applies each property once
+        self.sync_pending[obj.id] = None
+        self.sync_requests += properties
+        if not self.sync_scheduled:
+            self.sync_scheduled = True
+            QTimer.singleShot(0, self.sync)
+
+    def sync(self):
+        self.sync_scheduled = False
+        if not self.sync_pending:
+            return
+        pending, self.sync_pending = self.sync_pending, {}
+        requests, self.sync_requests = self.sync_requests, 0
+        current = self.qt_frontend.current_object()
+        applied = 0
+        refresh = False
+        for obj_id in pending:
+            obj = self.handles.object(obj_id)
+            # deleted in the same tick, nothing left to show, shapes built again later take the whole state
+            if obj is None:
+                continue
+            changes = obj.take_changes()
+            if not changes:
+                continue
+            for name in SYNC_ORDER:
+                if name in changes:
+                    self.appliers[name](obj)
+                    applied += 1
+            if not changes.isdisjoint(BOUNDS_CHANGES):
+                self._update_bounds(obj)
+                # projected sizes of the moved spheres changed
+                if self.sphere_levels:
+                    self._request_tessellation()
+            refresh = refresh or obj is current
+        if refresh:
+            self.qt_frontend.refresh_object_editor()
+
+        self.sync_stats["ticks"] += 1
+        self.sync_stats["requested"] += requests
+        self.sync_stats["applied"] += applied
+        self.sync_stats["last_avoided"] = requests - applied
+        self.sync_stats["avoided"] += requests - applied
+
+    def _schedule_store(self):
+        if self.transaction_depth > 0:
+            self.store_pending = True
+        else:
+            self.store.schedule_store()
+
+    @contextmanager
+    def transaction(self):
+        # all edits inside become one undo entry and one storage write
+        self.transaction_depth += 1
+        try:
+            with self.undopipeline.transaction():
+                yield self
+        finally:
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0 and self.store_pending:
+                self.store_pending = False
+                self.store.schedule_store()
+
+    def begin_edit(self):
+        self.undopipeline.begin_session()
+
+    def end_edit(self):
+        self.undopipeline.end_session()
+
+    def _edit(self, obj, operation):
+        self.undopipeline.add_operation(operation)
+        # every setter of a compound edit, e.g. a move to another parent, updates one property
+        self._request_sync(obj, len(operation.operations) if isinstance(operation, CompoundOperation) else 1)
+        self.store.mark_changed(obj)
+        self._schedule_store()
 
     def update_color(self, obj, color):
-        self.undopipeline.add_operation(obj.set_color(color))
-        material = self.objects[obj][3]
-        material.setDiffuse(QColor(obj.color))
-        self.store.schedule_store()
+        self._edit(obj, obj.set_color(color))
 
     def update_position(self, obj, position):
-        self.undopipeline.add_operation(obj.set_position(position))
-        transform = self.objects[obj][2]
-        transform.setTranslation(QVector3D(obj.position[0], obj.position[1], obj.position[2]))
-        self.store.schedule_store()
+        self._edit(obj, obj.set_position(position))
 
     def update_rotation(self, obj, rotation):
-        self.undopipeline.add_operation(obj.set_rotation(rotation))
-        transform = self.objects[obj][2]
-        transform.setRotation(QQuaternion.fromEulerAngles(obj.rotation[0], obj.rotation[1], obj.rotation[2]))
-        self.store.schedule_store()
+        self._edit(obj, obj.set_rotation(rotation))
 
     def update_box_dimension(self, obj, box_dimension):
-        self.undopipeline.add_operation(obj.set_dimension(box_dimension))
-        mesh = self.objects[obj][1]
-        mesh.setXExtent(obj.width)
-        mesh.setYExtent(obj.length)
-        mesh.setZExtent(obj.height)
-        self.store.schedule_store()
+        self._edit(obj, obj.set_dimension(box_dimension))
 
     def update_radius(self, obj, radius):
-        self.undopipeline.add_operation(obj.set_radius(radius))
-        mesh = self.objects[obj][1]
-        mesh.setRadius(radius)
-        self.store.schedule_store()
+        self._edit(obj, obj.set_radius(radius))
 
     def update_scale(self, obj, scale):
-        self.undopipeline.add_operation(obj.set_scale(scale))
-        self.store.schedule_store()
+        self._edit(obj, obj.set_scale(scale))
 
     def update_name(self, obj, name):
-        self.undopipeline.add_operation(obj.set_name(name))
-        self.qt_frontend.set_known_objects(self.object_root)
-        self.store.schedule_store()
+        self._edit(obj, obj.set_name(name))
+
+    def set_parent(self, obj, parent, keep_world=True):
+        # moves obj with its subtree below parent, by default without moving it in the scene,
+        # None moves it to the top level
+        parent = self.object_root if parent is None else parent
+        if parent is obj or parent in walk(obj):
+            raise ValueError("Cannot move {} below itself".format(obj.name))
+        self._edit(obj, obj.set_parent(parent, keep_world))
+
+    def update_many(self, objs, property, values):
+        # one undo entry, one sync and one storage write for the whole batch
+        setter = {
+            PropertyType.POSITION: "set_position",
+            PropertyType.ROTATION: "set_rotation",
+            PropertyType.BOX_DIMENSIONS: "set_dimension",
+            PropertyType.RADIUS: "set_radius",
+            PropertyType.SCALE: "set_scale",
+            PropertyType.NAME: "set_name",
+            PropertyType.COLOR: "set_color",
+        }[property]
+        with self.transaction():
+            for obj, value in zip(objs, values):
+                self._edit(obj, getattr(obj, setter)(value))
 
     def update_object(self, obj):
-        mesh = self.objects[obj][1]
-        transform = self.objects[obj][2]
-        material = self.objects[obj][3]
-
-        material.setDiffuse(QColor(obj.color))
-        transform.setTranslation(QVector3D(obj.position[0], obj.position[1], obj.position[2]))
-        transform.setRotation(QQuaternion.fromEulerAngles(obj.rotation[0], obj.rotation[1], obj.rotation[2]))
-
-        if isinstance(obj, Sphere3D):
-            mesh.setRadius(obj.radius)
-        elif isinstance(obj, Box3D):
-            mesh.setXExtent(obj.width)
-            mesh.setYExtent(obj.length)
-            mesh.setZExtent(obj.height)
-
-        self.qt_frontend.set_known_objects(self.object_root)
-        self.qt_frontend.update_object_editor(obj)
-        self.store.schedule_store()
+        self.update_objects([obj])
+
+    def update_objects(self, objs):
+        # the setters run by undo and redo recorded which properties changed
+        for obj in objs:
+            # targets of undone creations or redone deletions have no entities
+            if obj is None or obj.id not in self.handles.slots:
+                continue
+            self._request_sync(obj, len(obj.peek_changes()))
+            self.store.mark_changed(obj)
+        self._schedule_store()
+
+    def _remove_entities(self, obj):
+        # the Qt entity tree follows the object tree, deleting the top entity removes all children
+        entity = self.handles.entity(obj.id)
+        self.transforms.remove(obj)
+        for node in [obj, *walk(obj)]:
+            _, mesh, _, material = self.handles.remove(node.id)
+            self.lods.pop(node.id, None)
+            self.sphere_levels.pop(node.id, None)
+            self.collisions.remove(node)
+            self.highlighted.discard(node.id)
+            self.bvh.remove(node.id)
+            self.meshes.release(mesh)
+            self.materials.release(material)
+        entity.deleteLater()
+        self._request_collision_check()
+
+    def _attach(self, obj, parent):
+        # (re)inserts obj with its whole subtree, used for creation and to undo deletion
+        obj.set_parent(parent)
+        self.create_shapes([obj, *walk(obj)])
+        for node in [obj, *walk(obj)]:
+            self.store.mark_changed(node)
+        self.qt_frontend.objects_added([obj])
+
+    def _detach(self, obj):
+        self.store.mark_deleted(obj)
+        parent = obj.parent
+        obj.set_parent(None)
+        self._remove_entities(obj)
+        current = self.qt_frontend.current_object()
+        if current is not None and current.id not in self.handles.slots:
+            self.qt_frontend.update_object_editor(None)
+        self.qt_frontend.object_removed(obj, parent)
 
     def delete_object(self, obj):
-        obj.set_parent(None)
-        entity, mesh, transform, material = self.objects[obj]
-        del self.objects[obj]
-        del self.entities[entity]
-        entity.deleteLater()
-        self.undopipeline.clean(obj)
+        parent = obj.parent
+        self._detach(obj)
+        self.undopipeline.add_operation(DeleteOperation(obj, parent, self._attach, self._detach))
+        self.qt_frontend.update_object_editor(None)
+        self._schedule_store()
+
+    def delete_many(self, objs):
+        with self.transaction():
+            for obj in objs:
+                # children of an object deleted earlier in the batch are already gone
+                if obj.id not in self.handles.slots:
+                    continue
+                parent = obj.parent
+                self.store.mark_deleted(obj)
+                obj.set_parent(None)
+                self._remove_entities(obj)
+                self.undopipeline.add_operation(DeleteOperation(obj, parent, self._attach, self._detach))
+            self._schedule_store()
         self.qt_frontend.update_object_editor(None)
+        # a reset only lists the top level again, cheaper than many single removals
         self.qt_frontend.set_known_objects(self.object_root)
-        self.store.schedule_store()
 
-    def undo(self):
-        target = self.undopipeline.undo()
-        if target is not None:
+    def _update_targets(self, target):
+        if isinstance(target, tuple):
+            self.update_objects(target)
+        elif target is not None and target.id in self.handles.slots:
             self.update_object(target)
-        self.store.schedule_store()
 
-    def redo(self):
-        target = self.undopipeline.redo()
-        if target is not None:
-            self.update_object(target)
-        self.store.schedule_store()
+    def undo(self):
+        with self.transaction():
+            self._update_targets(self.undopipeline.undo())
+            self._schedule_store()
 
-    def create_box(self):
-        box = Box3D()
-        box.set_parent(self.object_root)
+    def redo(self):
+        with self.transaction():
+            self._update_targets(self.undopipeline.redo())
+            self._schedule_store()
 
-        self.create_shape_from_object(box)
+    def _create(self, obj):
+        self._attach(obj, self.object_root)
+        self.undopipeline.add_operation(CreateOperation(obj, self.object_root, self._attach, self._detach))
+        self._schedule_store()
 
-        self.qt_frontend.set_known_objects(self.object_root)
-        self.store.schedule_store()
+    def create_box(self):
+        self._create(Box3D())
 
     def create_sphere(self):
-        sphere = Sphere3D()
-        sphere.set_parent(self.object_root)
-
-        self.create_shape_from_object(sphere)
-
-        self.qt_frontend.set_known_objects(self.object_root)
-        self.store.schedule_store()
+        self._create(Sphere3D())
+
+    def create_stl(self, path):
+        # all levels are simplified now and cached, zooming out later does not stall
+        try:
+            for level in range(self.mesh_cache.levels()):
+                self.mesh_cache.get(path, level)
+        except (OSError, ValueError) as error:
+            print("Could not load {}: {}".format(path, error))
+            return
+        self._create(self._stl_object(path))
+
+    def create_stls(self, paths):
+        # files missing in the mesh cache are processed in worker processes, parts appear as they arrive
+        if self.stl_import is not None:
+            print("An STL import is still running")
+            return
+        cached = [path for path in paths if os.path.exists(path) and self.mesh_cache.cached(path)]
+        if cached:
+            self.create_many([self._stl_object(path) for path in cached])
+        paths = [path for path in paths if path not in cached]
+        if not paths:
+            return
+        self.stl_import = ParallelImport(paths, weld=self.mesh_cache.weld, resolutions=self.mesh_cache.resolutions)
+        self.import_timer = QTimer()
+        self.import_timer.timeout.connect(self._poll_import)
+        self.import_timer.start(50)
+        self.qt_frontend.import_started(len(paths))
+
+    def _stl_object(self, path):
+        return STL3D(path, name=os.path.splitext(os.path.basename(path))[0])
+
+    def _poll_import(self):
+        objs = []
+        for path, result in self.stl_import.poll():
+            if isinstance(result, Exception):
+                print("Could not load {}: {}".format(path, result))
+                continue
+            for level, mesh in enumerate(result):
+                self.mesh_cache.put(path, mesh, level)
+            objs.append(self._stl_object(path))
+        if objs:
+            self.create_many(objs)
+        self.qt_frontend.import_progress(*self.stl_import.progress())
+        if self.stl_import.finished:
+            self.import_timer.stop()
+            self.import_timer = None
+            self.stl_import = None
+            self.qt_frontend.import_finished()
+
+    def cancel_import(self):
+        if self.stl_import is not None:
+            self.stl_import.cancel()
+        if self.scene_import is not None:
+            self.scene_import.cancel()
+
+    def export_scene(self, path):
+        # one JSON line per object, written while walking the tree
+        with open(path, "w", encoding="utf-8") as file:
+            count = write_records(scene_records(self.object_root), file)
+        print("{} objects written to {}".format(count, path))
+        return count
+
+    def import_scene(self, path):
+        # objects of an NDJSON file are added piece by piece between event loop ticks, undone as one step
+        if self.scene_import is not None:
+            print("A scene import is still running")
+            return
+        try:
+            self.scene_import = SceneImport(path, IMPORT_CHUNK[0])
+        except OSError as error:
+            print("Could not import {}: {}".format(path, error))
+            return
+        self.scene_import_created = []
+        self.scene_import_timer = QTimer()
+        self.scene_import_timer.timeout.connect(self._import_scene_step)
+        self.scene_import_timer.start(0)
+        self.qt_frontend.import_started(1000, "Importing {}".format(os.path.basename(path)))
+
+    def _import_scene_step(self):
+        scene_import = self.scene_import
+        start = time.perf_counter()
+        while not scene_import.finished and time.perf_counter() - start < IMPORT_TICK:
+            piece = time.perf_counter()
+            try:
+                objs = scene_import.read()
+            except ValueError as error:
+                # objects read so far stay
+                print("Could not import {}: {}".format(scene_import.filename, error))
+                scene_import.cancel()
+                break
+            if objs:
+                self._add_imported(objs)
+                seconds = time.perf_counter() - piece
+                _, smallest, largest = IMPORT_CHUNK
+                scene_import.chunk_size = max(smallest, min(largest, int(len(objs) * IMPORT_TICK / seconds)))
+        done, total = scene_import.progress()
+        self.qt_frontend.import_progress(1000 * done // max(total, 1), 1000)
+        if scene_import.finished:
+            self._finish_scene_import()
+
+    def _add_imported(self, objs):
+        for obj in objs:
+            if obj.parent is None:
+                obj.set_parent(self.object_root)
+                self.scene_import_created.append(
+                    CreateOperation(obj, self.object_root, self._attach, self._detach))
+        self.create_shapes(objs)
+        for obj in objs:
+            self.store.mark_changed(obj)
+        self._schedule_store()
+        self.qt_frontend.objects_added(objs)
+
+    def _finish_scene_import(self):
+        scene_import, self.scene_import = self.scene_import, None
+        scene_import.close()
+        self.scene_import_timer.stop()
+        self.scene_import_timer = None
+        created, self.scene_import_created = self.scene_import_created, []
+        if len(created) == 1:
+            self.undopipeline.add_operation(created[0])
+        elif created:
+            self.undopipeline.add_operation(CompoundOperation(created))
+        reader = scene_import.reader
+        print("{} objects imported from {}{}".format(
+            reader.count, scene_import.filename,
+            ", {} without parent at the top level".format(reader.orphans) if reader.orphans else ""))
+        self.qt_frontend.import_finished()
+
+    def create_many(self, objs, parent=None):
+        # objs are new backend objects, parents are created before their children
+        parent = self.object_root if parent is None else parent
+        batch = set(objs)
+        with self.transaction():
+            for obj in objs:
+                if obj.parent is None:
+                    obj.set_parent(parent)
+            self.create_shapes(objs)
+            for obj in objs:
+                self.store.mark_changed(obj)
+                # undo and redo of the topmost objects in the batch cover their subtrees
+                if obj.parent not in batch:
+                    self.undopipeline.add_operation(
+                        CreateOperation(obj, obj.parent, self._attach, self._detach))
+            self._schedule_store()
+
+        self.qt_frontend.objects_added(objs)
@@ -0,0 +1,157 @@
+import glob
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from editor3d.lod import RESOLUTIONS, cluster
+from editor3d.stl import Mesh, load_stl
+
+
+def _file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _save(filename, array):
+    tmp = filename + ".tmp"
+    with open(tmp, "wb") as file:
+        np.save(file, array)
+    os.replace(tmp, filename)
+
+
+class MeshCache:
+    # processed meshes as .npy files next to the scene, recently used ones stay in memory up to budget bytes
+    def __init__(self, directory, budget=256 * 2 ** 20, weld=True, hash_content=False, load=load_stl,
+                 resolutions=RESOLUTIONS):
+        self.directory = directory
+        self.budget = budget
+        self.weld = weld
+        self.hash_content = hash_content
+        self.load = load
+        # level n > 0 is the source mesh clustered to resolutions[n - 1]
+        self.resolutions = resolutions
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        self.simplify_seconds = 0.0
+
+    def __len__(self):
+        return len(self.memory)
+
+    def _prefix(self, path):
+        return hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+
+    def key(self, path):
+        # changes of the source file lead to a new key, the old entry is never served again
+        stat = os.stat(path)
+        parts = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns, self.weld, self.resolutions]
+        if self.hash_content:
+            parts.append(_file_hash(path))
+        return "{}-{}".format(self._prefix(path), hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16])
+
+    def _files(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".data.npy", base + ".indices.npy"
+
+    def levels(self):
+        return len(self.resolutions) + 1
+
+    def get(self, path, level=0):
+        source = self.key(path)
+        key = "{}.l{}".format(source, level)
+        mesh = self.memory.get(key)
+        if mesh is not None:
+            self.hits += 1
+            self.memory.move_to_end(key)
+        else:
+            mesh = self._read(key)
+            if mesh is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                mesh = self._process(path, level)
+                self._write(path, source, key, mesh)
+            self._remember(key, mesh)
+        self.bytes_served += mesh.nbytes
+        return mesh
+
+    def cached(self, path):
+        # every level is on disk already, get will not process anything
+        source = self.key(path)
+        return all(os.path.exists(self._files("{}.l{}".format(source, level))[0]) for level in range(self.levels()))
+
+    def put(self, path, mesh, level=0):
+        # a mesh processed elsewhere, for example in a worker process
+        source = self.key(path)
+        key = "{}.l{}".format(source, level)
+        self._write(path, source, key, mesh)
+        old = self.memory.pop(key, None)
+        if old is not None:
+            self.memory_bytes -= old.nbytes
+        self._remember(key, mesh)
+
+    def _read(self, key):
+        data_file, indices_file = self._files(key)
+        try:
+            data = np.load(data_file, mmap_mode="r")
+            indices = np.load(indices_file, mmap_mode="r") if os.path.exists(indices_file) else None
+        except (OSError, ValueError):
+            return None
+        return Mesh(data, indices)
+
+    def _process(self, path, level):
+        if level == 0:
+            return self.load(path, weld=self.weld)
+        base = self.get(path)
+        start = time.perf_counter()
+        mesh = cluster(base, self.resolutions[level - 1])
+        self.simplify_seconds += time.perf_counter() - start
+        return mesh
+
+    def _write(self, path, source, key, mesh):
+        os.makedirs(self.directory, exist_ok=True)
+        # entries of older versions of the same source are stale now
+        for stale in glob.glob(os.path.join(self.directory, self._prefix(path) + "-*.npy")):
+            if not os.path.basename(stale).startswith(source + "."):
+                os.remove(stale)
+        data_file, indices_file = self._files(key)
+        if mesh.indices is not None:
+            _save(indices_file, mesh.indices)
+        _save(data_file, mesh.data)
+
+    def _remember(self, key, mesh):
+        self.memory[key] = mesh
+        self.memory_bytes += mesh.nbytes
+        while len(self.memory) > 1 and self.memory_bytes > self.budget:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self.memory.clear()
+        self.memory_bytes = 0
+
+    def stats(self):
+        requests = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes_served": self.bytes_served,
+            "simplify_seconds": self.simplify_seconds,
+            "hit_rate": (self.hits + self.disk_hits) / requests if requests else 0.0,
+        }
@@ -0,0 +1,196 @@
+import itertools
+import json
+import os
+import sqlite3
+
+from editor3d.objects import next_object_id, parse_color, walk
+from editor3d.storage import COLUMNS, SHAPE_FIELDS, TYPE_NAMES, object_row, row_object
+
+# one JSON object per line: id, parent (null at the top level), type, name, position, rotation, color and
+# the shape fields of the type, writers put parents first, readers also accept children before their parents
+SEPARATORS = (",", ":")
+
+
+def row_record(row):
+    record = {"id": row[0], "parent": row[1], "type": row[2], "name": row[3], "position": list(row[4:7]),
+              "rotation": list(row[7:10]), "color": row[10]}
+    for field, value in zip(SHAPE_FIELDS, row[11:]):
+        if value is not None:
+            record[field] = value
+    return record
+
+
+def object_record(obj, root):
+    return row_record(object_row(obj, root))
+
+
+def record_row(record):
+    # storage row of a record, ValueError if it does not describe an object
+    try:
+        if record["type"] not in TYPE_NAMES:
+            raise ValueError("unknown type {!r}".format(record["type"]))
+        parent = record.get("parent")
+        position = tuple(float(_) for _ in record["position"])
+        rotation = tuple(float(_) for _ in record["rotation"])
+        if len(position) != 3 or len(rotation) != 3:
+            raise ValueError("position and rotation need three values")
+        shape = []
+        for field in SHAPE_FIELDS:
+            value = record.get(field)
+            if value is not None:
+                # the editor hands these to Qt as they are when the scene is loaded
+                if field == "path":
+                    if not isinstance(value, str):
+                        raise ValueError("path must be a string, got {!r}".format(value))
+                else:
+                    value = float(value)
+            shape.append(value)
+        return (int(record["id"]), None if parent is None else int(parent), record["type"],
+                str(record.get("name", record["type"])), *position, *rotation,
+                parse_color(record.get("color", "#dddddd"))) + tuple(shape)
+    except KeyError as error:
+        raise ValueError("missing field {}".format(error))
+    except TypeError as error:
+        raise ValueError(str(error))
+
+
+def scene_records(root):
+    # a generator over the tree, only the stack of unvisited siblings is held besides the scene
+    return (object_record(obj, root) for obj in walk(root))
+
+
+def sqlite_records(filename):
+    # straight from the rows of an SQLite scene file, the tree is never built, rows come in id order
+    connection = sqlite3.connect(filename)
+    try:
+        for row in connection.execute("SELECT {} FROM objects ORDER BY id".format(", ".join(COLUMNS))):
+            yield row_record(row)
+    finally:
+        connection.close()
+
+
+def write_records(records, file):
+    # file opened in text mode, returns the number of lines written
+    count = 0
+    for record in records:
+        file.write(json.dumps(record, separators=SEPARATORS))
+        file.write("\n")
+        count += 1
+    return count
+
+
+def read_rows(file, name="<ndjson>"):
+    # storage rows of the lines of file, one at a time, errors name the line
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield record_row(json.loads(line))
+        except ValueError as error:
+            raise ValueError("{} line {}: {}".format(name, number, error))
+
+
+class SceneReader:
+    # builds objects from rows, children are linked to their parent as soon as both exist,
+    # objects whose parent never shows up end at the top level
+    def __init__(self, rows, fresh_ids=False):
+        self.rows = iter(rows)
+        # new ids for objects added to an existing scene, the file ids are only used to find parents
+        self.fresh_ids = fresh_ids
+        # objects handed out by read, by file id
+        self.objects = {}
+        # parent id -> (id, object) of objects whose parent was not handed out yet
+        self.waiting = {}
+        self.waiting_ids = set()
+        self.count = 0
+        self.orphans = 0
+        self.done = False
+
+    def _release(self, obj_id, ready):
+        stack = [obj_id]
+        while stack:
+            parent_id = stack.pop()
+            for child_id, child in self.waiting.pop(parent_id, ()):
+                parent = self.objects[parent_id]
+                child.parent = parent
+                parent.children.add(child)
+                self.waiting_ids.discard(child_id)
+                self.objects[child_id] = child
+                ready.append(child)
+                stack.append(child_id)
+
+    def read(self, count):
+        # up to count new objects, and those that were waiting for them, parents before their children,
+        # top level objects have no parent
+        ready = []
+        rows = 0
+        for row in itertools.islice(self.rows, count):
+            rows += 1
+            obj_id, parent_id = row[0], row[1]
+            if obj_id in self.objects or obj_id in self.waiting_ids:
+                raise ValueError("id {} is used twice".format(obj_id))
+            obj = row_object(row)
+            if self.fresh_ids:
+                obj.id = next_object_id()
+            if parent_id in self.objects:
+                parent = self.objects[parent_id]
+                obj.parent = parent
+                parent.children.add(obj)
+            elif parent_id is not None and parent_id != obj_id:
+                self.waiting.setdefault(parent_id, []).append((obj_id, obj))
+                self.waiting_ids.add(obj_id)
+                continue
+            self.objects[obj_id] = obj
+            ready.append(obj)
+            self._release(obj_id, ready)
+        self.count += rows
+        if rows < count:
+            self.done = True
+            while self.waiting:
+                _, entries = self.waiting.popitem()
+                for obj_id, obj in entries:
+                    # a parent in a cycle of waiting objects may have been placed meanwhile
+                    if obj_id in self.objects:
+                        continue
+                    self.orphans += 1
+                    self.waiting_ids.discard(obj_id)
+                    self.objects[obj_id] = obj
+                    ready.append(obj)
+                    self._release(obj_id, ready)
+        return ready
+
+    def attach_all(self, root, chunk_size=4096):
+        # the whole file below root, for tools that need the tree
+        while not self.done:
+            for obj in self.read(chunk_size):
+                if obj.parent is None:
+                    obj.parent = root
+                    root.children.add(obj)
+        return root
+
+
+class SceneImport:
+    # an NDJSON file read piece by piece into an existing scene, progress in bytes of the file
+    def __init__(self, filename, chunk_size=256):
+        self.filename = filename
+        self.file = open(filename, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.reader = SceneReader(read_rows(self.file, filename), fresh_ids=True)
+        self.chunk_size = chunk_size
+        self.cancelled = False
+
+    @property
+    def finished(self):
+        return self.reader.done or self.cancelled
+
+    def read(self):
+        return [] if self.finished else self.reader.read(self.chunk_size)
+
+    def progress(self):
+        return (self.size if self.file.closed else self.file.tell()), self.size
+
+    def cancel(self):
+        self.cancelled = True
+
+    def close(self):
+        self.file.close()
@@ -1,8 +1,90 @@
-from editor3d.undopipeline import Operation
+import itertools
+import re
+import weakref
+
+from editor3d.undopipeline import Operation, CompoundOperation
+
+# stable object ids, continued after the highest id loaded from storage, the scene root has ROOT_ID
+ROOT_ID = 0
+_object_ids = itertools.count(ROOT_ID + 1)
+
+
+# object colors are "#rrggbb"
+COLOR = re.compile(r"^#[0-9a-fA-F]{6}$")
+
+
+def parse_color(value):
+    if not isinstance(value, str) or not COLOR.match(value):
+        raise ValueError("Expected a color as #rrggbb, got {!r}".format(value))
+    return value
+
+
+def next_object_id():
+    return next(_object_ids)
+
+
+def reserve_object_ids(last_id):
+    global _object_ids
+    current = next(_object_ids)
+    _object_ids = itertools.count(max(current, last_id + 1))
+
+
+def walk(node):
+    # all descendants of node, parents before their children
+    stack = list(node.children)
+    while stack:
+        obj = stack.pop()
+        yield obj
+        stack.extend(obj.children)
+
+
+class ObjectOperation(Operation):
+    # refers to its object by id and a weak reference and to the setter by name, an entry in the history
+    # holds neither the object nor a bound method
+    __slots__ = ("target_id", "name", "reference")
+
+    def __init__(self, target, name, from_value, to_value):
+        self.target_id = target.id
+        self.name = name
+        self.reference = weakref.ref(target)
+        self.from_value = from_value
+        self.to_value = to_value
+
+    @property
+    def target(self):
+        return self.reference()
+
+    @property
+    def setter(self):
+        return getattr(self.reference(), self.name)
+
+    def undo(self):
+        getattr(self.reference(), self.name)(self.from_value)
+
+    def redo(self):
+        getattr(self.reference(), self.name)(self.to_value)
+
+    def can_merge(self, op):
+        return isinstance(op, ObjectOperation) and op.target_id == self.target_id and op.name == self.name and \
+            op.reference() is self.reference()
+
+
+class ObjectRoot:
+    # top of the scene tree, it has children but no shape
+    id = ROOT_ID
+
+    def __init__(self):
+        self.children = set()
 
 
 class Object3D:
+    # fields of all shape types are slots here, the subclasses add none, so store views (editor3d.scenestore)
+    # can add theirs next to a shape type and neither carries a __dict__
+    __slots__ = ("id", "name", "position", "rotation", "color", "parent", "children", "changed", "radius",
+                 "length", "width", "height", "path", "scale", "__weakref__")
+
     def __init__(self, name="Object", position=(0, 0, 0), rotation=(0, 0, 0), color="#dddddd"):
+        self.id = next_object_id()
         self.name = name
         self.position = position
         self.rotation = rotation
@@ -13,8 +95,48 @@ class Object3D:
     def __str__(self):
         return self.name
 
-    def set_parent(self, parent):
-        undo = Operation(self, self.set_parent, self.parent, parent)
+    def __getstate__(self):
+        # a dict of the set fields like before the slots, older storage files load unchanged
+        state = {}
+        for name in Object3D.__slots__[:-1]:
+            if name != "changed" and hasattr(self, name):
+                state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        # objects stored before ids existed
+        if "id" not in state:
+            self.id = next_object_id()
+
+    def mark_changed(self, name):
+        # properties set since the last take_changes, created on first use so loaded objects need no field
+        try:
+            changed = self.changed
+        except AttributeError:
+            changed = self.changed = set()
+        changed.add(name)
+
+    def peek_changes(self):
+        # properties set since the last take_changes, without taking them
+        try:
+            return self.changed
+        except AttributeError:
+            return frozenset()
+
+    def take_changes(self):
+        try:
+            changed = self.changed
+        except AttributeError:
+            return set()
+        del self.changed
+        return changed
+
+    def set_parent(self, parent, keep_world=False):
+        if keep_world:
+            return self._set_parent_keep_world(parent)
+        undo = ObjectOperation(self, "set_parent", self.parent, parent)
         # remove from old parent
         if self.parent is not None:
             self.parent.children.remove(self)
@@ -22,41 +144,61 @@ class Object3D:
         # add to new parent
         if self.parent is not None:
             self.parent.children.add(self)
+        self.mark_changed("parent")
         return undo
 
+    def _set_parent_keep_world(self, parent):
+        # the local pose is changed so the object does not move in the scene
+        # numpy is imported here, plain scene jobs do not need it
+        from editor3d.transforms import relative_pose
+        position, rotation, scale = relative_pose(self, parent)
+        operations = [self.set_parent(parent), self.set_position(position), self.set_rotation(rotation)]
+        if hasattr(self, "set_scale"):
+            operations.append(self.set_scale(scale))
+        return CompoundOperation(operations)
+
     def set_color(self, color):
-        undo = Operation(self, self.set_color, self.color, color)
+        undo = ObjectOperation(self, "set_color", self.color, color)
         self.color = color
+        self.mark_changed("color")
         return undo
 
     def set_name(self, name):
-        undo = Operation(self, self.set_name, self.name, name)
+        undo = ObjectOperation(self, "set_name", self.name, name)
         self.name = name
+        self.mark_changed("name")
         return undo
 
     def set_rotation(self, angles):
-        undo = Operation(self, self.set_rotation, self.rotation, angles)
+        undo = ObjectOperation(self, "set_rotation", self.rotation, angles)
         self.rotation = angles
+        self.mark_changed("rotation")
         return undo
 
     def set_position(self, position):
-        undo = Operation(self, self.set_position, self.position, position)
+        undo = ObjectOperation(self, "set_position", self.position, position)
         self.position = position
+        self.mark_changed("position")
         return undo
 
 
 class Sphere3D(Object3D):
+    __slots__ = ()
+
     def __init__(self, name="Sphere", position=(0, 0, 0), rotation=(0, 0, 0), color="#dddddd", radius=1):
         super().__init__(name, position, rotation, color)
         self.radius = radius
 
     def set_radius(self, radius):
-        undo = Operation(self, self.set_position, self.radius, radius)
+        undo = ObjectOperation(self, "set_radius", self.radius, radius)
         self.radius = radius
+        self.mark_changed("radius")
         return undo
 
 
 class Box3D(Object3D):
+    __slots__ = ()
+
     def __init__(self, name="Box", position=(0, 0, 0), rotation=(0, 0, 0), color="#dddddd", length=1, width=1, height=1):
         super().__init__(name, position, rotation, color)
         self.length = length
@@ -64,35 +206,53 @@ class Box3D(Object3D):
         self.height = height
 
     def set_dimension(self, dimensions):
-        undo = Operation(self, self.set_dimension, (self.width, self.length, self.height), dimensions)
+        undo = ObjectOperation(self, "set_dimension", (self.width, self.length, self.height), dimensions)
         self.width = dimensions[0]
         self.length = dimensions[1]
         self.height = dimensions[2]
+        self.mark_changed("dimension")
         return undo
 
     def set_width(self, width):
-        undo = Operation(self, self.set_width, self.width, width)
+        undo = ObjectOperation(self, "set_width", self.width, width)
         self.width = width
+        self.mark_changed("dimension")
         return undo
 
     def set_height(self, height):
-        undo = Operation(self, self.set_height, self.height, height)
+        undo = ObjectOperation(self, "set_height", self.height, height)
         self.height = height
+        self.mark_changed("dimension")
         return undo
 
     def set_length(self, length):
-        undo = Operation(self, self.set_length, self.length, length)
+        undo = ObjectOperation(self, "set_length", self.length, length)
         self.length = length
+        self.mark_changed("dimension")
         return undo
 
 
 class STL3D(Object3D):
+    __slots__ = ()
+
     def __init__(self, path, name="Box", position=(0, 0, 0), rotation=(0, 0, 0), color="#dddddd", scale=1.0):
-        super().__init__(name, position, rotation, scale, color)
+        super().__init__(name, position, rotation, color)
         self.path = path
         self.scale = scale
 
     def set_scale(self, scale):
-        undo = Operation(self, self.set_scale, self.scale, scale)
+        undo = ObjectOperation(self, "set_scale", self.scale, scale)
         self.scale = scale
+        self.mark_changed("scale")
         return undo
+
+
+# type codes used by the storage formats, subclasses of these map to the same code
+OBJECT_TYPES = (Object3D, Sphere3D, Box3D, STL3D)
+
+
+def object_type(obj):
+    for cls in reversed(OBJECT_TYPES):
+        if isinstance(obj, cls):
+            return cls
+    raise TypeError("Unknown object type: {}".format(type(obj).__name__))
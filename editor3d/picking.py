@@ -0,0 +1,70 @@
+import numpy as np
+
+from editor3d.bvh import ray_boxes
+
+# triangles tested at once, bounds the temporaries of the triangle test
+CHUNK = 1 << 16
+# determinants below this are rays parallel to the triangle plane
+EPSILON = 1e-12
+
+
+def local_ray(matrix, origin, direction):
+    # the ray in the local space of an object with this world matrix, distances along it stay the same
+    inverse = np.linalg.inv(np.asarray(matrix, dtype=np.float64))
+    return inverse[:3, :3] @ origin + inverse[:3, 3], inverse[:3, :3] @ direction
+
+
+def ray_sphere(radius, origin, direction):
+    # distance to a sphere around the local origin, 0 from inside, inf if it is missed
+    a = direction @ direction
+    b = origin @ direction
+    c = origin @ origin - radius * radius
+    discriminant = b * b - a * c
+    if a == 0 or discriminant < 0:
+        return np.inf
+    root = np.sqrt(discriminant)
+    if -b + root < 0:
+        return np.inf
+    return max((-b - root) / a, 0.0)
+
+
+def ray_box(low, high, origin, direction):
+    # distance to a local axis aligned box, an oriented box in world space
+    hit, near = ray_boxes(np.asarray([low], dtype=np.float64), np.asarray([high], dtype=np.float64),
+                          origin, direction)
+    return float(near[0]) if hit[0] else np.inf
+
+
+def ray_triangles(triangles, origin, direction):
+    # distance to the closest of the (n, 3, 3) triangles, Moeller and Trumbore, both sides count
+    best = np.inf
+    for start in range(0, len(triangles), CHUNK):
+        corners = np.asarray(triangles[start:start + CHUNK], dtype=np.float64)
+        first = corners[:, 1] - corners[:, 0]
+        second = corners[:, 2] - corners[:, 0]
+        p = np.cross(direction, second)
+        determinant = np.einsum("ni,ni->n", first, p)
+        valid = np.abs(determinant) > EPSILON
+        inverse = 1.0 / np.where(valid, determinant, 1.0)
+        s = origin - corners[:, 0]
+        u = np.einsum("ni,ni->n", s, p) * inverse
+        q = np.cross(s, first)
+        v = (q @ direction) * inverse
+        t = np.einsum("ni,ni->n", second, q) * inverse
+        hit = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+        if hit.any():
+            best = min(best, float(t[hit].min()))
+    return best
+
+
+def nearest_hit(candidates, distance):
+    # (key, distance) of the closest exact hit, candidates are (key, bounds distance) sorted by that distance,
+    # which is never larger than the exact one, so the search ends at bounds behind the best hit
+    best, best_distance = None, np.inf
+    for key, near in candidates:
+        if near > best_distance:
+            break
+        exact = distance(key)
+        if exact < best_distance:
+            best, best_distance = key, exact
+    return None if best is None else (best, best_distance)
@@ -0,0 +1,53 @@
+class ResourceCache:
+    # reference counted resources shared between objects with the same key
+    def __init__(self, create, destroy=None):
+        self.create = create
+        self.destroy = destroy
+        self.resources = {}
+        self.counts = {}
+        self.keys = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.resources)
+
+    def acquire(self, key):
+        resource = self.resources.get(key)
+        if resource is None:
+            self.misses += 1
+            resource = self.create(key)
+            self.resources[key] = resource
+            self.counts[key] = 0
+            self.keys[id(resource)] = key
+        else:
+            self.hits += 1
+        self.counts[key] += 1
+        return resource
+
+    def release(self, resource):
+        key = self.keys[id(resource)]
+        self.counts[key] -= 1
+        if self.counts[key] == 0:
+            del self.resources[key]
+            del self.counts[key]
+            del self.keys[id(resource)]
+            self.evictions += 1
+            if self.destroy is not None:
+                self.destroy(resource)
+
+    def key(self, resource):
+        return self.keys[id(resource)]
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            "live": len(self.resources),
+            "references": sum(self.counts.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
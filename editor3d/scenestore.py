@@ -0,0 +1,308 @@
+import numpy as np
+
+from editor3d.objects import Object3D, ObjectOperation, Sphere3D, Box3D, STL3D, OBJECT_TYPES, object_type, \
+    next_object_id, reserve_object_ids
+
+_EMPTY = frozenset()
+
+
+def _new_plain(cls):
+    return cls.__new__(cls)
+
+
+def _child_set(node):
+    # children of store rows are created lazily, leaves do not carry an empty set
+    if isinstance(node, StoredObject3D):
+        return node.store.child_set(node.row)
+    return node.children
+
+
+class StoredObject3D(Object3D):
+    # thin view on one row of a SceneStore, keeps the Object3D interface
+    __slots__ = ("store", "row")
+    store_fields = ()
+
+    @property
+    def id(self):
+        return int(self.store.ids[self.row])
+
+    @property
+    def name(self):
+        return self.store.names[self.row]
+
+    @name.setter
+    def name(self, name):
+        self.store.names[self.row] = name
+
+    @property
+    def position(self):
+        return tuple(self.store.position[self.row].tolist())
+
+    @position.setter
+    def position(self, position):
+        self.store.position[self.row] = position
+
+    @property
+    def rotation(self):
+        return tuple(self.store.rotation[self.row].tolist())
+
+    @rotation.setter
+    def rotation(self, rotation):
+        self.store.rotation[self.row] = rotation
+
+    @property
+    def color(self):
+        return "#{:06x}".format(int(self.store.colors[self.row]))
+
+    @color.setter
+    def color(self, color):
+        self.store.colors[self.row] = int(color[1:7], 16)
+
+    @property
+    def parent(self):
+        return self.store.parents[self.row]
+
+    @property
+    def children(self):
+        children = self.store.children[self.row]
+        return _EMPTY if children is None else children
+
+    def set_parent(self, parent, keep_world=False):
+        if keep_world:
+            return self._set_parent_keep_world(parent)
+        undo = ObjectOperation(self, "set_parent", self.parent, parent)
+        if self.parent is not None:
+            _child_set(self.parent).remove(self)
+        self.store.parents[self.row] = parent
+        if parent is not None:
+            _child_set(parent).add(self)
+        self.mark_changed("parent")
+        return undo
+
+    def __reduce__(self):
+        # pickled as the plain class so storage files do not depend on the store
+        state = {
+            "id": self.id, "name": self.name, "position": self.position, "rotation": self.rotation,
+            "color": self.color, "parent": self.parent, "children": set(self.children),
+        }
+        for field in self.store_fields:
+            state[field] = getattr(self, field)
+        return _new_plain, (object_type(self),), state
+
+
+class StoredSphere3D(StoredObject3D, Sphere3D):
+    __slots__ = ()
+    store_fields = ("radius",)
+
+    @property
+    def radius(self):
+        return float(self.store.dimension[self.row, 0])
+
+    @radius.setter
+    def radius(self, radius):
+        self.store.dimension[self.row, 0] = radius
+
+
+class StoredBox3D(StoredObject3D, Box3D):
+    __slots__ = ()
+    store_fields = ("width", "length", "height")
+
+    @property
+    def width(self):
+        return float(self.store.dimension[self.row, 0])
+
+    @width.setter
+    def width(self, width):
+        self.store.dimension[self.row, 0] = width
+
+    @property
+    def length(self):
+        return float(self.store.dimension[self.row, 1])
+
+    @length.setter
+    def length(self, length):
+        self.store.dimension[self.row, 1] = length
+
+    @property
+    def height(self):
+        return float(self.store.dimension[self.row, 2])
+
+    @height.setter
+    def height(self, height):
+        self.store.dimension[self.row, 2] = height
+
+
+class StoredSTL3D(StoredObject3D, STL3D):
+    __slots__ = ()
+    store_fields = ("scale", "path")
+
+    @property
+    def scale(self):
+        return float(self.store.dimension[self.row, 0])
+
+    @scale.setter
+    def scale(self, scale):
+        self.store.dimension[self.row, 0] = scale
+
+    @property
+    def path(self):
+        return self.store.paths[self.row]
+
+    @path.setter
+    def path(self, path):
+        self.store.paths[self.row] = path
+
+
+VIEW_TYPES = (StoredObject3D, StoredSphere3D, StoredBox3D, StoredSTL3D)
+TYPE_CODES = {cls: code for code, cls in enumerate(OBJECT_TYPES)}
+BASE_TYPES = dict(zip(VIEW_TYPES, OBJECT_TYPES))
+
+
+class SceneStore:
+    # per object attributes in contiguous arrays, rows of removed objects are reused
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.count = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.types = np.zeros(capacity, dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.position = np.zeros((capacity, 3))
+        self.rotation = np.zeros((capacity, 3))
+        self.dimension = np.zeros((capacity, 3))
+        self.colors = np.zeros(capacity, dtype=np.uint32)
+        self.names = []
+        self.paths = {}
+        self.parents = []
+        self.children = []
+        self.views = []
+        self.free = []
+
+    def __len__(self):
+        return self.count - len(self.free)
+
+    def _grow(self, capacity):
+        for name in ("ids", "types", "alive", "position", "rotation", "dimension", "colors"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def _allocate(self):
+        if self.free:
+            return self.free.pop()
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        row = self.count
+        self.count += 1
+        self.names.append(None)
+        self.parents.append(None)
+        self.children.append(None)
+        self.views.append(None)
+        return row
+
+    def add(self, cls, name=None, position=(0, 0, 0), rotation=(0, 0, 0), color="#dddddd", dimension=(1, 1, 1),
+            path=None, obj_id=None):
+        cls = BASE_TYPES.get(cls, cls)
+        row = self._allocate()
+        self.ids[row] = next_object_id() if obj_id is None else obj_id
+        self.types[row] = TYPE_CODES[cls]
+        self.alive[row] = True
+        self.position[row] = position
+        self.rotation[row] = rotation
+        self.dimension[row] = dimension
+        self.colors[row] = int(color[1:7], 16)
+        self.names[row] = cls.__name__.replace("3D", "") if name is None else name
+        if path is not None:
+            self.paths[row] = path
+
+        view = _new_plain(VIEW_TYPES[TYPE_CODES[cls]])
+        view.store = self
+        view.row = row
+        self.views[row] = view
+        return view
+
+    def child_set(self, row):
+        children = self.children[row]
+        if children is None:
+            children = self.children[row] = set()
+        return children
+
+    def remove(self, view):
+        # detaches the object and recycles its row, the view must not be used afterwards
+        for child in list(view.children):
+            self.remove(child)
+        view.set_parent(None)
+        row = view.row
+        self.alive[row] = False
+        self.names[row] = None
+        self.children[row] = None
+        self.views[row] = None
+        self.paths.pop(row, None)
+        self.free.append(row)
+
+    def rows(self):
+        return np.flatnonzero(self.alive[:self.count])
+
+    def add_object(self, obj):
+        # copy a plain object into the store, children are not copied
+        if isinstance(obj, Sphere3D):
+            dimension = (obj.radius, 0, 0)
+        elif isinstance(obj, Box3D):
+            dimension = (obj.width, obj.length, obj.height)
+        elif isinstance(obj, STL3D):
+            dimension = (obj.scale, 0, 0)
+        else:
+            dimension = (0, 0, 0)
+        return self.add(object_type(obj), obj.name, obj.position, obj.rotation, obj.color, dimension,
+                        getattr(obj, "path", None), obj.id)
+
+    def add_tree(self, root, store_root):
+        # copy all descendants of root below store_root, keeping the hierarchy
+        stack = [(child, store_root) for child in root.children]
+        while stack:
+            obj, parent = stack.pop()
+            view = self.add_object(obj)
+            view.set_parent(parent)
+            stack.extend((child, view) for child in obj.children)
+        return store_root
+
+    def add_snapshot(self, snapshot, store_root):
+        # bulk copy the columns of an editor3d.snapshot.Snapshot, only the views are built per row
+        count = len(snapshot)
+        start = self.count
+        if start + count > self.capacity:
+            capacity = self.capacity
+            while start + count > capacity:
+                capacity *= 2
+            self._grow(capacity)
+        end = start + count
+        columns = snapshot.columns
+        self.ids[start:end] = columns["ids"]
+        self.types[start:end] = columns["types"]
+        self.alive[start:end] = True
+        self.position[start:end] = columns["position"]
+        self.rotation[start:end] = columns["rotation"]
+        self.dimension[start:end] = columns["dimension"]
+        self.colors[start:end] = columns["colors"] >> 8
+        self.count = end
+
+        for row in range(count):
+            self.names.append(snapshot.name(row))
+            self.children.append(None)
+            path = snapshot._string("path", row)
+            if path:
+                self.paths[start + row] = path
+        view_types = [VIEW_TYPES[code] for code in columns["types"].tolist()]
+        for row, cls in enumerate(view_types):
+            view = _new_plain(cls)
+            view.store = self
+            view.row = start + row
+            self.views.append(view)
+        self.parents.extend([None] * count)
+        for row, parent in enumerate(columns["parents"].tolist()):
+            parent = store_root if parent < 0 else self.views[start + parent]
+            self.parents[start + row] = parent
+            _child_set(parent).add(self.views[start + row])
+        reserve_object_ids(int(self.ids[:end].max(initial=0)))
+        return store_root
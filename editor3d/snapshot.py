@@ -0,0 +1,221 @@
+import os
+import struct
+
+import numpy as np
+
+from editor3d.objects import Sphere3D, Box3D, STL3D, OBJECT_TYPES, object_type, reserve_object_ids
+from editor3d.storage import Storage
+
+MAGIC = b"E3DSNAP\0"
+VERSION = 1
+
+TYPE_CODES = {cls: code for code, cls in enumerate(OBJECT_TYPES)}
+
+# name, dtype, values per row, the offset tables have one extra row
+COLUMNS = (
+    ("ids", np.int64, 1),
+    ("parents", np.int64, 1),
+    ("child_start", np.int64, 1),
+    ("types", np.uint8, 1),
+    ("position", np.float32, 3),
+    ("rotation", np.float32, 3),
+    ("dimension", np.float32, 3),
+    ("colors", np.uint32, 1),
+    ("name_offsets", np.int64, 1),
+    ("names", np.uint8, 1),
+    ("path_offsets", np.int64, 1),
+    ("paths", np.uint8, 1),
+)
+
+# magic, version, object count, top level count, then offset and length per column
+HEADER = struct.Struct("<8sIQQ" + "QQ" * len(COLUMNS))
+ALIGNMENT = 64
+
+
+def pack_color(color):
+    return (int(color[1:7], 16) << 8) | 0xff
+
+
+def unpack_color(rgba):
+    return "#{:06x}".format(rgba >> 8)
+
+
+def _dimension(obj):
+    if isinstance(obj, Sphere3D):
+        return obj.radius, 0, 0
+    if isinstance(obj, Box3D):
+        return obj.width, obj.length, obj.height
+    if isinstance(obj, STL3D):
+        return obj.scale, 0, 0
+    return 0, 0, 0
+
+
+def _string_table(strings):
+    encoded = [_.encode("utf-8") for _ in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(_) for _ in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def build_columns(root):
+    # breadth first order keeps all children of one parent next to each other
+    order = list(root.children)
+    child_start = []
+    index = 0
+    while index < len(order):
+        child_start.append(len(order))
+        order.extend(order[index].children)
+        index += 1
+    child_start.append(len(order))
+
+    count = len(order)
+    rows = {obj: row for row, obj in enumerate(order)}
+    columns = {
+        "ids": np.fromiter((obj.id for obj in order), dtype=np.int64, count=count),
+        "parents": np.fromiter((rows[obj.parent] if obj.parent in rows else -1 for obj in order),
+                               dtype=np.int64, count=count),
+        "child_start": np.array(child_start, dtype=np.int64),
+        "types": np.fromiter((TYPE_CODES[object_type(obj)] for obj in order), dtype=np.uint8, count=count),
+        "position": np.array([obj.position for obj in order], dtype=np.float32).reshape(count, 3),
+        "rotation": np.array([obj.rotation for obj in order], dtype=np.float32).reshape(count, 3),
+        "dimension": np.array([_dimension(obj) for obj in order], dtype=np.float32).reshape(count, 3),
+        "colors": np.fromiter((pack_color(obj.color) for obj in order), dtype=np.uint32, count=count),
+    }
+    columns["name_offsets"], columns["names"] = _string_table(obj.name for obj in order)
+    columns["path_offsets"], columns["paths"] = _string_table(getattr(obj, "path", "") for obj in order)
+    return columns, len(root.children)
+
+
+def write_snapshot(filename, columns, top_count):
+    count = len(columns["ids"])
+    layout = []
+    offset = HEADER.size
+    for name, dtype, _ in COLUMNS:
+        offset = (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        data = np.ascontiguousarray(columns[name], dtype=dtype)
+        layout.append((offset, data))
+        offset += data.nbytes
+
+    tmp = filename + ".tmp"
+    with open(tmp, "wb") as file:
+        table = []
+        for column_offset, data in layout:
+            table += [column_offset, data.nbytes]
+        file.write(HEADER.pack(MAGIC, VERSION, count, top_count, *table))
+        for column_offset, data in layout:
+            file.seek(column_offset)
+            file.write(data.tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, filename)
+    # bytes written, the header and the columns without their alignment padding
+    return HEADER.size + sum(data.nbytes for _, data in layout)
+
+
+class Snapshot:
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as file:
+            header = HEADER.unpack(file.read(HEADER.size))
+        magic, version, self.count, self.top_count = header[:4]
+        if magic != MAGIC:
+            raise ValueError("Not a scene snapshot: {}".format(filename))
+        if version != VERSION:
+            raise ValueError("Unsupported snapshot version {}".format(version))
+
+        self.columns = {}
+        table = header[4:]
+        for index, (name, dtype, width) in enumerate(COLUMNS):
+            offset, nbytes = table[2 * index], table[2 * index + 1]
+            items = nbytes // np.dtype(dtype).itemsize
+            if items == 0:
+                self.columns[name] = np.zeros(0, dtype=dtype)
+                continue
+            shape = (items // width, width) if width > 1 else (items,)
+            self.columns[name] = np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape)
+        self.materialized = {}
+
+    def __len__(self):
+        return self.count
+
+    def top_level_rows(self):
+        return range(self.top_count)
+
+    def child_rows(self, row):
+        start = self.columns["child_start"]
+        return range(int(start[row]), int(start[row + 1]))
+
+    def _string(self, table, row):
+        offsets = self.columns[table + "_offsets"]
+        return bytes(self.columns[table + "s"][offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def name(self, row):
+        return self._string("name", row)
+
+    def materialize(self, row):
+        # build the object for one row, its parent and children are linked by load_tree
+        obj = self.materialized.get(row)
+        if obj is None:
+            obj = self._build(row, self.name(row), self.columns["types"][row], self.columns["ids"][row],
+                              self.columns["position"][row].tolist(), self.columns["rotation"][row].tolist(),
+                              self.columns["dimension"][row].tolist(), self.columns["colors"][row])
+        return obj
+
+    def _build(self, row, name, type_code, obj_id, position, rotation, dimension, color):
+        cls = OBJECT_TYPES[type_code]
+        obj = cls.__new__(cls)
+        obj.id = int(obj_id)
+        obj.name = name
+        obj.position = tuple(position)
+        obj.rotation = tuple(rotation)
+        obj.color = unpack_color(int(color))
+        obj.parent = None
+        obj.children = set()
+        if cls is Sphere3D:
+            obj.radius = dimension[0]
+        elif cls is Box3D:
+            obj.width, obj.length, obj.height = dimension
+        elif cls is STL3D:
+            obj.scale = dimension[0]
+            obj.path = self._string("path", row)
+        self.materialized[row] = obj
+        return obj
+
+    def load_tree(self, root):
+        # converting whole columns at once is much faster than indexing the memmap per row
+        names = bytes(self.columns["names"])
+        offsets = self.columns["name_offsets"].tolist()
+        names = [names[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        columns = zip(range(self.count), names, self.columns["types"].tolist(), self.columns["ids"].tolist(),
+                      self.columns["position"].tolist(), self.columns["rotation"].tolist(),
+                      self.columns["dimension"].tolist(), self.columns["colors"].tolist())
+        objects = [self.materialized.get(row) or self._build(row, *values) for row, *values in columns]
+        for obj, parent in zip(objects, self.columns["parents"].tolist()):
+            obj.parent = root if parent < 0 else objects[parent]
+            obj.parent.children.add(obj)
+        return root
+
+
+class SnapshotStorage(Storage):
+    # columnar snapshot next to the pickle path, the tree is only built when requested
+    def _load(self):
+        self.snapshot = None
+        self.loaded = False
+        try:
+            self.snapshot = Snapshot(self.filename)
+        except FileNotFoundError:
+            self.loaded = True
+
+    def get_root(self):
+        if not self.loaded:
+            self.snapshot.load_tree(self.root)
+            reserve_object_ids(int(self.snapshot.columns["ids"].max(initial=0)))
+            self.loaded = True
+        return self.root
+
+    def _snapshot(self):
+        return build_columns(self.get_root())
+
+    def _write(self, data):
+        columns, top_count = data
+        self.last_bytes = write_snapshot(self.filename, columns, top_count)
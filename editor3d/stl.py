@@ -0,0 +1,180 @@
+import mmap
+import os
+import re
+import struct
+
+import numpy as np
+
+HEADER_SIZE = 80
+# one binary facet: normal, three corners and the attribute byte count, 50 bytes without padding
+TRIANGLE = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+# triangles handled per step, bounds the temporaries of the normal computation
+CHUNK = 1 << 20
+VERTEX = re.compile(rb"^[ \t]*vertex[ \t]+(\S+)[ \t]+(\S+)[ \t]+(\S+)", re.MULTILINE)
+
+
+class Mesh:
+    # interleaved position and normal per vertex, indices is None for a plain triangle list
+    def __init__(self, data, indices=None):
+        self.data = data
+        self.indices = indices
+
+    @property
+    def vertices(self):
+        return self.data[:, :3]
+
+    @property
+    def normals(self):
+        return self.data[:, 3:]
+
+    @property
+    def vertex_count(self):
+        return len(self.data)
+
+    @property
+    def triangle_count(self):
+        return (len(self.data) if self.indices is None else len(self.indices)) // 3
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (0 if self.indices is None else self.indices.nbytes)
+
+    def triangles(self):
+        # corners of every triangle as (triangle_count, 3, 3)
+        vertices = self.vertices if self.indices is None else self.vertices[self.indices]
+        return vertices.reshape(-1, 3, 3)
+
+    def bounds(self):
+        if not len(self.data):
+            return np.zeros(3, dtype=np.float32), np.zeros(3, dtype=np.float32)
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+
+def mesh_buffer(shape, dtype=np.float32):
+    # numpy view on a bytearray, Qt takes the bytearray without another intermediate copy
+    count = int(np.prod(shape))
+    return np.frombuffer(bytearray(count * np.dtype(dtype).itemsize), dtype=dtype).reshape(shape)
+
+
+def is_binary(path):
+    size = os.path.getsize(path)
+    if size < HEADER_SIZE + 4:
+        return False
+    with open(path, "rb") as file:
+        header = file.read(HEADER_SIZE + 4)
+    (count,) = struct.unpack_from("<I", header, HEADER_SIZE)
+    # binary files may start with "solid" as well, the size is the reliable check
+    if size == HEADER_SIZE + 4 + count * TRIANGLE.itemsize:
+        return True
+    if header.lstrip().startswith(b"solid"):
+        return False
+    raise ValueError("Not an STL file: {}".format(path))
+
+
+def read_binary(path):
+    # the returned (n, 3, 3) corners are a view on the mapped file, nothing is read up front
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    (count,) = struct.unpack_from("<I", data, HEADER_SIZE)
+    if len(data) < HEADER_SIZE + 4 + count * TRIANGLE.itemsize:
+        raise ValueError("Truncated STL file: {}".format(path))
+    triangles = np.frombuffer(data, dtype=TRIANGLE, count=count, offset=HEADER_SIZE + 4)
+    return triangles["vertices"]
+
+
+def read_ascii(path, block_size=1 << 22):
+    # streamed in blocks, only the coordinates of vertex lines are kept
+    chunks = []
+    tail = b""
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(block_size)
+            text = tail + block
+            cut = len(text) if not block else text.rfind(b"\n") + 1
+            text, tail = text[:cut], text[cut:]
+            values = VERTEX.findall(text)
+            if values:
+                chunks.append(np.array(values).astype(np.float32))
+            if not block:
+                break
+    if not chunks:
+        return np.zeros((0, 3, 3), dtype=np.float32)
+    vertices = np.concatenate(chunks)
+    if len(vertices) % 3:
+        raise ValueError("Incomplete facet in {}".format(path))
+    return vertices.reshape(-1, 3, 3)
+
+
+def read_triangles(path):
+    return read_binary(path) if is_binary(path) else read_ascii(path)
+
+
+def face_normals(triangles, normalize=True):
+    # triangles is (n, 3, 3), the unnormalized cross product is weighted by the triangle area
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    if normalize:
+        length = np.linalg.norm(normals, axis=1, keepdims=True)
+        np.divide(normals, length, out=normals, where=length > 0)
+    return normals
+
+
+def triangle_mesh(triangles):
+    # one vertex per corner with the flat normal of its triangle
+    count = len(triangles)
+    data = mesh_buffer((count, 3, 6))
+    for start in range(0, count, CHUNK):
+        chunk = triangles[start:start + CHUNK]
+        data[start:start + CHUNK, :, :3] = chunk
+        data[start:start + CHUNK, :, 3:] = face_normals(chunk)[:, None, :]
+    return Mesh(data.reshape(-1, 6))
+
+
+def smooth_normals(data, indices):
+    # area weighted normal of the triangles around each vertex, written into data[:, 3:]
+    positions = data[:, :3]
+    normals = data[:, 3:]
+    normals[:] = 0
+    for start in range(0, len(indices), 3 * CHUNK):
+        corners = indices[start:start + 3 * CHUNK]
+        faces = face_normals(positions[corners].reshape(-1, 3, 3), normalize=False)
+        for axis in range(3):
+            normals[:, axis] += np.bincount(corners, weights=np.repeat(faces[:, axis], 3), minlength=len(data))
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, length, out=normals, where=length > 0)
+
+
+def welded_mesh(triangles):
+    # corners with identical coordinates become one vertex with an area weighted smooth normal
+    count = len(triangles)
+    corners = np.empty((count * 3, 3), dtype=np.float32)
+    corners.reshape(count, 3, 3)[:] = triangles
+    # -0.0 and 0.0 have different bytes but are the same position
+    corners += 0.0
+    keys = corners.view(np.dtype((np.void, 12))).ravel()
+    unique, indices = np.unique(keys, return_inverse=True)
+    del corners, keys
+
+    data = mesh_buffer((len(unique), 6))
+    data[:, :3] = unique.view(np.float32).reshape(-1, 3)
+    indices = indices.astype(np.uint32).ravel()
+    smooth_normals(data, indices)
+
+    index_buffer = mesh_buffer(len(indices), np.uint32)
+    index_buffer[:] = indices
+    return Mesh(data, index_buffer)
+
+
+def load_stl(path, weld=False):
+    triangles = read_triangles(path)
+    return welded_mesh(triangles) if weld else triangle_mesh(triangles)
+
+
+def write_binary(path, triangles, header=b""):
+    triangles = np.asarray(triangles, dtype=np.float32).reshape(-1, 3, 3)
+    facets = np.zeros(len(triangles), dtype=TRIANGLE)
+    facets["vertices"] = triangles
+    facets["normal"] = face_normals(triangles)
+    with open(path, "wb") as file:
+        file.write(header[:HEADER_SIZE].ljust(HEADER_SIZE, b"\0"))
+        file.write(struct.pack("<I", len(facets)))
+        file.write(facets.tobytes())
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from editor3d.lod import RESOLUTIONS, build_levels
+from editor3d.stl import Mesh, load_stl, mesh_buffer
+
+
+def _share(levels):
+    # all levels in one block, data then indices per level, the layout tells the receiver where they are
+    layout = [(mesh.vertex_count, -1 if mesh.indices is None else len(mesh.indices)) for mesh in levels]
+    size = sum(mesh.nbytes for mesh in levels)
+    memory = SharedMemory(create=True, size=max(size, 1))
+    if sys.version_info < (3, 13):
+        # the receiver unlinks the block, the tracker of this worker must not remove it when the worker exits
+        resource_tracker.unregister(memory._name, "shared_memory")
+    offset = 0
+    for mesh in levels:
+        for array in (mesh.data, mesh.indices):
+            if array is None:
+                continue
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf, offset=offset)
+            view[:] = array
+            offset += array.nbytes
+            del view
+    memory.close()
+    return memory.name, layout
+
+
+def process_file(path, weld=True, resolutions=RESOLUTIONS):
+    # runs in a worker process, only the name and layout of the shared block travel back
+    levels, _ = build_levels(load_stl(path, weld=weld), resolutions)
+    return _share(levels)
+
+
+def receive(name, layout):
+    # copies the levels into bytearray backed meshes for Qt and frees the shared block
+    memory = SharedMemory(name=name)
+    try:
+        levels = []
+        offset = 0
+        for vertices, indices in layout:
+            data = mesh_buffer((vertices, 6))
+            view = np.ndarray(data.shape, dtype=np.float32, buffer=memory.buf, offset=offset)
+            data[:] = view
+            offset += data.nbytes
+            index_buffer = None
+            if indices >= 0:
+                index_buffer = mesh_buffer(indices, np.uint32)
+                view = np.ndarray(indices, dtype=np.uint32, buffer=memory.buf, offset=offset)
+                index_buffer[:] = view
+                offset += index_buffer.nbytes
+            del view
+            levels.append(Mesh(data, index_buffer))
+        return levels
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def release(name):
+    memory = SharedMemory(name=name)
+    memory.close()
+    memory.unlink()
+
+
+class ParallelImport:
+    # parses, welds and simplifies STL files in worker processes, poll hands out finished files
+    def __init__(self, paths, workers=None, weld=True, resolutions=RESOLUTIONS):
+        self.total = len(paths)
+        self.completed = 0
+        self.cancelled = False
+        # spawn works the same on every platform and does not fork the threads of a running Qt application
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        self.futures = {self.executor.submit(process_file, path, weld, resolutions): path for path in paths}
+
+    @property
+    def finished(self):
+        return not self.futures
+
+    def progress(self):
+        return self.completed, self.total
+
+    def _result(self, future):
+        path = self.futures.pop(future)
+        self.completed += 1
+        if future.cancelled():
+            return None
+        error = future.exception()
+        if error is not None:
+            return path, error
+        name, layout = future.result()
+        if self.cancelled:
+            release(name)
+            return None
+        return path, receive(name, layout)
+
+    def poll(self):
+        # (path, levels or exception) of every file finished since the last call, never blocks
+        results = [self._result(future) for future in [_ for _ in self.futures if _.done()]]
+        if self.finished:
+            self.executor.shutdown(wait=False)
+        return [_ for _ in results if _ is not None]
+
+    def results(self):
+        # blocking variant of poll, yields files in the order they finish
+        for future in as_completed(list(self.futures)):
+            result = self._result(future)
+            if result is not None:
+                yield result
+        self.executor.shutdown()
+
+    def cancel(self):
+        # queued files are dropped, files already being processed are freed once they arrive
+        self.cancelled = True
+        for future in self.futures:
+            future.cancel()
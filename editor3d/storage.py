@@ -1,25 +1,317 @@
+import os
 import pickle
+import sqlite3
+import threading
+import time
+
+from editor3d.objects import OBJECT_TYPES, object_type, walk, reserve_object_ids
+
+
+# classes that moved, older files still name their former module
+MOVED_CLASSES = {
+    ("editor3d.manager", "ObjectRoot"): ("editor3d.objects", "ObjectRoot"),
+}
+
+
+class SceneUnpickler(pickle.Unpickler):
+    # loads files written before the move without importing the Qt modules of the old location
+    def find_class(self, module, name):
+        module, name = MOVED_CLASSES.get((module, name), (module, name))
+        return super().find_class(module, name)
 
 
 class Storage:
-    def __init__(self, filename, root_object):
+    def __init__(self, filename, root_object, delay=5.0):
         self.filename = filename
         self.root = root_object
+        # quiet window in seconds, changes within the window are merged into one write
+        self.delay = delay
+
+        self.timer = None
+        self.timer_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        # incremented on every scheduled change, used to detect edits during serialization
+        self.generation = 0
+        self.written_generation = 0
+        self.pending = 0
+
+        self.writes = 0
+        self.merged = 0
+        # bytes that went to disk with the last write
+        self.last_bytes = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+
+        self._load()
+
+    def _load(self):
         try:
             with open(self.filename, 'rb') as file:
-                self.root = pickle.load(file)
+                self.root = SceneUnpickler(file).load()
         except FileNotFoundError:
             pass
         except EOFError:
             print("Database corrupted.")
+        reserve_object_ids(max((obj.id for obj in walk(self.root)), default=0))
 
     def get_root(self):
         return self.root
 
+    def mark_changed(self, obj):
+        # the pickle backend always writes the whole tree
+        pass
+
+    def mark_deleted(self, obj):
+        pass
+
     def schedule_store(self):
-        # Todo: Scheduler to wait for 5s for further changes before storing
+        with self.timer_lock:
+            self.generation += 1
+            self.pending += 1
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.delay, self._scheduled_store)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        with self.timer_lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            dirty = self._has_changes()
+        if dirty:
+            self.store()
+
+    def stats(self):
+        return {
+            "writes": self.writes,
+            "merged": self.merged,
+            "last_duration": self.last_duration,
+            "last_bytes": self.last_bytes,
+            "total_duration": self.total_duration,
+        }
+
+    def _has_changes(self):
+        return self.generation != self.written_generation
+
+    def _scheduled_store(self):
+        with self.timer_lock:
+            self.timer = None
+        self.store(retry=True)
+
+    def _snapshot(self):
+        return pickle.dumps(self.root, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _discard(self, data):
+        pass
+
+    def _write(self, data):
+        tmp = self.filename + ".tmp"
+        with open(tmp, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.filename)
+        self.last_bytes = len(data)
+
+    def store(self, retry=False):
+        with self.write_lock:
+            start = time.perf_counter()
+            with self.timer_lock:
+                generation = self.generation
+                pending = self.pending
+            try:
+                data = self._snapshot()
+            except RuntimeError:
+                # tree changed while being serialized, the change scheduled a new store
+                if retry:
+                    return
+                raise
+            if retry and generation != self.generation:
+                # edits happened during serialization, the snapshot might be torn,
+                # a newer store is already scheduled and will pick them up
+                self._discard(data)
+                return
+            try:
+                self._write(data)
+            except (OSError, sqlite3.Error) as error:
+                # the changes go back to be written by the next store, e.g. once the database is unlocked
+                self._discard(data)
+                if retry:
+                    # the autosave timer thread, there is no caller to report to
+                    print("Could not write {}: {}".format(self.filename, error))
+                    return
+                raise
+
+            duration = time.perf_counter() - start
+            with self.timer_lock:
+                self.written_generation = generation
+                self.pending -= pending
+                if pending > 1:
+                    self.merged += pending - 1
+            self.writes += 1
+            self.last_duration = duration
+            self.total_duration += duration
+
+
+TYPE_NAMES = {cls.__name__: cls for cls in OBJECT_TYPES}
+
+SHAPE_FIELDS = ("radius", "width", "length", "height", "scale", "path")
+
+COLUMNS = ("id", "parent", "type", "name", "px", "py", "pz", "rx", "ry", "rz", "color") + SHAPE_FIELDS
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+
+def object_row(obj, root):
+    parent = None if obj.parent is root or obj.parent is None else obj.parent.id
+    x, y, z = obj.position
+    a, b, c = obj.rotation
+    return (obj.id, parent, object_type(obj).__name__, obj.name, x, y, z, a, b, c, obj.color) + \
+        tuple(getattr(obj, field, None) for field in SHAPE_FIELDS)
+
+
+def row_object(row):
+    cls = TYPE_NAMES[row[2]]
+    obj = cls.__new__(cls)
+    obj.id = row[0]
+    obj.name = row[3]
+    obj.position = (row[4], row[5], row[6])
+    obj.rotation = (row[7], row[8], row[9])
+    obj.color = row[10]
+    obj.parent = None
+    obj.children = set()
+    for field, value in zip(SHAPE_FIELDS, row[11:]):
+        if value is not None:
+            setattr(obj, field, value)
+    return obj
+
+
+class SQLiteStorage(Storage):
+    # one row per object, only objects changed since the last write are stored again
+    def __init__(self, filename, root_object, delay=5.0):
+        self.changed = {}
+        self.deleted = set()
+        self.connection = None
+        super().__init__(filename, root_object, delay)
+
+    def _is_pickle(self):
+        try:
+            with open(self.filename, 'rb') as file:
+                header = file.read(len(SQLITE_HEADER))
+        except FileNotFoundError:
+            return False
+        return len(header) > 0 and header != SQLITE_HEADER
+
+    def _connect(self):
+        self.connection = sqlite3.connect(self.filename, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "id INTEGER PRIMARY KEY, parent INTEGER, type TEXT NOT NULL, name TEXT, "
+            "px REAL, py REAL, pz REAL, rx REAL, ry REAL, rz REAL, color TEXT, "
+            "radius REAL, width REAL, length REAL, height REAL, scale REAL, path TEXT)")
+        self.connection.commit()
+
+    def _load(self):
+        if self._is_pickle():
+            self._migrate()
+            return
+        self._connect()
+
+        rows = self.connection.execute("SELECT {} FROM objects".format(", ".join(COLUMNS))).fetchall()
+        objects = {row[0]: row_object(row) for row in rows}
+        for row in rows:
+            obj = objects[row[0]]
+            # objects with a missing parent row stay reachable at the top level
+            parent = self.root if row[1] is None else objects.get(row[1], self.root)
+            obj.parent = parent
+            parent.children.add(obj)
+        reserve_object_ids(max(objects, default=0))
+
+    def _migrate(self):
+        # convert an old pickle database in place, the original is kept as backup
+        Storage._load(self)
+        os.replace(self.filename, self.filename + ".pickle.bak")
+        self._connect()
+        for obj in walk(self.root):
+            self.changed[obj.id] = obj
         self.store()
 
-    def store(self):
-        with open(self.filename, 'wb') as file:
-            pickle.dump(self.root, file)
+    def _attached(self, obj):
+        while obj is not None:
+            if obj is self.root:
+                return True
+            obj = obj.parent
+        return False
+
+    def mark_changed(self, obj):
+        with self.timer_lock:
+            if obj.id in self.deleted:
+                # a late change of a deleted object, e.g. a queued sync, must not bring its row back,
+                # only an object that is in the scene again replaces the tombstone
+                if not self._attached(obj):
+                    return
+                self.deleted.discard(obj.id)
+            self.changed[obj.id] = obj
+
+    def mark_deleted(self, obj):
+        with self.timer_lock:
+            for node in [obj, *walk(obj)]:
+                self.changed.pop(node.id, None)
+                self.deleted.add(node.id)
+
+    def _has_changes(self):
+        return bool(self.changed or self.deleted) or super()._has_changes()
+
+    def _snapshot(self):
+        with self.timer_lock:
+            changed, self.changed = self.changed, {}
+            deleted, self.deleted = self.deleted, set()
+        rows = [object_row(obj, self.root) for obj in changed.values()]
+        return changed, deleted, rows
+
+    def _discard(self, data):
+        changed, deleted, _ = data
+        with self.timer_lock:
+            for obj_id in deleted:
+                if obj_id not in self.changed:
+                    self.deleted.add(obj_id)
+            for obj_id, obj in changed.items():
+                if obj_id not in self.deleted:
+                    self.changed.setdefault(obj_id, obj)
+
+    def _wal_size(self):
+        try:
+            return os.path.getsize(self.filename + "-wal")
+        except OSError:
+            return 0
+
+    def _write(self, data):
+        _, deleted, rows = data
+        before = self._wal_size()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO objects ({}) VALUES ({})".format(
+                    ", ".join(COLUMNS), ", ".join("?" * len(COLUMNS))),
+                rows)
+            self.connection.executemany("DELETE FROM objects WHERE id = ?", [(_,) for _ in deleted])
+        # pages appended to the write ahead log, a checkpoint starts the log over
+        after = self._wal_size()
+        self.last_bytes = after - before if after >= before else after
+
+    def write_rows(self, rows):
+        # rows straight into the table in one transaction, for imports that never build the tree,
+        # rows may be any iterable and are consumed one at a time, returns the number of rows
+        with self.connection:
+            cursor = self.connection.executemany(
+                "INSERT OR REPLACE INTO objects ({}) VALUES ({})".format(
+                    ", ".join(COLUMNS), ", ".join("?" * len(COLUMNS))),
+                rows)
+        return cursor.rowcount
+
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+
+# rings and slices of the shared sphere meshes, finest first, every sphere uses one of them
+SPHERE_LEVELS = ((48, 48), (32, 32), (20, 20), (12, 12), (8, 8), (4, 6))
+# the mesh every sphere used before, the reference for the triangle counters and new spheres
+FIXED_LEVEL = SPHERE_LEVELS.index((20, 20))
+# pixels of the projected outline per slice, more slices do not change the silhouette visibly
+PIXELS_PER_SLICE = 6.0
+# a level changes only once the projected size is this far past the point where it switches
+HYSTERESIS = 0.25
+
+BUDGET_VARIABLE = "EDITOR3D_TRIANGLE_BUDGET"
+DEFAULT_BUDGET = 2000000
+
+
+def sphere_triangles(rings, slices):
+    # QSphereMesh: two triangles per quad between rings, one per slice in each cap
+    return 2 * slices * (rings - 1)
+
+
+def triangle_budget(default=DEFAULT_BUDGET):
+    # triangles of all spheres together, 0 disables the budget
+    value = os.environ.get(BUDGET_VARIABLE)
+    return int(value) if value else default
+
+
+def projected_diameters(centers, radii, eye, focal, planes=None):
+    # diameter in pixels of spheres seen from eye, focal is the viewport height / (2 tan(fov / 2)),
+    # spheres completely outside the frustum planes are 0
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    radii = np.asarray(radii, dtype=np.float64)
+    distances = np.linalg.norm(centers - np.asarray(eye, dtype=np.float64), axis=1)
+    # a camera inside a sphere sees it fill the view
+    sizes = 2 * radii * focal / np.maximum(distances, np.maximum(radii, 1e-9))
+    if planes is not None:
+        outside = (centers @ planes[:, :3].T + planes[:, 3] < -radii[:, None]).any(axis=1)
+        sizes[outside] = 0.0
+    return sizes
+
+
+class TessellationPolicy:
+    # picks a level of levels per sphere from its projected size, all spheres together stay within budget
+    def __init__(self, levels=SPHERE_LEVELS, budget=DEFAULT_BUDGET, pixels_per_slice=PIXELS_PER_SLICE,
+                 hysteresis=HYSTERESIS):
+        self.levels = tuple(levels)
+        self.budget = budget
+        self.pixels_per_slice = pixels_per_slice
+        self.hysteresis = hysteresis
+        self.triangles = np.array([sphere_triangles(*_) for _ in self.levels], dtype=np.int64)
+        # slices coarsest first for the level comparisons
+        self.slices = np.array([slices for _, slices in reversed(self.levels)], dtype=np.float64)
+        # factor applied to all sizes by the last choose to meet the budget, 1 if it was not needed
+        self.bias = 1.0
+
+    def _level(self, needed):
+        # one comparison per level is much faster than a search for a handful of levels
+        coarse = np.zeros(len(needed), dtype=np.int8)
+        for slices in self.slices[:-1]:
+            coarse += needed > slices
+        return len(self.levels) - 1 - coarse.astype(np.int64)
+
+    def level_of(self, sizes):
+        # the coarsest level with enough slices for the projected outline, the finest if none has
+        return self._level(np.pi * np.asarray(sizes, dtype=np.float64) / self.pixels_per_slice)
+
+    def _bounds(self, current):
+        # the current level stays while the needed slices are within these bounds, new spheres have none
+        slices = np.array([slices for _, slices in self.levels] + [-np.inf], dtype=np.float64)
+        upper = np.where(current < 0, -np.inf, slices[current] * (1 + self.hysteresis))
+        lower = slices[np.where(current < 0, -1, current + 1)] / (1 + self.hysteresis)
+        return upper, lower
+
+    def _hold(self, needed, current, upper, lower):
+        keep = (needed <= upper) & (needed > lower)
+        return np.where(keep, current, self._level(needed))
+
+    def total(self, levels):
+        return int(self.triangles[levels].sum())
+
+    def choose(self, sizes, current=None):
+        # current are the levels in use, -1 for spheres without one
+        needed = np.pi * np.asarray(sizes, dtype=np.float64) / self.pixels_per_slice
+        current = np.full(len(needed), -1) if current is None else np.asarray(current, dtype=np.int64)
+        upper, lower = self._bounds(current)
+        levels = self._hold(needed, current, upper, lower)
+        self.bias = 1.0
+        if not self.budget or self.total(levels) <= self.budget:
+            return levels
+        # all sizes shrink by the same factor until the scene fits, near spheres keep more detail than far ones
+        low, high = 0.0, 1.0
+        for _ in range(12):
+            bias = (low + high) / 2
+            if self.total(self._hold(needed * bias, current, upper, lower)) <= self.budget:
+                low = bias
+            else:
+                high = bias
+        self.bias = low
+        return self._hold(needed * low, current, upper, lower)
@@ -0,0 +1,223 @@
+import numpy as np
+
+
+def _subtree(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children)
+
+
+def euler_quaternions(angles):
+    # (n, 3) pitch, yaw, roll in degrees to (n, 4) w, x, y, z, same convention as QQuaternion.fromEulerAngles
+    half = np.radians(np.asarray(angles, dtype=np.float64).reshape(-1, 3)) * 0.5
+    c3, c1, c2 = np.cos(half).T
+    s3, s1, s2 = np.sin(half).T
+    c1c2 = c1 * c2
+    s1s2 = s1 * s2
+    return np.stack([
+        c1c2 * c3 + s1s2 * s3,
+        c1c2 * s3 + s1s2 * c3,
+        s1 * c2 * c3 - c1 * s2 * s3,
+        c1 * s2 * c3 - s1 * c2 * s3,
+    ], axis=1)
+
+
+def quaternion_matrices(quaternions):
+    w, x, y, z = np.asarray(quaternions, dtype=np.float64).T
+    matrices = np.empty((len(w), 3, 3))
+    matrices[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    matrices[:, 0, 1] = 2 * (x * y - w * z)
+    matrices[:, 0, 2] = 2 * (x * z + w * y)
+    matrices[:, 1, 0] = 2 * (x * y + w * z)
+    matrices[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    matrices[:, 1, 2] = 2 * (y * z - w * x)
+    matrices[:, 2, 0] = 2 * (x * z - w * y)
+    matrices[:, 2, 1] = 2 * (y * z + w * x)
+    matrices[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return matrices
+
+
+def local_matrices(translation, rotation, scale):
+    # translation * rotation * scale like Qt3DCore.QTransform
+    translation = np.asarray(translation, dtype=np.float64).reshape(-1, 3)
+    matrices = np.zeros((len(translation), 4, 4))
+    matrices[:, :3, :3] = quaternion_matrices(euler_quaternions(rotation)) * \
+        np.asarray(scale, dtype=np.float64).reshape(-1, 1, 1)
+    matrices[:, :3, 3] = translation
+    matrices[:, 3, 3] = 1
+    return matrices
+
+
+def pose(obj):
+    # roots and other nodes without a pose are the identity
+    return getattr(obj, "position", (0, 0, 0)), getattr(obj, "rotation", (0, 0, 0)), getattr(obj, "scale", 1.0)
+
+
+def world_matrix(obj):
+    # single object, walks up the parent chain, see TransformTree for whole scenes
+    matrix = np.identity(4)
+    while obj is not None:
+        matrix = local_matrices(*pose(obj))[0] @ matrix
+        obj = getattr(obj, "parent", None)
+    return matrix
+
+
+def decompose(matrix):
+    # position, euler angles in degrees like QQuaternion.toEulerAngles and uniform scale of a 4x4 matrix
+    matrix = np.asarray(matrix, dtype=np.float64)
+    linear = matrix[:3, :3]
+    scale = float(np.linalg.norm(linear, axis=0).mean())
+    rotation = linear / scale if scale else np.identity(3)
+    pitch = np.arcsin(np.clip(-rotation[1, 2], -1.0, 1.0))
+    if abs(rotation[1, 2]) < 1 - 1e-9:
+        yaw = np.arctan2(rotation[0, 2], rotation[2, 2])
+        roll = np.arctan2(rotation[1, 0], rotation[1, 1])
+    else:
+        # gimbal lock, the roll is folded into the yaw
+        yaw = np.arctan2(-rotation[2, 0], rotation[0, 0])
+        roll = 0.0
+    position = tuple(float(_) for _ in matrix[:3, 3])
+    return position, tuple(float(np.degrees(_)) for _ in (pitch, yaw, roll)), scale
+
+
+def relative_pose(obj, parent):
+    # local pose below parent that keeps the current world pose of obj
+    local = np.linalg.inv(world_matrix(parent)) @ world_matrix(obj)
+    return decompose(local)
+
+
+class TransformTree:
+    # world matrices of all objects below root, dirty rows and their subtrees are recomputed depth by depth
+    def __init__(self, root, capacity=1024):
+        self.root = root
+        self.capacity = capacity
+        self.count = 0
+        self.rows = {}
+        self.objects = []
+        self.free = []
+        self.parents = np.full(capacity, -1, dtype=np.int64)
+        self.depths = np.zeros(capacity, dtype=np.int64)
+        self.local = np.tile(np.identity(4), (capacity, 1, 1))
+        self.world = np.tile(np.identity(4), (capacity, 1, 1))
+        self.dirty = set()
+
+        self.updates = 0
+        self.updated_rows = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, obj):
+        return obj in self.rows
+
+    def _grow(self, capacity):
+        for name in ("parents", "depths", "local", "world"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def _allocate(self, count):
+        rows = [self.free.pop() for _ in range(min(count, len(self.free)))]
+        missing = count - len(rows)
+        if self.count + missing > self.capacity:
+            capacity = self.capacity
+            while self.count + missing > capacity:
+                capacity *= 2
+            self._grow(capacity)
+        rows.extend(range(self.count, self.count + missing))
+        self.objects.extend([None] * missing)
+        self.count += missing
+        return np.array(rows, dtype=np.int64)
+
+    def _link(self, rows, objs):
+        # parents before children, so every parent depth is final when its children are linked
+        for row, obj in zip(rows, objs):
+            parent = self.rows.get(obj.parent, -1)
+            self.parents[row] = parent
+            self.depths[row] = self.depths[parent] + 1 if parent >= 0 else 0
+
+    def add_many(self, objs):
+        # objs must list parents before their children
+        objs = list(objs)
+        rows = self._allocate(len(objs))
+        for row, obj in zip(rows.tolist(), objs):
+            self.rows[obj] = row
+            self.objects[row] = obj
+        self._link(rows.tolist(), objs)
+        poses = [pose(obj) for obj in objs]
+        self.local[rows] = local_matrices([_[0] for _ in poses], [_[1] for _ in poses], [_[2] for _ in poses])
+        self.dirty.update(rows.tolist())
+
+    def add(self, obj):
+        self.add_many([obj])
+
+    def add_tree(self, node=None):
+        node = self.root if node is None else node
+        self.add_many(list(_subtree(node))[1:] if node is self.root else _subtree(node))
+
+    def remove(self, obj):
+        for node in _subtree(obj):
+            row = self.rows.pop(node, None)
+            if row is not None:
+                self.objects[row] = None
+                self.parents[row] = -1
+                self.dirty.discard(row)
+                self.free.append(row)
+
+    def reparent(self, obj):
+        # obj.parent changed, depths of the subtree follow
+        nodes = [node for node in _subtree(obj) if node in self.rows]
+        self._link([self.rows[_] for _ in nodes], nodes)
+        self.mark_dirty(obj)
+
+    def mark_dirty(self, obj):
+        # the pose of obj changed, its own and all descendant world matrices are stale
+        row = self.rows[obj]
+        self.local[row] = local_matrices(*pose(obj))[0]
+        self.dirty.add(row)
+
+    def _affected(self, dirty):
+        if len(dirty) * 8 > len(self.rows):
+            return np.array(list(self.rows.values()), dtype=np.int64)
+        rows = set()
+        for row in dirty:
+            if row in rows:
+                continue
+            for node in _subtree(self.objects[row]):
+                node_row = self.rows.get(node)
+                if node_row is not None:
+                    rows.add(node_row)
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+    def update(self):
+        # each depth is one batched matrix product against the already updated parent level
+        if not self.dirty:
+            return
+        rows = self._affected(self.dirty)
+        self.dirty.clear()
+        rows = rows[np.argsort(self.depths[rows], kind="stable")]
+        depths = self.depths[rows]
+        bounds = np.flatnonzero(np.diff(depths)) + 1
+        for level in np.split(rows, bounds):
+            parents = self.parents[level]
+            top = parents < 0
+            self.world[level[top]] = self.local[level[top]]
+            nested = level[~top]
+            self.world[nested] = self.world[parents[~top]] @ self.local[nested]
+        self.updates += 1
+        self.updated_rows += len(rows)
+
+    def world_matrix(self, obj):
+        self.update()
+        return self.world[self.rows[obj]]
+
+    def world_position(self, obj):
+        return tuple(self.world_matrix(obj)[:3, 3].tolist())
+
+    def world_matrices(self, objs):
+        self.update()
+        return self.world[[self.rows[obj] for obj in objs]]
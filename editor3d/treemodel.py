@@ -0,0 +1,138 @@
+from PySide2.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+
+class ObjectTreeModel(QAbstractItemModel):
+    # children are only listed once a node is expanded, changes are applied per object.
+    # Items hold object ids, lookup finds the object of an id or None once it is gone
+    def __init__(self, lookup, root=None):
+        super().__init__()
+        self.lookup = lookup
+        self.root = root
+        # ids of fetched nodes and of their children in display order
+        self.rows = {}
+        # row of every listed id within its parent
+        self.positions = {}
+
+    def object(self, index):
+        return self.lookup(index.internalId()) if index.isValid() else None
+
+    def _node(self, index):
+        return self.lookup(index.internalId()) if index.isValid() else self.root
+
+    def _listed(self, node):
+        return node is self.root or node.id in self.positions
+
+    def index_of(self, node):
+        if node is None or node is self.root or node.id not in self.positions:
+            return QModelIndex()
+        return self.createIndex(self.positions[node.id], 0, node.id)
+
+    def reset(self, root):
+        self.beginResetModel()
+        self.root = root
+        self.rows = {}
+        self.positions = {}
+        self.endResetModel()
+        if root is not None:
+            self.fetchMore(QModelIndex())
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.rows[self._node(parent).id][row])
+
+    def parent(self, index):
+        node = self.object(index)
+        if node is None:
+            return QModelIndex()
+        return self.index_of(node.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0 or self.root is None:
+            return 0
+        node = self._node(parent)
+        return 0 if node is None else len(self.rows.get(node.id, ()))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if self.root is None:
+            return False
+        node = self._node(parent)
+        return node is not None and len(node.children) > 0
+
+    def canFetchMore(self, parent):
+        if self.root is None:
+            return False
+        node = self._node(parent)
+        return node is not None and node.id not in self.rows and len(node.children) > 0
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node is None or node.id in self.rows:
+            return
+        children = [child.id for child in node.children]
+        if children:
+            self.beginInsertRows(parent, 0, len(children) - 1)
+        self.rows[node.id] = children
+        for row, child in enumerate(children):
+            self.positions[child] = row
+        if children:
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            node = self.object(index)
+            return None if node is None else node.name
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return "Known Objects"
+        return None
+
+    def objects_added(self, objs):
+        # new objects are appended to the rows of their parent, if that parent was fetched
+        by_parent = {}
+        for obj in objs:
+            if obj.parent is not None and obj.id not in self.positions:
+                by_parent.setdefault(obj.parent, []).append(obj.id)
+        for parent, children in by_parent.items():
+            if not self._listed(parent):
+                continue
+            rows = self.rows.get(parent.id)
+            parent_index = self.index_of(parent)
+            if rows is None:
+                # not expanded yet, only the expand indicator might change
+                self.dataChanged.emit(parent_index, parent_index)
+                continue
+            self.beginInsertRows(parent_index, len(rows), len(rows) + len(children) - 1)
+            for child in children:
+                self.positions[child] = len(rows)
+                rows.append(child)
+            self.endInsertRows()
+
+    def object_removed(self, obj, parent):
+        if obj.id not in self.positions:
+            return
+        rows = self.rows[parent.id]
+        row = self.positions[obj.id]
+        self.beginRemoveRows(self.index_of(parent), row, row)
+        del rows[row]
+        for index in range(row, len(rows)):
+            self.positions[rows[index]] = index
+        self._forget(obj.id)
+        self.endRemoveRows()
+
+    def _forget(self, obj_id):
+        stack = [obj_id]
+        while stack:
+            node = stack.pop()
+            self.positions.pop(node, None)
+            stack.extend(self.rows.pop(node, ()))
+
+    def object_changed(self, obj):
+        if obj.id in self.positions:
+            index = self.index_of(obj)
+            self.dataChanged.emit(index, index)
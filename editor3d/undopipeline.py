@@ -1,4 +1,28 @@
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def _size(op):
+    # rough memory estimate of one history entry
+    if isinstance(op, CompoundOperation):
+        return sys.getsizeof(op) + sum(_size(_) for _ in op.operations)
+    return sys.getsizeof(op) + sys.getsizeof(getattr(op, "from_value", None)) + \
+        sys.getsizeof(getattr(op, "to_value", None))
+
+
+def _subtree(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children)
+
+
 class Operation:
+    __slots__ = ("target", "setter", "from_value", "to_value")
+
     def __init__(self, target, setter, from_value, to_value):
         self.target = target
         self.setter = setter
@@ -11,19 +35,211 @@ class Operation:
     def redo(self):
         self.setter(self.to_value)
 
+    def can_merge(self, op):
+        return isinstance(op, Operation) and op.target is self.target and op.setter == self.setter
+
+    def released(self):
+        return ()
+
+
+class CreateOperation:
+    # attach(target, parent) restores the object including its subtree, detach(target) removes it
+    def __init__(self, target, parent, attach, detach):
+        self.target = target
+        self.parent = parent
+        self.attach = attach
+        self.detach = detach
+        self.applied = True
+
+    def undo(self):
+        self.detach(self.target)
+        self.applied = False
+
+    def redo(self):
+        self.attach(self.target, self.parent)
+        self.applied = True
+
+    def released(self):
+        # objects that are gone for good once this entry leaves the history
+        return () if self.applied else tuple(_subtree(self.target))
+
+
+class DeleteOperation(CreateOperation):
+    def undo(self):
+        self.attach(self.target, self.parent)
+        self.applied = False
+
+    def redo(self):
+        self.detach(self.target)
+        self.applied = True
+
+    def released(self):
+        return tuple(_subtree(self.target)) if self.applied else ()
+
+
+class CompoundOperation:
+    def __init__(self, operations):
+        self.operations = list(operations)
+
+    @property
+    def target(self):
+        # all distinct targets in order of their first operation
+        return tuple({id(op.target): op.target for op in self.operations}.values())
+
+    def undo(self):
+        for op in reversed(self.operations):
+            op.undo()
+
+    def redo(self):
+        for op in self.operations:
+            op.redo()
+
+    def discard(self, target):
+        self.operations = [_ for _ in self.operations if _.target is not target]
+
+    def released(self):
+        return tuple(obj for op in self.operations for obj in op.released())
+
 
 class Pipeline:
-    def __init__(self):
-        self.queue = []
+    def __init__(self, merge_window=0.0, max_size=None, max_bytes=None, clock=time.monotonic, spill=None,
+                 hot_size=256):
+        self.queue = deque()
         # points to the last exectued operation
         self.position = -1
 
+        # history entries per target, cleaned entries stay in the queue as tombstones
+        self.index = {}
+        self.dead = set()
+
+        # consecutive edits of the same property within merge_window seconds become one entry
+        self.merge_window = merge_window
+        self.clock = clock
+        self.last_time = None
+        self.in_session = False
+        self.session_ops = 0
+
+        # oldest entries are dropped once either limit is exceeded
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+
+        # operations collected by an open transaction
+        self.transaction_depth = 0
+        self.collected = None
+
+        # entries beyond the newest hot_size ones go to spill (see editor3d.history) instead of memory
+        # and are loaded back in batches when undo reaches them
+        self.spill = spill
+        self.hot_size = hot_size
+
+    def clear(self):
+        self.queue.clear()
+        self.position = -1
+        self.index.clear()
+        self.dead.clear()
+        self.size_bytes = 0
+        self.last_time = None
+        if self.spill is not None:
+            self.spill.clear()
+
+    def _targets(self, op):
+        if isinstance(op, CompoundOperation):
+            return op.target
+        return op.target,
+
+    def _index(self, op):
+        for target in self._targets(op):
+            self.index.setdefault(target, {})[op] = None
+
+    def _unindex(self, op, target):
+        entries = self.index.get(target)
+        if entries is not None:
+            entries.pop(op, None)
+            if not entries:
+                del self.index[target]
+
+    def _drop(self, op):
+        # op left the queue, objects it kept restorable are now unreachable
+        if op in self.dead:
+            self.dead.discard(op)
+            return
+        self.size_bytes -= _size(op)
+        for target in self._targets(op):
+            self._unindex(op, target)
+        for target in op.released():
+            self.clean(target)
+
+    def history(self, target):
+        return list(self.index.get(target, ()))
+
     def clean(self, target):
-        queue = [_ for _ in self.queue if _.target is not target]
-        self.position -= len(self.queue) - len(queue)
+        # only touches the entries of target, the queue is compacted once half of it is dead
+        for op in list(self.index.pop(target, ())):
+            self.size_bytes -= _size(op)
+            if isinstance(op, CompoundOperation):
+                op.discard(target)
+                if op.operations:
+                    self.size_bytes += _size(op)
+                    continue
+            self.dead.add(op)
+        self.last_time = None
+        if len(self.dead) > 64 and len(self.dead) * 2 > len(self.queue):
+            self._compact()
+
+    def _compact(self):
+        queue = deque()
+        position = -1
+        for index, op in enumerate(self.queue):
+            if op not in self.dead:
+                queue.append(op)
+            if index == self.position:
+                position = len(queue) - 1
         self.queue = queue
+        self.position = position
+        self.dead.clear()
+
+    def _spill(self, count):
+        # moves the oldest count entries to the spill file, only done entries are spilled
+        ops = []
+        for _ in range(min(count, self.position + 1)):
+            op = self.queue.popleft()
+            self.position -= 1
+            if op in self.dead:
+                self.dead.discard(op)
+                continue
+            self.size_bytes -= _size(op)
+            for target in self._targets(op):
+                self._unindex(op, target)
+            ops.append(op)
+        # entries without a compact form are gone like evicted ones
+        for op in self.spill.push(ops):
+            for target in op.released():
+                self.clean(target)
+
+    def _unspill(self):
+        # entries of objects that no longer exist are skipped, a batch can come back empty
+        ops = self.spill.pop(max(1, self.hot_size // 2), list(self.index))
+        for op in reversed(ops):
+            self.queue.appendleft(op)
+            self.size_bytes += _size(op)
+            self._index(op)
+        self.position += len(ops)
+
+    def persist(self):
+        # all done entries to the spill file, e.g. on exit, the redo tail is dropped
+        while len(self.queue) > self.position + 1:
+            self._drop(self.queue.pop())
+        self._spill(len(self.queue))
 
     def undo(self):
+        self.last_time = None
+        while True:
+            while self.position >= 0 and self.queue[self.position] in self.dead:
+                self.position -= 1
+            if self.position >= 0 or self.spill is None or not len(self.spill):
+                break
+            self._unspill()
         if 0 <= self.position < len(self.queue):
             op = self.queue[self.position]
             op.undo()
@@ -32,6 +248,9 @@ class Pipeline:
         return None
 
     def redo(self):
+        self.last_time = None
+        while self.position+1 < len(self.queue) and self.queue[self.position+1] in self.dead:
+            self.position += 1
         if self.position+1 < len(self.queue):
             op = self.queue[self.position+1]
             op.redo()
@@ -39,7 +258,92 @@ class Pipeline:
             return op.target
         return None
 
+    def begin_session(self):
+        # all following edits of one property merge until end_session
+        self.in_session = True
+        self.session_ops = 0
+
+    def end_session(self):
+        self.in_session = False
+        self.last_time = None
+
+    @contextmanager
+    def session(self):
+        self.begin_session()
+        try:
+            yield self
+        finally:
+            self.end_session()
+
+    @contextmanager
+    def transaction(self):
+        # everything added until the outermost transaction closes becomes one entry
+        self.transaction_depth += 1
+        if self.transaction_depth == 1:
+            self.collected = []
+        try:
+            yield self
+        finally:
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0:
+                operations, self.collected = self.collected, None
+                if len(operations) == 1:
+                    self.add_operation(operations[0])
+                elif operations:
+                    self.add_operation(CompoundOperation(operations))
+
+    def _collect(self, op):
+        if isinstance(op, CompoundOperation):
+            for _ in op.operations:
+                self._collect(_)
+            return
+        last = self.collected[-1] if self.collected else None
+        if isinstance(last, Operation) and last.can_merge(op):
+            last.to_value = op.to_value
+        else:
+            self.collected.append(op)
+
+    def _mergeable(self, op, now):
+        if self.position < 0 or self.last_time is None:
+            return False
+        last = self.queue[self.position]
+        if not isinstance(last, Operation) or last in self.dead or not last.can_merge(op):
+            return False
+        if self.in_session and self.session_ops > 0:
+            return True
+        return self.merge_window > 0 and now - self.last_time <= self.merge_window
+
     def add_operation(self, op):
-        self.queue = self.queue[:self.position+1]
-        self.queue.append(op)
-        self.position += 1
+        if self.collected is not None:
+            self._collect(op)
+            return
+
+        # dropping the redo tail pops each entry at most once, amortized O(1)
+        while len(self.queue) > self.position+1:
+            self._drop(self.queue.pop())
+
+        now = self.clock()
+        if self._mergeable(op, now):
+            last = self.queue[self.position]
+            self.size_bytes -= _size(last)
+            last.to_value = op.to_value
+            self.size_bytes += _size(last)
+        else:
+            self.queue.append(op)
+            self.position += 1
+            self.size_bytes += _size(op)
+            self._index(op)
+        self.last_time = now
+        if self.in_session:
+            self.session_ops += 1
+
+        # the current entry stays in memory so the next edit can still merge with it
+        if self.spill is not None and len(self.queue) > self.hot_size + self.hot_size // 4:
+            self._spill(min(len(self.queue) - self.hot_size, self.position))
+
+        while len(self.queue) > 1 and (
+                (self.max_size is not None and len(self.queue) > self.max_size) or
+                (self.max_bytes is not None and self.size_bytes > self.max_bytes)):
+            op = self.queue.popleft()
+            self.position -= 1
+            self._drop(op)
@@ -1,4 +1,5 @@
 import enum
+import math
 
 from PySide2.Qt3DInput import Qt3DInput
 from PySide2.Qt3DRender import Qt3DRender
@@ -6,18 +7,12 @@ from PySide2.Qt3DCore import Qt3DCore
 from PySide2.Qt3DExtras import Qt3DExtras
 from PySide2.QtCore import QSize, Qt, QItemSelectionModel
 from PySide2.QtGui import QColor, QVector3D
-from PySide2.QtWidgets import QApplication, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QTreeWidget, \
-    QTreeWidgetItem, QGroupBox, QLabel, QLineEdit, QDoubleSpinBox, QAbstractItemView, QColorDialog
+from PySide2.QtWidgets import QApplication, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QTreeView, \
+    QGroupBox, QLabel, QLineEdit, QDoubleSpinBox, QAbstractItemView, QColorDialog, \
+    QFileDialog, QProgressDialog, QCheckBox
 
 from editor3d.objects import Sphere3D, Box3D, STL3D
-
-
-def _recursive_tree_add(node):
-    widget_item = QTreeWidgetItem([node.name])
-    widget_item.original = node
-    for child in node.children:
-        widget_item.addChild(_recursive_tree_add(child))
-    return widget_item
+from editor3d.treemodel import ObjectTreeModel
 
 
 class PropertyType(enum.Enum):
@@ -31,19 +26,32 @@ class PropertyType(enum.Enum):
 
 
 class PropertyEditor:
+    def begin_edit(self):
+        if not self.editing:
+            self.editing = True
+            self.manager.begin_edit()
+
+    def end_edit(self):
+        if self.editing:
+            self.editing = False
+            self.manager.end_edit()
+
     def update_color(self, color):
         self.manager.update_color(self.obj, color)
 
     def update_name(self, name):
+        self.begin_edit()
         self.manager.update_name(self.obj, name)
 
     def update_scalar(self, scalar):
+        self.begin_edit()
         if isinstance(self.obj, Sphere3D):
             self.manager.update_radius(self.obj, scalar)
         elif isinstance(self.obj, STL3D):
             self.manager.update_scale(self.obj, scalar)
 
     def update_trio(self, _):
+        self.begin_edit()
         vector = (self.x_edit.value(), self.y_edit.value(), self.z_edit.value())
         if self.type == PropertyType.POSITION:
             self.manager.update_position(self.obj, vector)
@@ -52,11 +60,46 @@ class PropertyEditor:
         elif self.type == PropertyType.BOX_DIMENSIONS:
             self.manager.update_box_dimension(self.obj, vector)
 
+    def _set(self, edit, value):
+        # signals are blocked, showing the current value is not a new edit
+        if edit.value() != round(value, edit.decimals()):
+            edit.blockSignals(True)
+            edit.setValue(value)
+            edit.blockSignals(False)
+
+    def refresh(self):
+        # shows values changed elsewhere, e.g. by undo, without rebuilding the widgets
+        obj = self.obj
+        if self.type in [PropertyType.POSITION, PropertyType.ROTATION, PropertyType.BOX_DIMENSIONS]:
+            if self.type is PropertyType.POSITION:
+                values = obj.position
+            elif self.type is PropertyType.ROTATION:
+                values = obj.rotation
+            else:
+                values = (obj.width, obj.length, obj.height)
+            for edit, value in zip((self.x_edit, self.y_edit, self.z_edit), values):
+                self._set(edit, value)
+        elif self.type == PropertyType.NAME:
+            if self.str_edit.text() != obj.name:
+                self.str_edit.blockSignals(True)
+                self.str_edit.setText(obj.name)
+                self.str_edit.blockSignals(False)
+        elif self.type == PropertyType.RADIUS:
+            self._set(self.single_edit, obj.radius)
+        elif self.type == PropertyType.SCALE:
+            self._set(self.single_edit, obj.scale)
+        elif self.type == PropertyType.COLOR:
+            color_palette = self.color_label.palette()
+            color_palette.setColor(self.color_label.backgroundRole(), QColor(obj.color))
+            self.color_label.setPalette(color_palette)
+
     def deleteLater(self):
+        self.end_edit()
         self.group.deleteLater()
 
     def __init__(self, parent, type, title, manager, obj):
         self.manager = manager
+        self.editing = False
         self.group = QGroupBox(title, parent)
         self.type = type
         self.obj = obj
@@ -74,34 +117,39 @@ class PropertyEditor:
             self.x_edit.setValue(x)
             self.x_edit.setRange(-9999, 9999)
             self.x_edit.valueChanged.connect(self.update_trio)
+            self.x_edit.editingFinished.connect(self.end_edit)
 
             self.y_edit = QDoubleSpinBox()
             self.y_edit.setValue(y)
             self.y_edit.setRange(-9999, 9999)
             self.y_edit.valueChanged.connect(self.update_trio)
+            self.y_edit.editingFinished.connect(self.end_edit)
 
             self.z_edit = QDoubleSpinBox()
             self.z_edit.setValue(z)
             self.z_edit.setRange(-9999, 9999)
             self.z_edit.valueChanged.connect(self.update_trio)
+            self.z_edit.editingFinished.connect(self.end_edit)
 
             hboxlayout.addWidget(self.x_edit)
             hboxlayout.addWidget(self.y_edit)
             hboxlayout.addWidget(self.z_edit)
         elif type == PropertyType.NAME:
-            str_edit = QLineEdit(self.group)
-            str_edit.setText(obj.name)
-            str_edit.textChanged.connect(self.update_name)
-            hboxlayout.addWidget(str_edit)
+            self.str_edit = QLineEdit(self.group)
+            self.str_edit.setText(obj.name)
+            self.str_edit.textChanged.connect(self.update_name)
+            self.str_edit.editingFinished.connect(self.end_edit)
+            hboxlayout.addWidget(self.str_edit)
         elif type in [PropertyType.RADIUS, PropertyType.SCALE]:
-            single_edit = QDoubleSpinBox()
-            single_edit.setRange(-9999, 9999)
+            self.single_edit = QDoubleSpinBox()
+            self.single_edit.setRange(-9999, 9999)
             if type is PropertyType.RADIUS:
-                single_edit.setValue(obj.radius)
+                self.single_edit.setValue(obj.radius)
             elif type is PropertyType.SCALE:
-                single_edit.setValue(obj.scale)
-            single_edit.valueChanged.connect(self.update_scalar)
-            hboxlayout.addWidget(single_edit)
+                self.single_edit.setValue(obj.scale)
+            self.single_edit.valueChanged.connect(self.update_scalar)
+            self.single_edit.editingFinished.connect(self.end_edit)
+            hboxlayout.addWidget(self.single_edit)
         elif type == PropertyType.COLOR:
             def pick_color(event):
                 color = QColorDialog.getColor(QColor(obj.color))
@@ -198,19 +246,27 @@ class QtFrontend:
         sphere_button = QPushButton("Add Sphere")
         sphere_button.clicked.connect(self.manager.create_sphere)
         stl_button = QPushButton("Load from stl")
-        # todo: stl_button.clicked.connect(), file selector dialog and forward to manager
+        stl_button.clicked.connect(self.load_stl)
 
         vlayout.addWidget(box_button)
         vlayout.addWidget(sphere_button)
         vlayout.addWidget(stl_button)
+        import_button = QPushButton("Import scene")
+        import_button.clicked.connect(self.import_scene)
+        export_button = QPushButton("Export scene")
+        export_button.clicked.connect(self.export_scene)
+        vlayout.addWidget(import_button)
+        vlayout.addWidget(export_button)
 
         self.edit_group = QGroupBox("Edit Object", self.widget)
         self.edit_group.setLayout(QVBoxLayout())
         vlayout.addWidget(self.edit_group)
 
-        self.tree_list = QTreeWidget()
-        self.tree_list.setHeaderLabel("Known Objects")
-        self.tree_list.itemClicked.connect(lambda item: self.set_slected_object(item.original))
+        self.tree_model = ObjectTreeModel(self.manager.object)
+        self.tree_list = QTreeView()
+        self.tree_list.setUniformRowHeights(True)
+        self.tree_list.setModel(self.tree_model)
+        self.tree_list.clicked.connect(lambda index: self.set_slected_object(self.tree_model.object(index)))
         vlayout.addWidget(self.tree_list)
 
         undo_button = QPushButton("Undo")
@@ -220,11 +276,30 @@ class QtFrontend:
         vlayout.addWidget(undo_button)
         vlayout.addWidget(redo_button)
 
+        collision_box = QCheckBox("Highlight collisions")
+        collision_box.toggled.connect(self.manager.set_collision_highlight)
+        self.collision_label = QLabel()
+        vlayout.addWidget(collision_box)
+        vlayout.addWidget(self.collision_label)
+
+        # debug entries, only with instrumentation enabled
+        if self.manager.instrumentation is not None:
+            debug_group = QGroupBox("Debug", self.widget)
+            debug_group.setLayout(QVBoxLayout())
+            dump_button = QPushButton("Write statistics")
+            dump_button.clicked.connect(lambda: self.manager.dump_instrumentation())
+            profile_button = QPushButton("Profile 10 s")
+            profile_button.clicked.connect(lambda: self.manager.profile(10))
+            debug_group.layout().addWidget(dump_button)
+            debug_group.layout().addWidget(profile_button)
+            vlayout.addWidget(debug_group)
+
         self.widget.setWindowTitle("3D Editor")
 
     def __init__(self, argv, object_root, manager):
         self.manager = manager
         self.editors = {}
+        self.import_dialog = None
 
         self.app = QApplication(argv)
         self.__setup_basic_layout()
@@ -235,6 +310,13 @@ class QtFrontend:
         # Setup basic camera with light bound to the camera
         self.__setup_lit_camera(self.window3d.camera())
 
+        # Clicks without drag select the object under the cursor
+        self.mouse_device = Qt3DInput.QMouseDevice(object_root)
+        self.mouse_handler = Qt3DInput.QMouseHandler(object_root)
+        self.mouse_handler.setSourceDevice(self.mouse_device)
+        self.mouse_handler.clicked.connect(self.__scene_clicked)
+        object_root.addComponent(self.mouse_handler)
+
         # Setup camera controller to allow panning, moving, etc.
         self.camera_controller = Qt3DExtras.QOrbitCameraController(object_root)
         self.camera_controller.setCamera(self.window3d.camera())
@@ -244,6 +326,30 @@ class QtFrontend:
 
         self.widget.resize(1000, 700)
 
+    def camera(self):
+        return self.window3d.camera()
+
+    def focal_length(self):
+        # pixels covered by one unit at distance one from the camera, vertically
+        field_of_view = math.radians(self.camera().fieldOfView())
+        return max(self.window3d.height(), 1) / (2 * math.tan(field_of_view / 2))
+
+    def screen_ray(self, x, y):
+        # origin on the near plane and direction through the window position x, y
+        camera = self.camera()
+        inverse, _ = (camera.projectionMatrix() * camera.viewMatrix()).inverted()
+        ndc_x = 2.0 * x / max(self.window3d.width(), 1) - 1.0
+        ndc_y = 1.0 - 2.0 * y / max(self.window3d.height(), 1)
+        near = inverse.map(QVector3D(ndc_x, ndc_y, -1.0))
+        far = inverse.map(QVector3D(ndc_x, ndc_y, 1.0))
+        return (near.x(), near.y(), near.z()), (far.x() - near.x(), far.y() - near.y(), far.z() - near.z())
+
+    def __scene_clicked(self, event):
+        obj = self.manager.pick(*self.screen_ray(event.x(), event.y()))
+        if obj is not None:
+            self.tree_list.setCurrentIndex(self.tree_model.index_of(obj))
+            self.set_slected_object(obj)
+
     def show(self):
         self.widget.show()
 
@@ -251,10 +357,62 @@ class QtFrontend:
         return self.app.exec_()
 
     def set_known_objects(self, root):
-        self.tree_list.clear()
-        self.tree_list.setHeaderLabel("Known Objects")
-        for element in root.children:
-            self.tree_list.addTopLevelItem(_recursive_tree_add(element))
+        self.tree_model.reset(root)
+
+    def objects_added(self, objs):
+        self.tree_model.objects_added(objs)
+
+    def object_removed(self, obj, parent):
+        self.tree_model.object_removed(obj, parent)
+
+    def object_changed(self, obj):
+        self.tree_model.object_changed(obj)
+
+    def refresh_object_editor(self):
+        for editor in self.editors.values():
+            editor.refresh()
+
+    def current_object(self):
+        editor = self.editors.get(PropertyType.NAME)
+        return None if editor is None else editor.obj
+
+    def collisions_changed(self, pairs):
+        # None while collisions are not highlighted
+        self.collision_label.setText("" if pairs is None else "{} overlapping pairs".format(pairs))
+
+    def load_stl(self):
+        paths, _ = QFileDialog.getOpenFileNames(self.widget, "Load from stl", "", "STL files (*.stl);;All files (*)")
+        if paths:
+            self.manager.create_stls(paths)
+
+    def import_started(self, total, label="Importing STL files"):
+        self.import_dialog = QProgressDialog(label, "Cancel", 0, total, self.widget)
+        self.import_dialog.setMinimumDuration(500)
+        self.import_dialog.canceled.connect(self.manager.cancel_import)
+        self.import_dialog.setValue(0)
+
+    def import_progress(self, done, total):
+        if self.import_dialog is not None:
+            self.import_dialog.setValue(done)
+
+    def import_finished(self):
+        if self.import_dialog is not None:
+            self.import_dialog.canceled.disconnect(self.manager.cancel_import)
+            self.import_dialog.close()
+            self.import_dialog.deleteLater()
+            self.import_dialog = None
+
+    def import_scene(self):
+        path, _ = QFileDialog.getOpenFileName(self.widget, "Import scene", "",
+                                              "NDJSON files (*.ndjson *.jsonl);;All files (*)")
+        if path:
+            self.manager.import_scene(path)
+
+    def export_scene(self):
+        path, _ = QFileDialog.getSaveFileName(self.widget, "Export scene", "scene.ndjson",
+                                              "NDJSON files (*.ndjson *.jsonl)")
+        if path:
+            self.manager.export_scene(path)
 
     def set_slected_object(self, obj):
         self.update_object_editor(obj)
@@ -1,5 +1,8 @@
 import sys
-from editor3d.manager import Manager
 
-manager = Manager()
-sys.exit(manager.start())
+# the guard keeps the worker processes of the STL import from loading Qt and starting an editor of their own
+if __name__ == "__main__":
+    from editor3d.manager import Manager
+
+    manager = Manager()
+    sys.exit(manager.start())
@@ -0,0 +1,66 @@
+import random
+import unittest
+
+import numpy as np
+
+from editor3d.bvh import *
+
+
+def brute_ray(low, high, origin, direction):
+    hit, near = ray_boxes(low, high, np.asarray(origin, float), np.asarray(direction, float))
+    near = np.where(hit, near, np.inf)
+    best = int(np.argmin(near))
+    return (best, float(near[best])) if np.isfinite(near[best]) else None
+
+
+class TestBVH(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        centers = rng.uniform(-50, 50, (500, 3))
+        radius = rng.uniform(0.5, 2, (500, 1))
+        self.low, self.high = centers - radius, centers + radius
+        self.bvh = BVH(leaf_size=4)
+        for key in range(500):
+            self.bvh.insert(key, self.low[key], self.high[key])
+        self.rays = [(rng.uniform(-80, 80, 3), rng.normal(size=3)) for _ in range(100)]
+
+    def assertRaysMatch(self):
+        for origin, direction in self.rays:
+            self.assertEqual(self.bvh.ray(origin, direction), brute_ray(self.low, self.high, origin, direction))
+
+    def test_ray(self):
+        self.assertRaysMatch()
+        self.assertEqual(self.bvh.builds, 1)
+
+    def test_axis_parallel(self):
+        bvh = BVH()
+        bvh.insert("box", (0, 0, 0), (1, 1, 1))
+        self.assertEqual(bvh.ray((0.5, 1, -5), (0, 0, 1)), ("box", 5.0))
+        self.assertIsNone(bvh.ray((2, 0.5, -5), (0, 0, 1)))
+
+    def test_update_and_remove(self):
+        self.bvh.build()
+        for key in random.Random(2).sample(range(500), 50):
+            self.low[key] += 10
+            self.high[key] += 10
+            self.bvh.update(key, self.low[key], self.high[key])
+        self.assertRaysMatch()
+        self.assertEqual(self.bvh.builds, 1)
+
+        for key in range(0, 500, 3):
+            self.bvh.remove(key)
+            self.low[key], self.high[key] = np.inf, -np.inf
+        self.assertRaysMatch()
+        self.assertNotIn(0, self.bvh)
+
+        # freed slots are reused for new keys
+        self.bvh.insert("new", (100, 100, 100), (101, 101, 101))
+        self.assertEqual(self.bvh.ray((100.5, 100.5, 90), (0, 0, 1)), ("new", 10.0))
+
+    def test_box_and_frustum(self):
+        query = box_overlaps(self.low, self.high, np.array([-10.0] * 3), np.array([10.0] * 3))
+        self.assertEqual(sorted(self.bvh.query_box((-10,) * 3, (10,) * 3)), np.flatnonzero(query).tolist())
+
+        # orthographic box from -10 to 10 on every axis as clip matrix
+        planes = frustum_planes(np.diag([0.1, 0.1, 0.1, 1.0]))
+        self.assertEqual(sorted(self.bvh.query_frustum(planes)), np.flatnonzero(query).tolist())
@@ -0,0 +1,123 @@
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from editor3d.cli import *
+from editor3d.objects import Box3D, Sphere3D, ObjectRoot, walk
+from editor3d.storage import Storage
+
+
+def scene():
+    root = ObjectRoot()
+    box = Box3D("Box", (1, 2, 3))
+    box.set_parent(root)
+    Sphere3D("Ball", radius=2).set_parent(box)
+    Sphere3D("Other").set_parent(root)
+    return root
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pickle = os.path.join(self.directory.name, "scene.pickle")
+        with open(self.pickle, "wb") as file:
+            pickle.dump(scene(), file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_old_pickle(self):
+        # files written while ObjectRoot lived in the Qt dependent manager module
+        with open(self.pickle, "rb") as file:
+            data = file.read().replace(b"editor3d.objects\x94\x8c\nObjectRoot", b"editor3d.manager\x94\x8c\nObjectRoot")
+        self.assertIn(b"editor3d.manager", data)
+        with open(self.pickle, "wb") as file:
+            file.write(data)
+        root = Storage(self.pickle, ObjectRoot()).get_root()
+        self.assertIsInstance(root, ObjectRoot)
+        self.assertEqual(len(list(walk(root))), 3)
+
+    def test_convert(self):
+        for extension, format in ((".db", "sqlite"), (".snap", "snapshot"), (".pkl", "pickle")):
+            target = os.path.join(self.directory.name, "copy" + extension)
+            self.assertEqual(convert(self.pickle, target), format)
+            self.assertEqual(detect(target), format)
+            storage, root = open_storage(target)
+            close(storage)
+            self.assertEqual(stats(root)["types"], {"Box3D": 1, "Sphere3D": 2})
+            self.assertEqual(stats(root)["max_depth"], 2)
+            with self.assertRaises(FileExistsError):
+                convert(self.pickle, target)
+
+    def test_validate(self):
+        root = scene()
+        self.assertEqual(validate(root), [])
+        box = next(obj for obj in root.children if isinstance(obj, Box3D))
+        box.color = "red"
+        box.width = -1
+        levels = sorted(level for level, _, _ in validate(root))
+        self.assertEqual(levels, ["error", "warning"])
+
+    def test_set(self):
+        database = os.path.join(self.directory.name, "scene.db")
+        convert(self.pickle, database)
+        self.assertEqual(main(["set", database, "radius=4", "color=#00ff00", "--type", "Sphere3D"]), 0)
+        storage, root = open_storage(database)
+        close(storage)
+        spheres = list(select(root, type="Sphere3D"))
+        self.assertEqual({(obj.radius, obj.color) for obj in spheres}, {(4.0, "#00ff00")})
+        # invalid values are a usage error and leave the file as it is
+        before = stats(root)
+        for assignment in ("size=1", "color=green", "color=#00ff0", "position=1,2", "rotation=1,2,3,4",
+                           "position=1,nan,2", "radius=big"):
+            with self.assertRaises(SystemExit) as raised:
+                main(["set", database, assignment, "color=#0000ff"])
+            self.assertEqual(raised.exception.code, 2)
+        storage, root = open_storage(database)
+        close(storage)
+        self.assertEqual(stats(root), before)
+        self.assertNotIn("#0000ff", {obj.color for obj in walk(root)})
+
+    def test_ndjson(self):
+        lines = os.path.join(self.directory.name, "scene.ndjson")
+        self.assertEqual(export_ndjson(self.pickle, lines), 3)
+        for extension in (".db", ".pkl"):
+            target = os.path.join(self.directory.name, "imported" + extension)
+            self.assertEqual(main(["import", lines, target]), 0)
+            storage, root = open_storage(target)
+            close(storage)
+            self.assertEqual(stats(root)["types"], {"Box3D": 1, "Sphere3D": 2})
+            self.assertEqual(stats(root)["max_depth"], 2)
+        # SQLite files are exported from their rows
+        again = os.path.join(self.directory.name, "again.ndjson")
+        self.assertEqual(main(["export", os.path.join(self.directory.name, "imported.db"), again]), 0)
+        with open(lines) as first, open(again) as second:
+            records = [sorted((json.loads(_) for _ in file), key=lambda record: record["id"])
+                       for file in (first, second)]
+        self.assertEqual(records[0], records[1])
+
+        with open(lines, "a") as file:
+            file.write("{broken\n")
+        broken = os.path.join(self.directory.name, "broken.db")
+        self.assertEqual(main(["import", lines, broken]), 2)
+        self.assertFalse(os.path.exists(broken))
+
+    def test_collisions(self):
+        # the ball sits in the box, the other sphere is apart from both
+        pairs = collisions(scene())
+        self.assertEqual(len(pairs), 1)
+        self.assertEqual(main(["collisions", self.pickle, "--check"]), 1)
+
+    def test_snapshot_magic(self):
+        from editor3d.snapshot import MAGIC
+        self.assertEqual(SNAPSHOT_MAGIC, MAGIC)
+
+    def test_without_qt(self):
+        code = "import sys, editor3d.cli, editor3d.storage, editor3d.undopipeline; print('PySide2' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(output.stdout.strip(), "False")
@@ -0,0 +1,113 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from editor3d.collision import *
+from editor3d.objects import Box3D, Sphere3D, ObjectRoot, walk
+from editor3d.transforms import TransformTree, world_matrix
+
+
+def scene(objs):
+    root = ObjectRoot()
+    for obj in objs:
+        obj.set_parent(root)
+    return root
+
+
+def world(objs):
+    return np.array([world_matrix(obj) for obj in objs])
+
+
+def corners(center, axes, half):
+    return np.array([center + axes @ (np.array(signs) * half) for signs in itertools.product((-1, 1), repeat=3)])
+
+
+def separated(a, b):
+    # reference test, the corners of both boxes projected on all 15 axes
+    points_a, points_b = corners(*a), corners(*b)
+    candidates = list(a[1].T) + list(b[1].T) + [np.cross(u, v) for u in a[1].T for v in b[1].T]
+    for axis in candidates:
+        if np.linalg.norm(axis) < 1e-9:
+            continue
+        pa, pb = points_a @ axis, points_b @ axis
+        if pa.max() < pb.min() - 1e-9 or pb.max() < pa.min() - 1e-9:
+            return True
+    return False
+
+
+class TestCollision(unittest.TestCase):
+    def test_spheres(self):
+        objs = [Sphere3D(position=(0, 0, 0), radius=1), Sphere3D(position=(1.9, 0, 0), radius=1),
+                Sphere3D(position=(5, 0, 0), radius=1)]
+        collisions = CollisionScene()
+        collisions.update(objs, world(objs))
+        self.assertEqual(collisions.pairs(), [(objs[0], objs[1])])
+
+    def test_rotated_box_and_sphere(self):
+        # the corner of the bounds is empty once the box is turned by 45 degrees
+        box = Box3D(rotation=(0, 0, 45), width=2, length=2, height=2)
+        sphere = Sphere3D(position=(1.3, 1.3, 0), radius=0.3)
+        collisions = CollisionScene()
+        collisions.update([box, sphere], world([box, sphere]))
+        self.assertEqual(collisions.pairs(), [])
+        sphere.set_position((1.0, 0.0, 0))
+        collisions.update([sphere], world([sphere]))
+        self.assertEqual(collisions.collisions(box), [sphere])
+
+    def test_boxes(self):
+        rng = np.random.default_rng(1)
+        boxes = [Box3D(position=tuple(rng.uniform(-3, 3, 3)), rotation=tuple(rng.uniform(0, 360, 3)),
+                       width=rng.uniform(0.2, 3), length=rng.uniform(0.2, 3), height=rng.uniform(0.2, 3))
+                 for _ in range(60)]
+        kinds, centers, axes, half, _, _ = shapes(boxes, world(boxes))
+        first, second = np.array(list(itertools.combinations(range(len(boxes)), 2))).T
+        result = overlaps(kinds, centers, axes, half, first, second)
+        expected = [not separated((centers[a], axes[a], half[a]), (centers[b], axes[b], half[b]))
+                    for a, b in zip(first, second)]
+        self.assertEqual(result.tolist(), expected)
+        self.assertTrue(0 < sum(expected) < len(expected))
+
+    def test_sweep_and_prune(self):
+        rng = np.random.default_rng(2)
+        low = rng.uniform(-10, 10, (300, 3))
+        high = low + rng.uniform(0, 3, (300, 3))
+        first, second = sweep_and_prune(low, high)
+        expected = {(a, b) for a, b in itertools.combinations(range(300), 2)
+                    if np.all(low[a] <= high[b]) and np.all(low[b] <= high[a])}
+        self.assertEqual(set(zip(first.tolist(), second.tolist())), expected)
+        self.assertEqual(len(first), len(expected))
+        # unit cubes on a lattice touch their neighbours exactly, across many grid cells
+        low = np.array(list(itertools.product(range(6), repeat=3)), dtype=float)
+        first, second = sweep_and_prune(low, low + 1)
+        self.assertEqual(len(set(zip(first.tolist(), second.tolist()))), len(first))
+        self.assertEqual(len(first), sum(np.all(np.abs(low[a] - low[b]) <= 1) for a, b in
+                                         itertools.combinations(range(len(low)), 2)))
+
+    def test_incremental(self):
+        rng = np.random.default_rng(3)
+        objs = [(Sphere3D(radius=rng.uniform(0.2, 2)) if index % 2 else
+                 Box3D(rotation=tuple(rng.uniform(0, 360, 3)), width=rng.uniform(0.2, 3)))
+                for index in range(400)]
+        for obj in objs:
+            obj.set_position(tuple(rng.uniform(-15, 15, 3)))
+        root = scene(objs)
+        transforms = TransformTree(root)
+        transforms.add_tree()
+        collisions = CollisionScene(capacity=16)
+        collisions.update(objs, transforms.world_matrices(objs))
+        collisions.query()
+        for step in range(5):
+            moved = [objs[_] for _ in rng.choice(len(objs), 20, replace=False)]
+            for obj in moved:
+                obj.set_position(tuple(rng.uniform(-15, 15, 3)))
+                transforms.mark_dirty(obj)
+            collisions.update(moved, transforms.world_matrices(moved))
+            collisions.remove(objs[step])
+            incremental = {frozenset(_) for _ in collisions.pairs()}
+            full = CollisionScene()
+            rest = [obj for obj in walk(root) if obj in collisions]
+            full.update(rest, transforms.world_matrices(rest))
+            self.assertEqual(incremental, {frozenset(_) for _ in full.pairs()})
+        self.assertEqual(collisions.full_queries, 1)
+        self.assertEqual(collisions.incremental_queries, 5)
@@ -0,0 +1,37 @@
+import unittest
+
+from editor3d.handles import *
+from editor3d.objects import Box3D, Sphere3D, ObjectRoot
+
+
+class TestHandleTable(unittest.TestCase):
+    def test_lookup(self):
+        handles = HandleTable()
+        root = ObjectRoot()
+        box, sphere = Box3D(), Sphere3D()
+        handles.add(root, "root entity", parent_id=None)
+        handles.add(box, "box entity", "box mesh", "box transform", "material", root.id)
+        slot = handles.add(sphere, "sphere entity", "sphere mesh", "sphere transform", "material", box.id)
+        self.assertEqual(len(handles), 3)
+        self.assertIn(sphere.id, handles)
+        self.assertIs(handles.object(sphere.id), sphere)
+        self.assertEqual(handles.entity(root.id), "root entity")
+        self.assertEqual(handles.meshes[slot], "sphere mesh")
+        self.assertEqual(handles.parents[handles.slots[sphere.id]], box.id)
+        self.assertRaises(ValueError, handles.add, sphere, "again")
+
+    def test_slots_reused(self):
+        handles = HandleTable()
+        boxes = [Box3D() for _ in range(4)]
+        slots = [handles.add(box, "entity {}".format(box.id)) for box in boxes]
+        self.assertEqual(handles.remove(boxes[1].id), ("entity {}".format(boxes[1].id), None, None, None))
+        self.assertNotIn(boxes[1].id, handles)
+        self.assertIsNone(handles.object(boxes[1].id))
+        self.assertIsNone(handles.objects[slots[1]])
+        box = Box3D()
+        self.assertEqual(handles.add(box, "new"), slots[1])
+        self.assertEqual(handles.stats(), {"handles": 4, "slots": 4, "free": 0, "reused": 1})
+        # an object added again after its removal gets a handle like a new one
+        handles.add(boxes[1], "back")
+        self.assertEqual(handles.entity(boxes[1].id), "back")
+        self.assertEqual(len(handles.ids), 5)
@@ -0,0 +1,100 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from editor3d.history import *
+from editor3d.objects import Box3D, Sphere3D, ObjectRoot, walk
+from editor3d.undopipeline import Pipeline, DeleteOperation, CreateOperation
+
+
+def attach(obj, parent):
+    obj.set_parent(parent)
+
+
+def detach(obj):
+    obj.set_parent(None)
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "Shapes.history")
+        self.root = ObjectRoot()
+        self.boxes = [Box3D("Box {}".format(index)) for index in range(4)]
+        for box in self.boxes:
+            box.set_parent(self.root)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def pipeline(self, root):
+        spill = SpilledHistory(self.filename, root, attach, detach)
+        return Pipeline(spill=spill, hot_size=8), spill
+
+    def test_spill(self):
+        pipeline, spill = self.pipeline(self.root)
+        for index in range(100):
+            pipeline.add_operation(self.boxes[index % 4].set_position((index, 0, 0)))
+        self.assertLessEqual(len(pipeline.queue), 10)
+        self.assertEqual(len(spill) + len(pipeline.queue), 100)
+        for _ in range(100):
+            self.assertIsNotNone(pipeline.undo())
+        self.assertIsNone(pipeline.undo())
+        self.assertEqual({box.position for box in self.boxes}, {(0, 0, 0)})
+        for _ in range(100):
+            pipeline.redo()
+        self.assertEqual(self.boxes[3].position, (99, 0, 0))
+
+    def test_restart(self):
+        pipeline, spill = self.pipeline(self.root)
+        sphere = Sphere3D("Ball")
+        sphere.set_parent(self.boxes[0])
+        pipeline.add_operation(CreateOperation(sphere, self.boxes[0], attach, detach))
+        pipeline.add_operation(sphere.set_radius(3))
+        pipeline.add_operation(sphere.set_parent(self.boxes[1]))
+        detach(self.boxes[2])
+        pipeline.add_operation(DeleteOperation(self.boxes[2], self.root, attach, detach))
+        pipeline.add_operation(self.boxes[3].set_color("#ff0000"))
+        pipeline.persist()
+        spill.close()
+        self.assertEqual(len(pipeline.queue), 0)
+
+        # a new session with the stored scene, the history is read only when undo reaches it
+        root = pickle.loads(pickle.dumps(self.root))
+        objects = {obj.name: obj for obj in walk(root)}
+        pipeline, spill = self.pipeline(root)
+        self.assertIsNone(spill.file)
+        pipeline.undo()
+        self.assertEqual(objects["Box 3"].color, "#dddddd")
+        pipeline.undo()
+        restored = [obj for obj in root.children if obj.name == "Box 2"]
+        self.assertEqual(len(restored), 1)
+        self.assertEqual(restored[0].id, self.boxes[2].id)
+        pipeline.undo()
+        self.assertIs(objects["Ball"].parent, objects["Box 0"])
+        pipeline.undo()
+        self.assertEqual(objects["Ball"].radius, 1)
+        pipeline.undo()
+        self.assertIsNone(objects["Ball"].parent)
+        self.assertIsNone(pipeline.undo())
+        pipeline.redo()
+        self.assertIs(objects["Ball"].parent, objects["Box 0"])
+
+    def test_missing_objects(self):
+        pipeline, spill = self.pipeline(self.root)
+        pipeline.add_operation(self.boxes[0].set_name("Renamed"))
+        pipeline.add_operation(self.boxes[1].set_name("Renamed"))
+        pipeline.persist()
+        # the object is gone from the scene, its entry is skipped
+        self.boxes[1].set_parent(None)
+        self.assertIs(pipeline.undo(), self.boxes[0])
+        self.assertEqual(self.boxes[0].name, "Box 0")
+        self.assertEqual(spill.skipped, 1)
+
+    def test_invalid_file(self):
+        with open(self.filename, "wb") as file:
+            file.write(b"something else entirely")
+        pipeline, spill = self.pipeline(self.root)
+        self.assertEqual(len(spill), 0)
+        self.assertIsNone(pipeline.undo())
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+
+from editor3d.instrumentation import *
+
+
+class MockClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        self.time += 0.5
+        return self.time
+
+
+class MockTarget:
+    def __init__(self):
+        self.calls = 0
+
+    def work(self, value):
+        self.calls += 1
+        return value * 2
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["max"], 100)
+        self.assertAlmostEqual(summary["p50"], 50.5)
+        self.assertAlmostEqual(summary["p99"], 99.01)
+
+    def test_rolling(self):
+        histogram = Histogram(size=10)
+        for value in range(100):
+            histogram.add(value)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.summary()["p50"], 94.5)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_wrap(self):
+        instrumentation = Instrumentation(clock=MockClock())
+        target = MockTarget()
+        instrumentation.wrap(target, ["work"], "target")
+        self.assertEqual(target.work(2), 4)
+        self.assertEqual(target.calls, 1)
+        summary = instrumentation.report()["histograms"]["target.work"]
+        self.assertEqual(summary["count"], 1)
+        self.assertAlmostEqual(summary["total"], 0.5)
+
+    def test_dump(self):
+        instrumentation = Instrumentation()
+        instrumentation.count("writes", 2)
+        instrumentation.gauge("size", lambda: 3)
+        path = os.path.join(tempfile.mkdtemp(), "report.json")
+        instrumentation.dump(path)
+        with open(path) as file:
+            report = json.load(file)
+        self.assertEqual(report["counters"], {"writes": 2})
+        self.assertEqual(report["gauges"], {"size": 3})
+
+    def test_enabled(self):
+        os.environ.pop(ENABLE_VARIABLE, None)
+        self.assertFalse(enabled())
+        os.environ[ENABLE_VARIABLE] = "1"
+        try:
+            self.assertTrue(enabled())
+        finally:
+            del os.environ[ENABLE_VARIABLE]
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from editor3d.lod import *
+from editor3d.stl import welded_mesh
+
+
+def grid(side):
+    # flat square of 2 * (side - 1) ** 2 triangles facing +z
+    x, y = np.meshgrid(np.arange(side, dtype=np.float32), np.arange(side, dtype=np.float32))
+    points = np.stack([x, y, np.zeros_like(x)], axis=-1)
+    a, b = points[:-1, :-1].reshape(-1, 3), points[:-1, 1:].reshape(-1, 3)
+    c, d = points[1:, :-1].reshape(-1, 3), points[1:, 1:].reshape(-1, 3)
+    return welded_mesh(np.concatenate([np.stack([a, b, c], axis=1), np.stack([b, d, c], axis=1)]))
+
+
+class TestLOD(unittest.TestCase):
+    def test_cluster(self):
+        mesh = grid(65)
+        level = cluster(mesh, 16)
+        self.assertLess(level.triangle_count, mesh.triangle_count / 4)
+        self.assertGreater(level.triangle_count, 0)
+        self.assertLess(int(level.indices.max()), level.vertex_count)
+        # winding and normals survive the simplification
+        np.testing.assert_allclose(level.normals, [[0, 0, 1]] * level.vertex_count, atol=1e-6)
+        low, high = level.bounds()
+        np.testing.assert_allclose(low[:2], 0, atol=2.5)
+        np.testing.assert_allclose(high[:2], 64, atol=2.5)
+
+    def test_levels(self):
+        mesh = grid(33)
+        levels, report = build_levels(mesh, (16, 4, 1))
+        self.assertIs(levels[0], mesh)
+        counts = [_.triangle_count for _ in levels]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual([_[0] for _ in report], counts)
+
+    def test_thresholds(self):
+        self.assertEqual(thresholds(2), [THRESHOLDS[0], 0.0])
+        self.assertEqual(len(thresholds(len(RESOLUTIONS) + 1)), len(RESOLUTIONS) + 1)
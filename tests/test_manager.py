@@ -0,0 +1,128 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the editor runs offscreen in a child process, Qt allows one application per process
+PREFIX = """
+import json, os, sys
+sys.argv = sys.argv[:1]
+from editor3d.manager import Manager
+from editor3d.objects import Box3D, Sphere3D, walk
+manager = Manager()
+"""
+SUFFIX = """
+print(json.dumps(result))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def run_manager(script):
+    # result of the script, it runs against a new Manager in an empty directory and sets result
+    environment = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=ROOT)
+    with tempfile.TemporaryDirectory() as directory:
+        output = subprocess.run([sys.executable, "-c", PREFIX + textwrap.dedent(script) + SUFFIX],
+                                capture_output=True, text=True, cwd=directory, env=environment, timeout=120)
+    if output.returncode:
+        raise AssertionError(output.stderr)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+@unittest.skipIf(importlib.util.find_spec("PySide2") is None, "PySide2 is not installed")
+class TestManager(unittest.TestCase):
+    def test_sync_stats(self):
+        result = run_manager("""
+            manager.create_box()
+            manager.create_sphere()
+            box, sphere = sorted(manager.object_root.children, key=lambda obj: obj.id)
+            manager.sync()
+            before = dict(manager.sync_stats)
+            # one tick: five moves and turns of the box, a color and a move below the box keeping the world pose
+            for x in range(5):
+                manager.update_position(box, (x, 0, 0))
+                manager.update_rotation(box, (0, x, 0))
+            manager.update_color(box, "#ff0000")
+            manager.set_parent(sphere, box)
+            manager.sync()
+            result = before, manager.sync_stats
+        """)
+        before, after = result
+        self.assertEqual(after["requested"] - before["requested"], 14)
+        self.assertEqual(after["applied"] - before["applied"], 6)
+        self.assertEqual(after["last_avoided"], 8)
+        self.assertGreaterEqual(after["avoided"], 0)
+
+    def test_pick_exact(self):
+        result = run_manager("""
+            manager.create_sphere()
+            manager.create_box()
+            sphere, box = sorted(manager.object_root.children, key=lambda obj: obj.id)
+            manager.update_position(box, (0.9, 0.9, 0))
+            # the bounds of the sphere are entered first, the ray passes the sphere and hits the box
+            result = [getattr(manager.pick(origin, (0, 0, 1)), "name", None)
+                      for origin in ((0.8, 0.8, -10), (0, 0, -10), (-0.9, 0.9, -10))]
+        """)
+        self.assertEqual(result, ["Box", "Sphere", None])
+
+    def test_tables_by_id(self):
+        result = run_manager("""
+            def tables():
+                # after the pending sync and collision check every side table holds ids of shown objects only
+                manager.check_collisions()
+                keys = [*manager.lods, *manager.sphere_levels, *manager.sync_pending, *manager.highlighted,
+                        *manager.bvh.slots]
+                assert all(isinstance(key, int) and manager.object(key) is not None for key in keys), keys
+                return sorted(manager.sphere_levels), sorted(manager.highlighted), sorted(manager.bvh.slots)
+
+            manager.create_sphere()
+            manager.create_box()
+            sphere, box = sorted(manager.object_root.children, key=lambda obj: obj.id)
+            manager.set_collision_highlight(True)
+            created = tables()
+            manager.update_color(sphere, "#00ff00")
+            manager.delete_object(sphere)
+            deleted = tables()
+            manager.undo()
+            restored = tables()
+            manager.export_scene("scene.ndjson")
+            manager.import_scene("scene.ndjson")
+            while manager.scene_import is not None:
+                manager._import_scene_step()
+            imported = tables()
+            result = [sphere.id, box.id], created, deleted, restored, imported, manager.pick((0, 0, -10), (0, 0, 1)).id
+        """)
+        (sphere, box), created, deleted, restored, imported, picked = result
+        self.assertEqual(created, [[sphere], [sphere, box], [sphere, box]])
+        self.assertEqual(deleted, [[], [], [box]])
+        self.assertEqual(restored, created)
+        self.assertEqual(len(imported[0]), 2)
+        self.assertEqual(len(imported[1]), 4)
+        self.assertEqual(len(imported[2]), 4)
+        self.assertIn(picked, imported[2])
+
+    def test_parent_none(self):
+        result = run_manager("""
+            manager.create_box()
+            manager.create_sphere()
+            box, sphere = sorted(manager.object_root.children, key=lambda obj: obj.id)
+            manager.update_position(box, (1, 2, 3))
+            manager.set_parent(sphere, box)
+            manager.sync()
+            nested = [sphere.parent is box, list(sphere.position)]
+            manager.set_parent(sphere, None)
+            manager.sync()
+            slot = manager.handles.slots[sphere.id]
+            result = nested, [sphere.parent is manager.object_root, list(sphere.position),
+                              manager.handles.parents[slot], manager.handles.entities[slot].parent() is manager.entity_root]
+        """)
+        nested, top = result
+        # the sphere keeps its place in the scene both times
+        self.assertEqual(nested, [True, [-1, -2, -3]])
+        self.assertEqual(top, [True, [0, 0, 0], 0, True])
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from editor3d.meshcache import *
+from editor3d.stl import load_stl, write_binary
+
+TRIANGLES = np.array([
+    [[0, 0, 0], [0, 1, 0], [1, 0, 0]],
+    [[1, 0, 0], [0, 1, 0], [1, 1, 0]],
+], dtype=np.float32)
+
+
+class TestMeshCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "part.stl")
+        self.cache_dir = os.path.join(self.directory.name, "cache")
+        write_binary(self.path, TRIANGLES)
+        self.loads = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def load(self, path, weld):
+        self.loads += 1
+        return load_stl(path, weld)
+
+    def test_memory_and_disk(self):
+        cache = MeshCache(self.cache_dir, load=self.load)
+        first = cache.get(self.path)
+        self.assertIs(cache.get(self.path), first)
+        self.assertEqual(first.vertex_count, 4)
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+        self.assertEqual(cache.bytes_served, 2 * first.nbytes)
+
+        # a new session maps the processed buffers instead of parsing the file again
+        reopened = MeshCache(self.cache_dir, load=self.load)
+        mesh = reopened.get(self.path)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(reopened.disk_hits, 1)
+        self.assertIsInstance(mesh.data, np.memmap)
+        np.testing.assert_array_equal(mesh.data, first.data)
+        np.testing.assert_array_equal(mesh.indices, first.indices)
+
+    def test_put(self):
+        cache = MeshCache(self.cache_dir, load=self.load, resolutions=(4,))
+        self.assertFalse(cache.cached(self.path))
+        mesh = load_stl(self.path, weld=True)
+        cache.put(self.path, mesh)
+        cache.put(self.path, mesh, 1)
+        self.assertTrue(cache.cached(self.path))
+        self.assertEqual(cache.memory_bytes, 2 * mesh.nbytes)
+        reopened = MeshCache(self.cache_dir, load=self.load, resolutions=(4,))
+        np.testing.assert_array_equal(reopened.get(self.path, 1).data, mesh.data)
+        self.assertEqual(self.loads, 0)
+
+    def test_invalidation(self):
+        cache = MeshCache(self.cache_dir, load=self.load)
+        cache.get(self.path)
+        write_binary(self.path, TRIANGLES[:1])
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(cache.get(self.path).triangle_count, 1)
+        self.assertEqual(cache.misses, 2)
+        # files of the old version are removed
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_budget(self):
+        other = os.path.join(self.directory.name, "other.stl")
+        write_binary(other, TRIANGLES[:1])
+        cache = MeshCache(self.cache_dir, budget=1, load=self.load)
+        cache.get(self.path)
+        cache.get(other)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.evictions, 1)
+        cache.get(self.path)
+        self.assertEqual(cache.disk_hits, 1)
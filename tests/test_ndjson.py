@@ -0,0 +1,108 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from editor3d.ndjson import *
+from editor3d.objects import Box3D, Sphere3D, STL3D, ObjectRoot, walk
+from editor3d.storage import SQLiteStorage, object_row
+
+
+def scene():
+    root = ObjectRoot()
+    box = Box3D("Box", (1, 2, 3), width=2)
+    box.set_parent(root)
+    Sphere3D("Ball", radius=2).set_parent(box)
+    STL3D("part.stl", "Part", scale=0.5).set_parent(root)
+    return root
+
+
+def rows(root):
+    return sorted(object_row(obj, root) for obj in walk(root))
+
+
+def lines(records):
+    file = io.StringIO()
+    write_records(records, file)
+    return file.getvalue().splitlines()
+
+
+class TestNDJSON(unittest.TestCase):
+    def test_round_trip(self):
+        root = scene()
+        text = lines(scene_records(root))
+        self.assertEqual(len(text), 3)
+        records = [json.loads(_) for _ in text]
+        self.assertEqual({_["type"]: "radius" in _ for _ in records}, {"Box3D": False, "Sphere3D": True, "STL3D": False})
+        loaded = SceneReader(read_rows(text)).attach_all(ObjectRoot())
+        self.assertEqual(rows(loaded), rows(root))
+
+    def test_children_first(self):
+        root = scene()
+        # children before their parents, a cycle and a missing parent
+        text = list(reversed(lines(scene_records(root))))
+        # ids above the scene, the objects counter is shared by all tests
+        last = max(obj.id for obj in walk(root))
+        text.append(json.dumps({"id": last + 1, "parent": last + 2, "type": "Sphere3D", "position": [0, 0, 0],
+                                "rotation": [0, 0, 0], "radius": 1}))
+        text.append(json.dumps({"id": last + 2, "parent": last + 1, "type": "Sphere3D", "position": [0, 0, 0],
+                                "rotation": [0, 0, 0], "radius": 1}))
+        text.append(json.dumps({"id": last + 3, "parent": last + 999, "type": "Box3D", "position": [0, 0, 0],
+                                "rotation": [0, 0, 0]}))
+        reader = SceneReader(read_rows(text))
+        added = []
+        while not reader.done:
+            chunk = reader.read(2)
+            for obj in chunk:
+                self.assertTrue(obj.parent is None or obj.parent in added)
+                added.append(obj)
+        self.assertEqual(len(added), 6)
+        self.assertEqual(reader.orphans, 2)
+        loaded = ObjectRoot()
+        for obj in added:
+            if obj.parent is None:
+                obj.parent = loaded
+                loaded.children.add(obj)
+        self.assertEqual(rows(loaded)[:3], rows(root))
+
+    def test_fresh_ids(self):
+        root = scene()
+        reader = SceneReader(read_rows(lines(scene_records(root))), fresh_ids=True)
+        objs = reader.read(10)
+        self.assertTrue({obj.id for obj in objs}.isdisjoint(obj.id for obj in walk(root)))
+        self.assertEqual(sum(1 for obj in objs if obj.parent is None), 2)
+
+    def test_errors(self):
+        text = lines(scene_records(scene()))
+        for line in ("{broken", json.dumps({"id": 5, "type": "Cone", "position": [0, 0, 0], "rotation": [0, 0, 0]}),
+                     json.dumps({"id": 5, "type": "Box3D", "rotation": [0, 0, 0]})):
+            with self.assertRaisesRegex(ValueError, "scene.ndjson line 5"):
+                SceneReader(read_rows(text + [""] + [line], "scene.ndjson")).read(10)
+        with self.assertRaisesRegex(ValueError, "used twice"):
+            SceneReader(read_rows(text + [text[0]])).read(10)
+
+    def test_field_values(self):
+        box = {"id": 5, "type": "Box3D", "position": [0, 0, 0], "rotation": [0, 0, 0]}
+        for fields in ({"radius": "big"}, {"width": [1]}, {"scale": None, "height": {}}, {"path": 3},
+                       {"color": [1]}, {"color": "red"}, {"color": "#00ff0"}):
+            with self.assertRaises(ValueError):
+                record_row(dict(box, **fields))
+        row = record_row(dict(box, width=2, length="3", color="#00FF00", path="part.stl"))
+        self.assertEqual(row[COLUMNS.index("width")], 2.0)
+        self.assertEqual(row[COLUMNS.index("length")], 3.0)
+        self.assertIsNone(row[COLUMNS.index("radius")])
+        self.assertEqual(row[COLUMNS.index("color")], "#00FF00")
+        self.assertEqual(row[COLUMNS.index("path")], "part.stl")
+
+    def test_sqlite_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "scene.db")
+            root = scene()
+            storage = SQLiteStorage(filename, ObjectRoot(), delay=0.0)
+            self.assertEqual(storage.write_rows(object_row(obj, root) for obj in walk(root)), 3)
+            storage.close()
+            records = list(sqlite_records(filename))
+            self.assertEqual([_["id"] for _ in records], sorted(obj.id for obj in walk(root)))
+            loaded = SceneReader(record_row(_) for _ in records).attach_all(ObjectRoot())
+            self.assertEqual(rows(loaded), rows(root))
@@ -0,0 +1,42 @@
+import pickle
+import unittest
+
+from editor3d.objects import *
+
+
+class TestChanges(unittest.TestCase):
+    def test_take_changes(self):
+        box = Box3D()
+        self.assertEqual(box.take_changes(), set())
+        box.set_position((1, 2, 3))
+        box.set_position((2, 2, 3))
+        box.set_color("#ff0000")
+        self.assertEqual(box.take_changes(), {"position", "color"})
+        self.assertEqual(box.take_changes(), set())
+
+    def test_undo_marks(self):
+        box = Box3D()
+        operation = box.set_width(4)
+        box.take_changes()
+        operation.undo()
+        self.assertEqual(box.take_changes(), {"dimension"})
+
+    def test_operation_by_id(self):
+        # the undo entry refers to the object by id and does not keep it alive
+        box = Box3D()
+        operation = box.set_width(4)
+        self.assertEqual((operation.target_id, operation.name), (box.id, "set_width"))
+        self.assertIs(operation.target, box)
+        self.assertTrue(operation.can_merge(box.set_width(5)))
+        self.assertFalse(operation.can_merge(box.set_length(5)))
+        operation.undo()
+        self.assertEqual(box.width, 1)
+        del box
+        self.assertIsNone(operation.target)
+
+    def test_not_pickled(self):
+        box = Box3D()
+        box.set_position((1, 0, 0))
+        copy = pickle.loads(pickle.dumps(box))
+        self.assertEqual(copy.take_changes(), set())
+        self.assertEqual(copy.position, (1, 0, 0))
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from editor3d.bvh import BVH
+from editor3d.objects import Box3D, Sphere3D
+from editor3d.picking import *
+from editor3d.transforms import world_matrix
+
+
+def distance(obj, origin, direction):
+    origin, direction = local_ray(world_matrix(obj), np.asarray(origin, float), np.asarray(direction, float))
+    if isinstance(obj, Sphere3D):
+        return ray_sphere(obj.radius, origin, direction)
+    half = np.array([obj.width, obj.length, obj.height]) / 2
+    return ray_box(-half, half, origin, direction)
+
+
+def bounds(obj):
+    corners = np.array([(x, y, z, 1.0) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)])
+    if isinstance(obj, Sphere3D):
+        corners[:, :3] *= obj.radius
+    else:
+        corners[:, :3] *= np.array([obj.width, obj.length, obj.height]) / 2
+    corners = corners @ world_matrix(obj).T
+    return corners[:, :3].min(axis=0), corners[:, :3].max(axis=0)
+
+
+class TestPicking(unittest.TestCase):
+    def test_sphere(self):
+        down = np.array([0.0, 0, 1])
+        self.assertEqual(ray_sphere(1, np.array([0.0, 0, -5]), down), 4)
+        self.assertEqual(ray_sphere(1, np.array([0.0, 0.5, 0]), down), 0)
+        self.assertEqual(ray_sphere(1, np.array([0.8, 0.8, -5]), down), np.inf)
+        self.assertEqual(ray_sphere(1, np.array([0.0, 0, 5]), down), np.inf)
+
+    def test_oriented_box(self):
+        box = Box3D(rotation=(0, 0, 45), width=2, length=2, height=2)
+        # both rays enter the world aligned bounds, the second one passes the turned corner
+        self.assertAlmostEqual(distance(box, (1.2, 0, -10), (0, 0, 1)), 9)
+        self.assertEqual(distance(box, (1.2, 1.2, -10), (0, 0, 1)), np.inf)
+
+    def test_triangles(self):
+        triangles = np.array([[(0, 0, 0), (1, 0, 0), (0, 1, 0)], [(0, 0, 2), (1, 0, 2), (0, 1, 2)]], np.float32)
+        self.assertEqual(ray_triangles(triangles, np.array([0.2, 0.2, -1]), np.array([0.0, 0, 1])), 1)
+        self.assertEqual(ray_triangles(triangles, np.array([0.2, 0.2, 1]), np.array([0.0, 0, 1])), 1)
+        self.assertEqual(ray_triangles(triangles, np.array([0.8, 0.8, -1]), np.array([0.0, 0, 1])), np.inf)
+        self.assertEqual(ray_triangles(triangles, np.array([0.2, 0.2, -1]), np.array([1.0, 0, 0])), np.inf)
+
+    def test_overlapping_bounds(self):
+        sphere = Sphere3D(radius=1)
+        box = Box3D(position=(0.9, 0.9, 0))
+        bvh = BVH()
+        for obj in (sphere, box):
+            bvh.insert(obj, *bounds(obj))
+
+        def pick(origin, direction):
+            return nearest_hit(bvh.ray_hits(origin, direction), lambda obj: distance(obj, origin, direction))
+
+        # the bounds of the sphere come first but only the box is hit
+        origin, direction = (0.8, 0.8, -10), (0, 0, 1)
+        self.assertIs(bvh.ray(origin, direction)[0], sphere)
+        self.assertEqual(pick(origin, direction), (box, 9.5))
+        self.assertEqual(pick((0, 0, -10), (0, 0, 1)), (sphere, 9))
+        self.assertIsNone(pick((-0.9, 0.9, -10), (0, 0, 1)))
+        self.assertEqual([obj for obj, _ in bvh.ray_hits(origin, direction)], [sphere, box])
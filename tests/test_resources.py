@@ -0,0 +1,38 @@
+import unittest
+from editor3d.resources import *
+
+
+class MockResource:
+    def __init__(self, key):
+        self.key = key
+        self.destroyed = False
+
+
+class TestResourceCache(unittest.TestCase):
+    def test_sharing(self):
+        cache = ResourceCache(MockResource)
+        first = cache.acquire(("box", 1, 1, 1))
+        second = cache.acquire(("box", 1, 1, 1))
+        other = cache.acquire(("box", 2, 1, 1))
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.key(other), ("box", 2, 1, 1))
+
+    def test_eviction(self):
+        destroyed = []
+        cache = ResourceCache(MockResource, destroyed.append)
+        first = cache.acquire("#ff0000")
+        cache.acquire("#ff0000")
+
+        cache.release(first)
+        self.assertEqual(destroyed, [])
+        cache.release(first)
+        self.assertEqual(destroyed, [first])
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        # a new acquire after eviction creates a fresh resource
+        self.assertIsNot(cache.acquire("#ff0000"), first)
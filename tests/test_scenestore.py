@@ -0,0 +1,88 @@
+import pickle
+import unittest
+from editor3d.objects import Box3D, Sphere3D
+from editor3d.scenestore import *
+from editor3d.undopipeline import Pipeline
+
+
+class MockRoot:
+    def __init__(self):
+        self.children = set()
+
+
+class TestSceneStore(unittest.TestCase):
+    def test_views(self):
+        store = SceneStore(capacity=1)
+        root = MockRoot()
+        box = store.add(Box3D, position=(1, 2, 3), dimension=(4, 5, 6))
+        box.set_parent(root)
+        sphere = store.add(Sphere3D, color="#ff00ff", dimension=(2, 0, 0))
+        sphere.set_parent(box)
+
+        self.assertIsInstance(sphere, Sphere3D)
+        self.assertEqual(sphere.radius, 2)
+        self.assertEqual(sphere.color, "#ff00ff")
+        self.assertEqual(box.position, (1, 2, 3))
+        self.assertEqual((box.width, box.length, box.height), (4, 5, 6))
+        self.assertIs(sphere.parent, box)
+        self.assertEqual(box.children, {sphere})
+        self.assertEqual(root.children, {box})
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.capacity, 2)
+
+    def test_no_dict(self):
+        # views keep their state in the store and their slots only
+        store = SceneStore()
+        views = [store.add(cls) for cls in (Box3D, Sphere3D)]
+        for view in views:
+            view.set_color("#00ff00")
+            self.assertFalse(hasattr(view, "__dict__"))
+            self.assertEqual(view.take_changes(), {"color"})
+        self.assertFalse(hasattr(Box3D(), "__dict__"))
+
+    def test_operations(self):
+        store = SceneStore()
+        box = store.add(Box3D)
+        sphere = store.add(Sphere3D)
+        pipeline = Pipeline()
+
+        pipeline.add_operation(sphere.set_radius(5))
+        pipeline.add_operation(box.set_dimension((2, 3, 4)))
+        pipeline.add_operation(box.set_color("#123456"))
+        self.assertEqual(store.dimension[box.row].tolist(), [2, 3, 4])
+
+        pipeline.undo()
+        pipeline.undo()
+        pipeline.undo()
+        self.assertEqual(sphere.radius, 1)
+        self.assertEqual(box.width, 1)
+        self.assertEqual(box.color, "#dddddd")
+
+    def test_remove_and_reuse(self):
+        store = SceneStore()
+        root = MockRoot()
+        box = store.add(Box3D)
+        box.set_parent(root)
+        store.add(Sphere3D).set_parent(box)
+        store.remove(box)
+        self.assertEqual(len(store), 0)
+        self.assertEqual(root.children, set())
+
+        sphere = store.add(Sphere3D)
+        self.assertLess(sphere.row, 2)
+        self.assertEqual(len(store), 1)
+
+    def test_pickle_as_plain(self):
+        store = SceneStore()
+        root = MockRoot()
+        box = store.add(Box3D, name="Box", dimension=(1, 2, 3))
+        box.set_parent(root)
+        store.add(Sphere3D).set_parent(box)
+
+        loaded = pickle.loads(pickle.dumps(root))
+        (loaded_box,) = loaded.children
+        self.assertIs(type(loaded_box), Box3D)
+        self.assertEqual(loaded_box.id, box.id)
+        self.assertEqual(loaded_box.length, 2)
+        (loaded_sphere,) = loaded_box.children
+        self.assertIs(loaded_sphere.parent, loaded_box)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from editor3d.objects import Box3D, Sphere3D, STL3D
+from editor3d.snapshot import *
+
+
+class MockRoot:
+    def __init__(self):
+        self.children = set()
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "scene.snapshot")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_roundtrip(self):
+        root = MockRoot()
+        box = Box3D("Box", (1, 2, 3), (0, 90, 0), "#112233", length=2, width=3, height=4)
+        box.set_parent(root)
+        sphere = Sphere3D("Sphäre", color="#ff0000", radius=0.5)
+        sphere.set_parent(box)
+        stl = STL3D("part.stl", name="Part", scale=2.0)
+        stl.set_parent(root)
+        write_snapshot(self.filename, *build_columns(root))
+
+        snapshot = Snapshot(self.filename)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(len(snapshot.top_level_rows()), 2)
+        names = sorted(snapshot.name(row) for row in range(len(snapshot)))
+        self.assertEqual(names, ["Box", "Part", "Sphäre"])
+
+        loaded = snapshot.load_tree(MockRoot())
+        by_name = {_.name: _ for _ in loaded.children}
+        loaded_box = by_name["Box"]
+        self.assertEqual(loaded_box.id, box.id)
+        self.assertEqual(loaded_box.position, (1, 2, 3))
+        self.assertEqual((loaded_box.width, loaded_box.length, loaded_box.height), (3, 2, 4))
+        self.assertEqual(loaded_box.color, "#112233")
+        (loaded_sphere,) = loaded_box.children
+        self.assertIs(loaded_sphere.parent, loaded_box)
+        self.assertEqual(loaded_sphere.radius, 0.5)
+        self.assertEqual(by_name["Part"].path, "part.stl")
+        self.assertEqual(by_name["Part"].scale, 2.0)
+
+    def test_empty(self):
+        write_snapshot(self.filename, *build_columns(MockRoot()))
+        snapshot = Snapshot(self.filename)
+        self.assertEqual(len(snapshot), 0)
+        self.assertEqual(len(snapshot.load_tree(MockRoot()).children), 0)
+
+    def test_storage_bytes(self):
+        storage = SnapshotStorage(self.filename, MockRoot(), delay=0.0)
+        Box3D().set_parent(storage.get_root())
+        storage.store()
+        columns = Snapshot(self.filename).columns
+        self.assertEqual(storage.last_bytes, HEADER.size + sum(column.nbytes for column in columns.values()))
+        self.assertEqual(storage.stats()["last_bytes"], storage.last_bytes)
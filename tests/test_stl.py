@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from editor3d.stl import *
+
+# tetrahedron, every corner is shared by three faces
+TETRAHEDRON = np.array([
+    [[0, 0, 0], [0, 1, 0], [1, 0, 0]],
+    [[0, 0, 0], [1, 0, 0], [0, 0, 1]],
+    [[0, 0, 0], [0, 0, 1], [0, 1, 0]],
+    [[1, 0, 0], [0, 1, 0], [0, 0, 1]],
+], dtype=np.float32)
+
+
+class TestSTL(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_binary(self):
+        path = self._path("part.stl")
+        # binary headers starting with "solid" must not be taken for ASCII
+        write_binary(path, TETRAHEDRON, b"solid but binary")
+        self.assertTrue(is_binary(path))
+        np.testing.assert_array_equal(read_binary(path), TETRAHEDRON)
+
+        mesh = load_stl(path)
+        self.assertEqual(mesh.triangle_count, 4)
+        self.assertEqual(mesh.vertex_count, 12)
+        np.testing.assert_array_equal(mesh.triangles(), TETRAHEDRON)
+        np.testing.assert_allclose(mesh.normals[:3], [[0, 0, -1]] * 3)
+        np.testing.assert_allclose(np.linalg.norm(mesh.normals, axis=1), 1, rtol=1e-6)
+
+    def test_ascii(self):
+        path = self._path("part.stl")
+        with open(path, "w") as file:
+            file.write("solid part\n")
+            for triangle in TETRAHEDRON:
+                file.write("  facet normal 0 0 0\n    outer loop\n")
+                for vertex in triangle:
+                    file.write("      vertex {} {} {}\n".format(*vertex))
+                file.write("    endloop\n  endfacet\n")
+            file.write("endsolid part\n")
+        self.assertFalse(is_binary(path))
+        np.testing.assert_array_equal(read_triangles(path), TETRAHEDRON)
+
+    def test_weld(self):
+        path = self._path("part.stl")
+        write_binary(path, TETRAHEDRON)
+        mesh = load_stl(path, weld=True)
+        self.assertEqual(mesh.vertex_count, 4)
+        self.assertEqual(mesh.triangle_count, 4)
+        np.testing.assert_array_equal(mesh.triangles(), TETRAHEDRON)
+        # the corner at the origin averages three axis aligned faces
+        origin = np.flatnonzero((mesh.vertices == 0).all(axis=1))[0]
+        np.testing.assert_allclose(mesh.normals[origin], [-3 ** -0.5] * 3, rtol=1e-6)
+
+    def test_truncated(self):
+        path = self._path("part.stl")
+        write_binary(path, TETRAHEDRON)
+        with open(path, "r+b") as file:
+            file.truncate(os.path.getsize(path) - 10)
+        with self.assertRaises(ValueError):
+            load_stl(path)
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from editor3d.lod import build_levels
+from editor3d.stl import load_stl, write_binary
+from editor3d.stlimport import *
+
+TRIANGLES = np.array([
+    [[0, 0, 0], [0, 1, 0], [1, 0, 0]],
+    [[1, 0, 0], [0, 1, 0], [1, 1, 0]],
+], dtype=np.float32)
+
+
+class TestStlImport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = []
+        for index in range(3):
+            path = os.path.join(self.directory.name, "part{}.stl".format(index))
+            write_binary(path, TRIANGLES + index)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_shared_memory(self):
+        name, layout = process_file(self.paths[1], resolutions=(4,))
+        levels = receive(name, layout)
+        expected, _ = build_levels(load_stl(self.paths[1], weld=True), (4,))
+        self.assertEqual(len(levels), 2)
+        for level, mesh in zip(levels, expected):
+            np.testing.assert_array_equal(level.data, mesh.data)
+            np.testing.assert_array_equal(level.indices, mesh.indices)
+        # the block is gone once received
+        with self.assertRaises(FileNotFoundError):
+            release(name)
+
+    def test_pool(self):
+        importer = ParallelImport(self.paths + [os.path.join(self.directory.name, "missing.stl")], workers=2)
+        results = dict(importer.results())
+        self.assertEqual(importer.progress(), (4, 4))
+        self.assertTrue(importer.finished)
+        self.assertIsInstance(results.pop(os.path.join(self.directory.name, "missing.stl")), OSError)
+        for index, path in enumerate(self.paths):
+            np.testing.assert_allclose(results[path][0].bounds()[0], (index, index, index))
@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from editor3d.objects import Box3D, Sphere3D
+from editor3d.storage import *
+
+
+class MockRoot:
+    def __init__(self):
+        self.children = set()
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "Shapes.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_store_and_load(self):
+        storage = Storage(self.filename, MockRoot())
+        Box3D(name="child").set_parent(storage.get_root())
+        storage.store()
+        self.assertFalse(os.path.exists(self.filename + ".tmp"))
+
+        loaded = Storage(self.filename, MockRoot())
+        self.assertEqual([_.name for _ in loaded.get_root().children], ["child"])
+
+    def test_merge_burst(self):
+        storage = Storage(self.filename, MockRoot(), delay=0.05)
+        for _ in range(10):
+            storage.schedule_store()
+        self.assertFalse(os.path.exists(self.filename))
+
+        time.sleep(0.5)
+        self.assertTrue(os.path.exists(self.filename))
+        self.assertEqual(storage.writes, 1)
+        self.assertEqual(storage.merged, 9)
+
+    def test_flush(self):
+        storage = Storage(self.filename, MockRoot(), delay=60)
+        storage.schedule_store()
+        storage.schedule_store()
+        storage.flush()
+        self.assertTrue(os.path.exists(self.filename))
+        self.assertEqual(storage.writes, 1)
+        self.assertEqual(storage.merged, 1)
+
+        # nothing changed since, flushing again does not write
+        storage.flush()
+        self.assertEqual(storage.writes, 1)
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "Shapes.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_roundtrip(self):
+        storage = SQLiteStorage(self.filename, MockRoot())
+        root = storage.get_root()
+        box = Box3D(position=(1, 2, 3), length=4)
+        box.set_parent(root)
+        sphere = Sphere3D(color="#ff0000", radius=2.5)
+        sphere.set_parent(box)
+        storage.mark_changed(box)
+        storage.mark_changed(sphere)
+        storage.close()
+
+        loaded = SQLiteStorage(self.filename, MockRoot())
+        (loaded_box,) = loaded.get_root().children
+        (loaded_sphere,) = loaded_box.children
+        self.assertIsInstance(loaded_box, Box3D)
+        self.assertEqual(loaded_box.id, box.id)
+        self.assertEqual(loaded_box.position, (1, 2, 3))
+        self.assertEqual(loaded_box.length, 4)
+        self.assertIs(loaded_box.parent, loaded.get_root())
+        self.assertIs(loaded_sphere.parent, loaded_box)
+        self.assertEqual(loaded_sphere.radius, 2.5)
+        self.assertEqual(loaded_sphere.color, "#ff0000")
+        loaded.close()
+
+    def test_incremental(self):
+        storage = SQLiteStorage(self.filename, MockRoot())
+        root = storage.get_root()
+        boxes = [Box3D(name=str(i)) for i in range(10)]
+        for box in boxes:
+            box.set_parent(root)
+            storage.mark_changed(box)
+        storage.store()
+
+        boxes[3].set_name("changed")
+        storage.mark_changed(boxes[3])
+        changed, deleted, rows = storage._snapshot()
+        self.assertEqual(len(rows), 1)
+        storage._write((changed, deleted, rows))
+
+        storage.mark_deleted(boxes[5])
+        boxes[5].set_parent(None)
+        storage.close()
+
+        loaded = SQLiteStorage(self.filename, MockRoot())
+        names = sorted(_.name for _ in loaded.get_root().children)
+        self.assertEqual(len(names), 9)
+        self.assertIn("changed", names)
+        self.assertNotIn("5", names)
+        loaded.close()
+
+    def test_edit_after_delete(self):
+        storage = SQLiteStorage(self.filename, MockRoot())
+        root = storage.get_root()
+        boxes = [Box3D(name=str(i)) for i in range(3)]
+        for box in boxes:
+            box.set_parent(root)
+            storage.mark_changed(box)
+        storage.store()
+
+        # a change arriving after the delete keeps the tombstone
+        storage.mark_deleted(boxes[0])
+        boxes[0].set_parent(None)
+        boxes[0].set_name("late")
+        storage.mark_changed(boxes[0])
+        # an object added again, as by undo of the delete, replaces it
+        storage.mark_deleted(boxes[1])
+        boxes[1].set_parent(None)
+        boxes[1].set_parent(root)
+        storage.mark_changed(boxes[1])
+        storage.close()
+
+        loaded = SQLiteStorage(self.filename, MockRoot())
+        names = sorted(_.name for _ in loaded.get_root().children)
+        self.assertEqual(names, ["1", "2"])
+        loaded.close()
+
+    def test_failed_write(self):
+        storage = SQLiteStorage(self.filename, MockRoot())
+        root = storage.get_root()
+        boxes = [Box3D(name=str(i)) for i in range(3)]
+        for box in boxes[:2]:
+            box.set_parent(root)
+            storage.mark_changed(box)
+        storage.store()
+
+        boxes[2].set_parent(root)
+        storage.mark_changed(boxes[2])
+        storage.mark_deleted(boxes[0])
+        boxes[0].set_parent(None)
+        storage.schedule_store()
+        write = storage._write
+
+        def locked(data):
+            storage._write = write
+            raise sqlite3.OperationalError("database is locked")
+
+        storage._write = locked
+        with self.assertRaises(sqlite3.OperationalError):
+            storage.store()
+        # the row and the tombstone are written by the next store
+        storage.flush()
+        storage.close()
+
+        loaded = SQLiteStorage(self.filename, MockRoot())
+        names = sorted(_.name for _ in loaded.get_root().children)
+        self.assertEqual(names, ["1", "2"])
+        loaded.close()
+
+    def test_migrate_pickle(self):
+        storage = Storage(self.filename, MockRoot())
+        Sphere3D(name="old").set_parent(storage.get_root())
+        storage.store()
+
+        migrated = SQLiteStorage(self.filename, MockRoot())
+        self.assertTrue(os.path.exists(self.filename + ".pickle.bak"))
+        migrated.close()
+
+        loaded = SQLiteStorage(self.filename, MockRoot())
+        self.assertEqual([_.name for _ in loaded.get_root().children], ["old"])
+        loaded.close()
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from editor3d.bvh import frustum_planes
+from editor3d.tessellation import *
+
+
+class TestTessellation(unittest.TestCase):
+    def test_levels(self):
+        policy = TessellationPolicy(budget=None)
+        levels = policy.level_of([0.0, 5.0, 50.0, 500.0, 5000.0])
+        self.assertEqual(levels.tolist(), sorted(levels.tolist(), reverse=True))
+        self.assertEqual(levels[0], len(SPHERE_LEVELS) - 1)
+        self.assertEqual(levels[-1], 0)
+        # the chosen level has enough slices for its outline
+        for size, level in zip([5.0, 50.0], levels[1:3]):
+            self.assertGreaterEqual(SPHERE_LEVELS[level][1], np.pi * size / PIXELS_PER_SLICE)
+
+    def test_hysteresis(self):
+        policy = TessellationPolicy(budget=None)
+        # the size at which the level 20 x 20 is no longer enough
+        edge = 20 * PIXELS_PER_SLICE / np.pi
+        level = policy.choose([edge * 0.99])[0]
+        self.assertEqual(SPHERE_LEVELS[level], (20, 20))
+        # small moves around the switching point keep the level
+        for size in (edge * 1.01, edge * 0.98, edge * 1.1):
+            self.assertEqual(policy.choose([size], [level])[0], level)
+        self.assertLess(policy.choose([edge * 1.3], [level])[0], level)
+        self.assertGreater(policy.choose([edge * 0.4], [level])[0], level)
+
+    def test_budget(self):
+        sizes = np.linspace(1, 1000, 1000)
+        free = TessellationPolicy(budget=None).choose(sizes)
+        policy = TessellationPolicy(budget=TessellationPolicy().total(free) // 4)
+        levels = policy.choose(sizes)
+        self.assertLessEqual(policy.total(levels), policy.budget)
+        self.assertLess(policy.bias, 1.0)
+        # larger spheres keep at least the detail of smaller ones
+        self.assertEqual(levels.tolist(), sorted(levels.tolist(), reverse=True))
+        self.assertTrue((levels >= free).all())
+
+    def test_projected_diameters(self):
+        view = np.identity(4)
+        view[2, 3] = -10.0
+        near, far = 0.1, 100.0
+        projection = np.array([[1, 0, 0, 0], [0, 1, 0, 0],
+                               [0, 0, -(far + near) / (far - near), -2 * far * near / (far - near)],
+                               [0, 0, -1, 0]], dtype=np.float64)
+        planes = frustum_planes(projection @ view)
+        sizes = projected_diameters([(0, 0, 0), (0, 0, 5), (0, 0, 20), (50, 0, 0)], [1, 1, 1, 1],
+                                    (0, 0, 10), 400.0, planes)
+        np.testing.assert_allclose(sizes[:2], [80.0, 160.0])
+        # behind the camera and far to the side
+        self.assertEqual(sizes[2], 0.0)
+        self.assertEqual(sizes[3], 0.0)
+
+    def test_triangles(self):
+        self.assertEqual(sphere_triangles(20, 20), 760)
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from editor3d.objects import Box3D, STL3D
+from editor3d.transforms import *
+
+
+class MockRoot:
+    def __init__(self):
+        self.children = set()
+
+
+class TestTransforms(unittest.TestCase):
+    def test_euler(self):
+        # yaw turns around y, x ends up at -z
+        matrix = local_matrices([(0, 0, 0)], [(0, 90, 0)], [1])[0]
+        np.testing.assert_allclose(matrix[:3, :3] @ (1, 0, 0), (0, 0, -1), atol=1e-12)
+        # pitch around x, roll around z, applied as yaw * pitch * roll
+        matrix = local_matrices([(0, 0, 0)], [(90, 0, 90)], [1])[0]
+        np.testing.assert_allclose(matrix[:3, :3] @ (1, 0, 0), (0, 0, 1), atol=1e-12)
+        np.testing.assert_allclose(euler_quaternions([(0, 0, 0)]), [[1, 0, 0, 0]])
+
+    def test_decompose(self):
+        matrix = local_matrices([(1, 2, 3)], [(30, 40, 50)], [2])[0]
+        position, rotation, scale = decompose(matrix)
+        np.testing.assert_allclose(position, (1, 2, 3))
+        np.testing.assert_allclose(rotation, (30, 40, 50))
+        self.assertAlmostEqual(scale, 2)
+
+    def test_tree(self):
+        root = MockRoot()
+        parent = Box3D(position=(10, 0, 0), rotation=(0, 90, 0))
+        parent.set_parent(root)
+        child = Box3D(position=(1, 0, 0))
+        child.set_parent(parent)
+        for index in range(20):
+            Box3D(position=(0, index, 0)).set_parent(root)
+
+        tree = TransformTree(root)
+        tree.add_tree()
+        np.testing.assert_allclose(tree.world_position(child), (10, 0, -1), atol=1e-12)
+        np.testing.assert_allclose(tree.world_matrix(child), world_matrix(child), atol=1e-12)
+
+        # only the moved subtree is recomputed
+        parent.set_position((0, 0, 0))
+        tree.mark_dirty(parent)
+        updated = tree.updated_rows
+        np.testing.assert_allclose(tree.world_position(child), (0, 0, -1), atol=1e-12)
+        self.assertEqual(tree.updated_rows - updated, 2)
+
+        tree.remove(parent)
+        self.assertNotIn(child, tree)
+        self.assertEqual(len(tree), 20)
+
+    def test_keep_world(self):
+        root = MockRoot()
+        parent = STL3D("part.stl", position=(5, 0, 0), rotation=(0, 0, 90), scale=2.0)
+        parent.set_parent(root)
+        obj = Box3D(position=(1, 2, 3), rotation=(10, 20, 30))
+        obj.set_parent(root)
+        before = world_matrix(obj)
+
+        undo = obj.set_parent(parent, keep_world=True)
+        self.assertIs(obj.parent, parent)
+        np.testing.assert_allclose(world_matrix(obj)[:3, 3], before[:3, 3], atol=1e-9)
+
+        undo.undo()
+        self.assertIs(obj.parent, root)
+        self.assertEqual(obj.position, (1, 2, 3))
@@ -0,0 +1,90 @@
+import importlib.util
+import textwrap
+import unittest
+
+from test_manager import run_manager
+
+# rows inserted and removed as [kind, parent name, first, last], None for the top level
+RECORD = """
+model = manager.qt_frontend.tree_model
+events = []
+
+def name(index):
+    obj = model.object(index)
+    return None if obj is None else obj.name
+
+def rows(obj=None):
+    index = model.index_of(obj)
+    return [name(model.index(row, 0, index)) for row in range(model.rowCount(index))]
+
+def taken():
+    result = list(events)
+    del events[:]
+    return result
+
+model.rowsInserted.connect(lambda parent, first, last: events.append(["insert", name(parent), first, last]))
+model.rowsRemoved.connect(lambda parent, first, last: events.append(["remove", name(parent), first, last]))
+for _ in range(3):
+    manager.create_box()
+a, b, c = sorted(manager.object_root.children, key=lambda obj: obj.id)
+for obj, label in ((a, "A"), (b, "B"), (c, "C")):
+    manager.update_name(obj, label)
+manager.sync()
+"""
+
+
+def run_model(script):
+    # result of script after RECORD, three boxes named A, B and C at the top level
+    return run_manager(RECORD + textwrap.dedent(script))
+
+
+@unittest.skipIf(importlib.util.find_spec("PySide2") is None, "PySide2 is not installed")
+class TestObjectTreeModel(unittest.TestCase):
+    def test_add_and_fetch(self):
+        result = run_model("""
+            added = taken(), rows()
+            # below a parent that was never expanded only the expand indicator changes
+            manager.set_parent(b, a)
+            manager.sync()
+            index = model.index_of(a)
+            moved = taken(), rows(), model.rowCount(index), model.hasChildren(index), model.canFetchMore(index)
+            model.fetchMore(index)
+            fetched = taken(), rows(a), model.canFetchMore(index)
+            model.fetchMore(index)
+            again = taken()
+            result = added, moved, fetched, again
+        """)
+        added, moved, fetched, again = result
+        self.assertEqual(added, [[["insert", None, 0, 0], ["insert", None, 1, 1], ["insert", None, 2, 2]],
+                                 ["A", "B", "C"]])
+        self.assertEqual(moved, [[["remove", None, 1, 1]], ["A", "C"], 0, True, True])
+        self.assertEqual(fetched, [[["insert", "A", 0, 0]], ["B"], False])
+        self.assertEqual(again, [])
+
+    def test_reparent_and_delete(self):
+        result = run_model("""
+            manager.set_parent(b, a)
+            manager.sync()
+            model.fetchMore(model.index_of(a))
+            taken()
+            # A is expanded, C moves from the top level to the end of its rows
+            manager.set_parent(c, a)
+            manager.sync()
+            reparented = taken(), rows(), rows(a)
+            manager.delete_object(b)
+            deleted = taken(), rows(a), model.index_of(c).row()
+            manager.undo()
+            manager.sync()
+            restored = taken(), rows(a)
+            # the rows below a removed parent are forgotten with it
+            manager.delete_object(a)
+            removed = taken(), rows(), sorted(model.positions), sorted(model.rows)
+            result = reparented, deleted, restored, removed
+        """)
+        reparented, deleted, restored, removed = result
+        self.assertEqual(reparented, [[["remove", None, 1, 1], ["insert", "A", 1, 1]], ["A"], ["B", "C"]])
+        self.assertEqual(deleted, [[["remove", "A", 0, 0]], ["C"], 0])
+        self.assertEqual(restored, [[["insert", "A", 1, 1]], ["C", "B"]])
+        self.assertEqual(removed[:2], [[["remove", None, 0, 0]], []])
+        # only the scene root is left fetched, nothing is listed
+        self.assertEqual(removed[2:], [[], [0]])
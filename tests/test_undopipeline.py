@@ -103,3 +103,293 @@ class TestPipeline(unittest.TestCase):
         self.assertEqual(target2.value, 0)
         self.assertEqual(len(pipeline.queue), 3)
         self.assertEqual(pipeline.position, 2)
+
+
+class MockNode:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.children = set()
+
+
+class MockScene:
+    def __init__(self):
+        self.alive = set()
+
+    def attach(self, target, parent):
+        target.parent = parent
+        self.alive.add(target)
+
+    def detach(self, target):
+        target.parent = None
+        self.alive.discard(target)
+
+
+class TestCompoundOperation(unittest.TestCase):
+    def test_undo_redo(self):
+        target1 = MockTarget(1)
+        target2 = MockTarget(2)
+        pipeline = Pipeline()
+
+        target1.set(10)
+        target2.set(20)
+        pipeline.add_operation(CompoundOperation([
+            Operation(target1, target1.set, 1, 10),
+            Operation(target2, target2.set, 2, 20),
+        ]))
+        self.assertEqual(len(pipeline.queue), 1)
+
+        self.assertEqual(pipeline.undo(), (target1, target2))
+        self.assertEqual((target1.value, target2.value), (1, 2))
+
+        self.assertEqual(pipeline.redo(), (target1, target2))
+        self.assertEqual((target1.value, target2.value), (10, 20))
+
+    def test_clean(self):
+        target1 = MockTarget(1)
+        target2 = MockTarget(2)
+        pipeline = Pipeline()
+
+        pipeline.add_operation(Operation(target1, target1.set, 0, 1))
+        pipeline.add_operation(CompoundOperation([Operation(target1, target1.set, 1, 3)]))
+        pipeline.add_operation(CompoundOperation([
+            Operation(target1, target1.set, 3, 4),
+            Operation(target2, target2.set, 0, 2),
+        ]))
+        pipeline.undo()
+
+        pipeline.clean(target1)
+        self.assertEqual(pipeline.history(target1), [])
+        self.assertEqual(len(pipeline.history(target2)), 1)
+        self.assertEqual(pipeline.redo(), (target2,))
+        self.assertEqual(pipeline.redo(), None)
+        self.assertEqual(pipeline.undo(), (target2,))
+        self.assertEqual(pipeline.undo(), None)
+
+
+class MockClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMerge(unittest.TestCase):
+    def test_merge_window(self):
+        clock = MockClock()
+        target = MockTarget(0)
+        pipeline = Pipeline(merge_window=1.0, clock=clock)
+
+        for value in range(1, 6):
+            pipeline.add_operation(Operation(target, target.set, value - 1, value))
+            target.set(value)
+            clock.now += 0.1
+        self.assertEqual(len(pipeline.queue), 1)
+
+        clock.now += 5
+        pipeline.add_operation(Operation(target, target.set, 5, 6))
+        target.set(6)
+        self.assertEqual(len(pipeline.queue), 2)
+
+        pipeline.undo()
+        self.assertEqual(target.value, 5)
+        pipeline.undo()
+        self.assertEqual(target.value, 0)
+        pipeline.redo()
+        self.assertEqual(target.value, 5)
+
+    def test_no_merge_across_targets(self):
+        target1 = MockTarget(0)
+        target2 = MockTarget(0)
+        pipeline = Pipeline(merge_window=1.0, clock=MockClock())
+
+        pipeline.add_operation(Operation(target1, target1.set, 0, 1))
+        pipeline.add_operation(Operation(target2, target2.set, 0, 1))
+        pipeline.add_operation(Operation(target1, target1.set, 1, 2))
+        self.assertEqual(len(pipeline.queue), 3)
+
+    def test_no_merge_after_undo(self):
+        target = MockTarget(0)
+        pipeline = Pipeline(merge_window=1.0, clock=MockClock())
+
+        pipeline.add_operation(Operation(target, target.set, 0, 1))
+        pipeline.add_operation(CompoundOperation([Operation(target, target.set, 1, 2)]))
+        pipeline.undo()
+        pipeline.add_operation(Operation(target, target.set, 1, 3))
+        self.assertEqual(len(pipeline.queue), 2)
+        self.assertEqual(pipeline.position, 1)
+
+    def test_session(self):
+        clock = MockClock()
+        target = MockTarget(0)
+        pipeline = Pipeline(clock=clock)
+
+        pipeline.add_operation(Operation(target, target.set, 0, 1))
+        with pipeline.session():
+            for value in range(2, 10):
+                clock.now += 10
+                pipeline.add_operation(Operation(target, target.set, value - 1, value))
+        pipeline.add_operation(Operation(target, target.set, 9, 10))
+        self.assertEqual(len(pipeline.queue), 3)
+        self.assertEqual(pipeline.queue[1].from_value, 1)
+        self.assertEqual(pipeline.queue[1].to_value, 9)
+
+
+class TestBoundedHistory(unittest.TestCase):
+    def test_max_size(self):
+        target = MockTarget(0)
+        pipeline = Pipeline(max_size=3)
+
+        for value in range(1, 6):
+            pipeline.add_operation(Operation(target, target.set, value - 1, value))
+            target.set(value)
+        self.assertEqual(len(pipeline.queue), 3)
+        self.assertEqual(pipeline.position, 2)
+
+        while pipeline.undo() is not None:
+            pass
+        self.assertEqual(target.value, 2)
+        self.assertEqual(pipeline.position, -1)
+
+    def test_max_bytes(self):
+        target = MockTarget("")
+        pipeline = Pipeline(max_bytes=2000)
+
+        for value in range(100):
+            pipeline.add_operation(Operation(target, target.set, "x" * value, "x" * (value + 1)))
+        self.assertLessEqual(pipeline.size_bytes, 2000)
+        self.assertLess(len(pipeline.queue), 100)
+        self.assertEqual(pipeline.position, len(pipeline.queue) - 1)
+
+    def test_truncate_keeps_size(self):
+        target = MockTarget(0)
+        pipeline = Pipeline()
+
+        for value in range(10):
+            pipeline.add_operation(Operation(target, target.set, value, value + 1))
+        size = pipeline.size_bytes
+        for _ in range(5):
+            pipeline.undo()
+        pipeline.add_operation(Operation(target, target.set, 5, 0))
+        self.assertEqual(len(pipeline.queue), 6)
+        self.assertLess(pipeline.size_bytes, size)
+
+        pipeline.clear()
+        self.assertEqual(pipeline.size_bytes, 0)
+
+
+class TestIndex(unittest.TestCase):
+    def test_clean_many(self):
+        targets = [MockTarget(0) for _ in range(200)]
+        pipeline = Pipeline()
+        for value in range(3):
+            for target in targets:
+                pipeline.add_operation(Operation(target, target.set, value, value + 1))
+                target.set(value + 1)
+
+        for target in targets[:150]:
+            pipeline.clean(target)
+        # compacted once more than half of the queue was cleaned
+        self.assertLess(len(pipeline.queue), 600)
+        self.assertEqual(len(pipeline.history(targets[-1])), 3)
+
+        undone = 0
+        while pipeline.undo() is not None:
+            undone += 1
+        self.assertEqual(undone, 150)
+        self.assertEqual(targets[-1].value, 0)
+        self.assertEqual(targets[0].value, 3)
+
+    def test_evicted_entries_leave_index(self):
+        target = MockTarget(0)
+        pipeline = Pipeline(max_size=2)
+        for value in range(5):
+            pipeline.add_operation(Operation(target, target.set, value, value + 1))
+        self.assertEqual(len(pipeline.history(target)), 2)
+
+
+class TestCreateDelete(unittest.TestCase):
+    def test_create(self):
+        scene = MockScene()
+        root = MockNode()
+        node = MockNode()
+        scene.attach(node, root)
+        pipeline = Pipeline()
+        pipeline.add_operation(CreateOperation(node, root, scene.attach, scene.detach))
+
+        self.assertIs(pipeline.undo(), node)
+        self.assertNotIn(node, scene.alive)
+        self.assertIs(pipeline.redo(), node)
+        self.assertIn(node, scene.alive)
+        self.assertIs(node.parent, root)
+
+    def test_delete(self):
+        scene = MockScene()
+        root = MockNode()
+        node = MockNode()
+        scene.attach(node, root)
+        pipeline = Pipeline()
+        pipeline.add_operation(Operation(node, MockTarget(0).set, 0, 1))
+        scene.detach(node)
+        pipeline.add_operation(DeleteOperation(node, root, scene.attach, scene.detach))
+
+        pipeline.undo()
+        self.assertIn(node, scene.alive)
+        self.assertIs(node.parent, root)
+        pipeline.redo()
+        self.assertNotIn(node, scene.alive)
+
+    def test_released_when_dropped(self):
+        scene = MockScene()
+        root = MockNode()
+        node = MockNode()
+        child = MockNode(node)
+        node.children.add(child)
+        target = MockTarget(0)
+        pipeline = Pipeline(max_size=2)
+
+        pipeline.add_operation(Operation(child, target.set, 0, 1))
+        pipeline.add_operation(DeleteOperation(node, root, scene.attach, scene.detach))
+        self.assertEqual(len(pipeline.history(child)), 1)
+
+        # the delete falls out of the history, the deleted subtree cannot come back
+        pipeline.add_operation(Operation(target, target.set, 1, 2))
+        pipeline.add_operation(Operation(target, target.set, 2, 3))
+        self.assertEqual(pipeline.history(node), [])
+        self.assertEqual(pipeline.history(child), [])
+
+
+class TestTransaction(unittest.TestCase):
+    def test_transaction(self):
+        target1 = MockTarget(0)
+        target2 = MockTarget(0)
+        pipeline = Pipeline()
+
+        with pipeline.transaction():
+            pipeline.add_operation(Operation(target1, target1.set, 0, 1))
+            pipeline.add_operation(Operation(target1, target1.set, 1, 2))
+            with pipeline.transaction():
+                pipeline.add_operation(CompoundOperation([Operation(target2, target2.set, 0, 3)]))
+            self.assertEqual(len(pipeline.queue), 0)
+        target1.set(2)
+        target2.set(3)
+
+        self.assertEqual(len(pipeline.queue), 1)
+        self.assertEqual(len(pipeline.queue[0].operations), 2)
+        self.assertEqual(pipeline.undo(), (target1, target2))
+        self.assertEqual((target1.value, target2.value), (0, 0))
+        pipeline.redo()
+        self.assertEqual((target1.value, target2.value), (2, 3))
+
+    def test_single_and_empty(self):
+        target = MockTarget(0)
+        pipeline = Pipeline()
+
+        with pipeline.transaction():
+            pass
+        self.assertEqual(len(pipeline.queue), 0)
+
+        with pipeline.transaction():
+            pipeline.add_operation(Operation(target, target.set, 0, 1))
+        self.assertIsInstance(pipeline.queue[0], Operation)
+        self.assertIs(pipeline.undo(), target)